@@ -0,0 +1,82 @@
+"""
+Distribuição dos eventos de jobs (LISTEN/NOTIFY) para os streams SSE.
+
+Uma única conexão de escuta no banco recebe os eventos de todos os jobs
+(canal ``job_events``, notificado pelo worker a cada lote gravado em
+agent_execution_logs); cada cliente SSE assina apenas o seu job_id e
+recebe os eventos numa fila asyncio própria.
+"""
+
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Set
+import asyncio
+import json
+import logging
+
+from worker.utils.database import CANAL_EVENTOS_JOB, DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+class DistribuidorEventos:
+    """Repassa as notificações do banco para as filas dos assinantes de cada job."""
+    
+    def __init__(self, db: DatabaseManager, tamanho_fila: int = 1000):
+        """
+        Inicializa o distribuidor (a escuta começa na primeira assinatura).
+        
+        Args:
+            db: Gerenciador do banco (dono da conexão de escuta)
+            tamanho_fila: Eventos mantidos por assinante lento antes de descartar
+        """
+        self.db = db
+        self.tamanho_fila = tamanho_fila
+        self._assinantes: Dict[str, Set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock_inicio = asyncio.Lock()
+    
+    async def _iniciar(self) -> None:
+        async with self._lock_inicio:
+            if self._loop is None:
+                await self.db.escutar_async(CANAL_EVENTOS_JOB, self._receber)
+                self._loop = asyncio.get_running_loop()
+                logger.info(f"Escutando eventos de jobs no canal '{CANAL_EVENTOS_JOB}'")
+    
+    def _receber(self, payload: str) -> None:
+        """Chamado no loop do banco: repassa o evento para o loop da API."""
+        try:
+            evento = json.loads(payload)
+        except ValueError:
+            return
+        if self._loop is not None and evento.get("job_id") in self._assinantes:
+            self._loop.call_soon_threadsafe(self._entregar, evento)
+    
+    def _entregar(self, evento: Dict[str, Any]) -> None:
+        for fila in self._assinantes.get(evento["job_id"], ()):
+            try:
+                fila.put_nowait(evento)
+            except asyncio.QueueFull:
+                pass  # Cliente lento: perde eventos intermediários, não trava os demais
+    
+    @asynccontextmanager
+    async def assinar(self, job_id: str):
+        """
+        Assina os eventos de um job enquanto o contexto estiver aberto.
+        
+        Args:
+            job_id: ID do job
+        
+        Yields:
+            Fila asyncio com os eventos do job
+        """
+        await self._iniciar()
+        fila: asyncio.Queue = asyncio.Queue(maxsize=self.tamanho_fila)
+        self._assinantes.setdefault(job_id, set()).add(fila)
+        try:
+            yield fila
+        finally:
+            assinantes = self._assinantes.get(job_id)
+            if assinantes is not None:
+                assinantes.discard(fila)
+                if not assinantes:
+                    del self._assinantes[job_id]
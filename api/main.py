@@ -5,16 +5,26 @@ Este módulo expõe uma API REST para monitoramento e gerenciamento
 dos jobs de clipping.
 """
 
+import asyncio
+import base64
+import json
 import logging
 import os
-from datetime import datetime
-from typing import List, Optional
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
 
+from api.eventos import DistribuidorEventos
+from worker.utils.database import DatabaseManager
+from worker.utils.metadata_externo import ArmazenamentoMetadata
+from worker.utils.publicador import FalhaPublicacao, PublicadorIndisponivel, PublicadorJobs
+
 # Configurar logging
 logging.basicConfig(
     level=os.getenv("LOG_LEVEL", "INFO"),
@@ -30,6 +40,19 @@ class ConfiguracoesAPI(BaseSettings):
     rabbitmq_url: str
     secret_key: str = "your-secret-key-change-in-production"
     log_level: str = "INFO"
+    db_pool_size: int = 5
+    db_pool_max_overflow: int = 5
+    publish_confirm_timeout: float = 30.0  # Espera máxima pelas confirmações do RabbitMQ
+    max_bulk_jobs: int = 1000
+    sse_keepalive_seconds: float = 15.0
+    max_jobs_page: int = 200  # Limite de GET /jobs (página ou ids)
+    
+    # MinIO (result_metadata grandes ficam fora do banco)
+    minio_endpoint: str = "minio:9000"
+    minio_access_key: str = "minioadmin"
+    minio_secret_key: str = "minioadmin"
+    minio_bucket: str = "clippings"
+    minio_use_ssl: bool = False
     
     class Config:
         env_file = ".env"
@@ -39,10 +62,16 @@ class ConfiguracoesAPI(BaseSettings):
 # Modelos Pydantic
 class JobRequest(BaseModel):
     """Modelo de requisição de job."""
-    instruction: str
+    instruction: str = Field(..., min_length=1)
+    url: Optional[str] = None
     parameters: Optional[dict] = None
 
 
+class BulkJobRequest(BaseModel):
+    """Modelo de requisição de jobs em lote (backfills)."""
+    jobs: List[JobRequest] = Field(..., min_length=1)
+
+
 class JobResponse(BaseModel):
     """Modelo de resposta de job."""
     job_id: str
@@ -50,6 +79,48 @@ class JobResponse(BaseModel):
     created_at: datetime
 
 
+class JobDetail(JobResponse):
+    """Job completo (result_metadata só com incluir_metadata=true)."""
+    id: str
+    instruction: str
+    parameters: Optional[dict] = None
+    total_tokens: Optional[int] = None
+    total_cost_usd: Optional[float] = None
+    error_message: Optional[str] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    result_metadata: Optional[dict] = None
+
+
+class JobListResponse(BaseModel):
+    """Página de jobs, do mais recente ao mais antigo (cursor nulo = última página)."""
+    jobs: List[JobDetail]
+    next_cursor: Optional[str] = None
+
+
+class SearchResult(BaseModel):
+    """Resultado da busca textual em clipping_results."""
+    id: str
+    job_id: str
+    source_name: Optional[str] = None
+    title: str
+    title_highlight: str
+    content_highlight: str
+    author: Optional[str] = None
+    date_published: Optional[datetime] = None
+    url: str
+    score: Optional[int] = None
+    s3_uri_json: Optional[str] = None
+    rank: float
+    created_at: datetime
+
+
+class SearchResponse(BaseModel):
+    """Página de resultados da busca (cursor nulo = última página)."""
+    results: List[SearchResult]
+    next_cursor: Optional[str] = None
+
+
 class HealthResponse(BaseModel):
     """Modelo de resposta de health check."""
     status: str
@@ -60,7 +131,9 @@ class HealthResponse(BaseModel):
 app = FastAPI(
     title="Agno Clipping API",
     description="API de monitoramento e gerenciamento de clippings",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson serializa datetime/dict nativamente, bem mais rápido que o json padrão
+    default_response_class=ORJSONResponse
 )
 
 # CORS
@@ -75,6 +148,154 @@ app.add_middleware(
 # Configurações
 config = ConfiguracoesAPI()
 
+# Banco de dados (mesmo pool asyncpg do worker, usado pela API assíncrona)
+db = DatabaseManager(
+    config.database_url,
+    pool_size=config.db_pool_size,
+    max_overflow=config.db_pool_max_overflow,
+    # Só leitura: recupera do MinIO o result_metadata externalizado pelo worker
+    armazenamento_metadata=ArmazenamentoMetadata({
+        "endpoint": config.minio_endpoint,
+        "access_key": config.minio_access_key,
+        "secret_key": config.minio_secret_key,
+        "bucket": config.minio_bucket,
+        "use_ssl": config.minio_use_ssl
+    })
+)
+
+
+# Conexão persistente com publisher confirms (não uma conexão por requisição)
+publicador = PublicadorJobs(config.rabbitmq_url)
+
+# Eventos ao vivo dos jobs (LISTEN/NOTIFY -> SSE)
+eventos = DistribuidorEventos(db)
+
+# Status que encerram o stream de eventos
+STATUS_FINAIS = {"completed", "failed"}
+
+# Eventos lidos por consulta ao reenviar o histórico do SSE
+TAMANHO_PAGINA_EVENTOS = 1000
+
+
+@app.on_event("shutdown")
+def fechar_conexoes() -> None:
+    """Fecha o publicador e o pool do banco ao encerrar a API."""
+    publicador.fechar()
+    db.fechar()
+
+
+async def _enfileirar_jobs(requisicoes: List[JobRequest], response: Response) -> List[JobResponse]:
+    """
+    Cria os jobs no banco (um único INSERT) e publica o lote em clippings.jobs.
+    
+    Só jobs que certamente não estão na fila (recusados pelo broker ou
+    nunca publicados) são marcados como 'failed', e a requisição retorna
+    503. Sem confirmação a tempo (timeout ou conexão perdida após o envio)
+    o broker pode ter enfileirado as mensagens: os jobs ficam 'pending' e a
+    resposta é 202, com os job_ids incertos em X-Jobs-Estado-Desconhecido.
+    
+    Args:
+        requisicoes: Jobs a criar
+        response: Resposta HTTP (status 202 quando a publicação não foi confirmada)
+        
+    Returns:
+        Jobs criados, na ordem da requisição
+    """
+    jobs = [
+        {
+            "job_id": f"job_{uuid.uuid4().hex[:12]}",
+            "instrucao": requisicao.instruction,
+            "parametros": requisicao.parameters or {},
+            "url": requisicao.url,
+        }
+        for requisicao in requisicoes
+    ]
+    criados = await db.criar_jobs_async(jobs)
+    
+    agora = datetime.now().isoformat()
+    mensagens = []
+    for job in jobs:
+        mensagem = {
+            "job_id": job["job_id"],
+            "instruction": job["instrucao"],
+            "parameters": job["parametros"],
+            "created_at": agora
+        }
+        if job["url"]:
+            mensagem["url"] = job["url"]
+        mensagens.append(mensagem)
+    
+    try:
+        futuro = await asyncio.to_thread(publicador.publicar, mensagens)
+        confirmacao = asyncio.wrap_future(futuro)
+        # shield: no timeout a confirmação continua sendo aguardada em background
+        await asyncio.wait_for(asyncio.shield(confirmacao), timeout=config.publish_confirm_timeout)
+    except (PublicadorIndisponivel, FalhaPublicacao, asyncio.TimeoutError) as e:
+        if isinstance(e, PublicadorIndisponivel):
+            falhas, incertas = range(len(jobs)), []
+        elif isinstance(e, FalhaPublicacao):
+            falhas, incertas = e.falhas, e.incertas
+        else:
+            # Sem confirmação a tempo: o broker pode já ter enfileirado o lote
+            falhas, incertas = [], range(len(jobs))
+            confirmacao.add_done_callback(
+                lambda resultado: asyncio.ensure_future(_marcar_recusados_apos_timeout(jobs, resultado))
+            )
+        nao_publicados = [jobs[indice]["job_id"] for indice in falhas]
+        desconhecidos = [jobs[indice]["job_id"] for indice in incertas]
+        logger.error(
+            f"Publicação de {len(jobs)} jobs: {len(nao_publicados)} não publicados, "
+            f"{len(desconhecidos)} sem confirmação ({type(e).__name__}: {e})"
+        )
+        if nao_publicados:
+            await db.marcar_jobs_falhos_async(nao_publicados, f"Falha ao publicar na fila: {e}")
+            raise HTTPException(status_code=503, detail={
+                "mensagem": f"Fila indisponível: {len(nao_publicados)} jobs não publicados",
+                "nao_publicados": nao_publicados,
+                "estado_desconhecido": desconhecidos,
+            })
+        response.status_code = 202
+        response.headers["X-Jobs-Estado-Desconhecido"] = ",".join(desconhecidos)
+    
+    return [JobResponse(**job) for job in criados]
+
+
+async def _marcar_recusados_apos_timeout(jobs: List[Dict[str, Any]], confirmacao: asyncio.Future) -> None:
+    """Marca como 'failed' os jobs que o broker recusou depois que a API já respondeu 202."""
+    erro = None if confirmacao.cancelled() else confirmacao.exception()
+    if isinstance(erro, PublicadorIndisponivel):
+        falhas = range(len(jobs))
+    elif isinstance(erro, FalhaPublicacao):
+        falhas = erro.falhas
+    else:
+        return
+    recusados = [jobs[indice]["job_id"] for indice in falhas]
+    if not recusados:
+        return
+    logger.warning(f"{len(recusados)} jobs recusados pelo broker após o timeout de confirmação")
+    try:
+        await db.marcar_jobs_falhos_async(recusados, f"Falha ao publicar na fila: {erro}")
+    except Exception as e:
+        logger.error(f"Erro ao marcar jobs recusados como falhos: {e}")
+
+
+def _codificar_cursor(ordem: str, chave: tuple) -> str:
+    """Serializa a chave de ordenação da última linha como cursor opaco."""
+    rank, criado_em, id_resultado = chave
+    dados = {"o": ordem, "r": rank, "c": criado_em.isoformat(), "i": id_resultado}
+    return base64.urlsafe_b64encode(json.dumps(dados).encode()).decode().rstrip("=")
+
+
+def _decodificar_cursor(cursor: str, ordem: str) -> tuple:
+    """Recupera a chave de ordenação de um cursor gerado por _codificar_cursor."""
+    try:
+        dados = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if dados["o"] != ordem:
+            raise ValueError("cursor gerado para outra ordenação")
+        return dados["r"], datetime.fromisoformat(dados["c"]), dados["i"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Cursor inválido: {e}")
+
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check() -> HealthResponse:
@@ -91,49 +312,68 @@ async def health_check() -> HealthResponse:
 
 
 @app.post("/jobs", response_model=JobResponse)
-async def criar_job(job_request: JobRequest) -> JobResponse:
+async def criar_job(job_request: JobRequest, response: Response) -> JobResponse:
     """
     Cria um novo job de clipping.
     
     Args:
         job_request: Dados do job
+        response: Resposta HTTP (202 se a publicação na fila não foi confirmada)
         
     Returns:
         Informações do job criado
     """
     try:
-        # TODO: Implementar lógica de criação de job
-        # 1. Validar instrução
-        # 2. Criar job no banco
-        # 3. Enviar para fila RabbitMQ
+        return (await _enfileirar_jobs([job_request], response))[0]
         
-        job_id = f"job_{datetime.now().timestamp()}"
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao criar job: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/jobs/bulk", response_model=List[JobResponse])
+async def criar_jobs_em_lote(bulk_request: BulkJobRequest, response: Response) -> List[JobResponse]:
+    """
+    Cria vários jobs de clipping num único INSERT e numa única publicação em lote.
+    
+    Args:
+        bulk_request: Lista de jobs (até max_bulk_jobs)
+        response: Resposta HTTP (202 se a publicação na fila não foi confirmada)
         
-        return JobResponse(
-            job_id=job_id,
-            status="pending",
-            created_at=datetime.now()
-        )
+    Returns:
+        Informações dos jobs criados
+    """
+    if len(bulk_request.jobs) > config.max_bulk_jobs:
+        raise HTTPException(status_code=413, detail=f"Máximo de {config.max_bulk_jobs} jobs por lote")
+    try:
+        return await _enfileirar_jobs(bulk_request.jobs, response)
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Erro ao criar job: {e}")
+        logger.error(f"Erro ao criar jobs em lote: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/jobs/{job_id}", response_model=JobResponse)
-async def obter_job(job_id: str) -> JobResponse:
+@app.get("/jobs/{job_id}", response_model=JobDetail)
+async def obter_job(job_id: str, incluir_metadata: bool = False) -> ORJSONResponse:
     """
     Obtém informações de um job específico.
     
     Args:
         job_id: ID do job
+        incluir_metadata: Inclui result_metadata na resposta
         
     Returns:
         Informações do job
     """
     try:
-        # TODO: Implementar busca no banco de dados
-        raise HTTPException(status_code=404, detail="Job não encontrado")
+        jobs = await db.obter_jobs_async([job_id], incluir_metadata=incluir_metadata)
+        if not jobs:
+            raise HTTPException(status_code=404, detail="Job não encontrado")
+        return ORJSONResponse(jobs[0])
         
     except HTTPException:
         raise
@@ -142,27 +382,208 @@ async def obter_job(job_id: str) -> JobResponse:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/jobs", response_model=List[JobResponse])
-async def listar_jobs(limit: int = 10, offset: int = 0) -> List[JobResponse]:
+def _formatar_sse(evento: dict) -> str:
+    """Serializa um evento no formato text/event-stream (id = timestamp, para Last-Event-ID)."""
+    dados = json.dumps(evento, ensure_ascii=False)
+    return f"id: {evento['timestamp']}\nevent: {evento['event']}\ndata: {dados}\n\n"
+
+
+@app.get("/jobs/{job_id}/events")
+async def eventos_job(
+    job_id: str,
+    request: Request,
+    last_event_id: Optional[str] = Header(None)
+) -> StreamingResponse:
     """
-    Lista jobs de clipping.
+    Acompanha um job ao vivo via Server-Sent Events.
+    
+    Envia primeiro o histórico já gravado (a partir do Last-Event-ID, em
+    reconexões) e depois os eventos novos: passos do browser (reasoning,
+    ações), transições de etapa do SuperAgent e o status do job. O stream
+    termina quando o job chega a um status final.
     
     Args:
-        limit: Limite de resultados
-        offset: Offset para paginação
+        job_id: ID do job
+        request: Requisição (para detectar desconexão do cliente)
+        last_event_id: Último evento recebido pelo cliente
         
     Returns:
-        Lista de jobs
+        Stream text/event-stream
     """
+    apos = None
+    if last_event_id:
+        try:
+            apos = datetime.fromisoformat(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Last-Event-ID inválido")
+    if not await db.obter_jobs_async([job_id]):
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    
+    async def gerar():
+        # Assina antes de ler o histórico para não perder eventos entre as duas leituras
+        async with eventos.assinar(job_id) as fila:
+            ultimo = apos.isoformat() if apos else ""
+            pagina_apos, pagina_apos_id = apos, None
+            while True:
+                pagina = await db.listar_eventos_job_async(
+                    job_id, apos=pagina_apos, apos_id=pagina_apos_id, limite=TAMANHO_PAGINA_EVENTOS
+                )
+                for evento in pagina:
+                    pagina_apos_id = evento.pop("id")
+                    ultimo = evento["timestamp"]
+                    yield _formatar_sse(evento)
+                    if evento["event"] == "job_status" and evento["message"] in STATUS_FINAIS:
+                        return
+                if len(pagina) < TAMANHO_PAGINA_EVENTOS:
+                    break
+                pagina_apos = datetime.fromisoformat(ultimo)
+            
+            # Job já encerrado sem o job_status final no histórico: informa o status e fecha
+            jobs = await db.obter_jobs_async([job_id])
+            if jobs and jobs[0]["status"] in STATUS_FINAIS:
+                job = jobs[0]
+                yield _formatar_sse({
+                    "job_id": job_id,
+                    "agent": "Worker",
+                    "event": "job_status",
+                    "message": job["status"],
+                    "timestamp": (job["completed_at"] or datetime.now()).isoformat(),
+                })
+                return
+            while not await request.is_disconnected():
+                try:
+                    evento = await asyncio.wait_for(fila.get(), timeout=config.sse_keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if evento["timestamp"] <= ultimo:
+                    continue  # Já enviado no histórico
+                yield _formatar_sse(evento)
+                if evento["event"] == "job_status" and evento["message"] in STATUS_FINAIS:
+                    return
+    
+    return StreamingResponse(
+        gerar(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/jobs", response_model=JobListResponse)
+async def listar_jobs(
+    status: Optional[str] = None,
+    criado_desde: Optional[datetime] = Query(None, description="Criados a partir de (inclusivo)"),
+    criado_ate: Optional[datetime] = Query(None, description="Criados antes de (exclusivo)"),
+    ids: Optional[List[str]] = Query(None, description="Busca estes job_ids (ignora filtros e cursor); pode repetir"),
+    incluir_metadata: bool = False,
+    limit: int = Query(50, ge=1),
+    cursor: Optional[str] = None
+) -> ORJSONResponse:
+    """
+    Lista jobs de clipping com paginação por cursor (keyset).
+    
+    Sem OFFSET: o cursor guarda (created_at, id) da última linha e a página
+    seguinte começa direto nesse ponto do índice, então o custo não cresce
+    com a profundidade da paginação. As linhas vão direto para o orjson, sem
+    passar pela validação do response_model.
+    
+    Args:
+        status: Filtra por status
+        criado_desde: Criados a partir de
+        criado_ate: Criados antes de
+        ids: Lista de job_ids para busca em lote
+        incluir_metadata: Inclui result_metadata (pode ser grande)
+        limit: Jobs por página
+        cursor: next_cursor da página anterior
+        
+    Returns:
+        Jobs e cursor da próxima página
+    """
+    limit = min(limit, config.max_jobs_page)
     try:
-        # TODO: Implementar busca no banco de dados
-        return []
+        if ids:
+            if len(ids) > config.max_jobs_page:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"Máximo de {config.max_jobs_page} ids por requisição"
+                )
+            jobs = await db.obter_jobs_async(ids, incluir_metadata=incluir_metadata)
+            return ORJSONResponse({"jobs": jobs, "next_cursor": None})
         
+        apos = _decodificar_cursor(cursor, "jobs")[1:] if cursor else None
+        jobs = await db.listar_jobs_async(
+            status=status,
+            criado_desde=criado_desde,
+            criado_ate=criado_ate,
+            apos=apos,
+            limite=limit + 1,
+            incluir_metadata=incluir_metadata
+        )
+        proximo_cursor = None
+        if len(jobs) > limit:
+            jobs = jobs[:limit]
+            proximo_cursor = _codificar_cursor("jobs", jobs[-1]["chave"])
+        for job in jobs:
+            del job["chave"]
+        return ORJSONResponse({"jobs": jobs, "next_cursor": proximo_cursor})
+        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao listar jobs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/search", response_model=SearchResponse)
+async def buscar_clippings(
+    q: str = Query(..., min_length=2, description='Busca em português ("frase exata", OR, -termo)'),
+    data_inicio: Optional[date] = Query(None, description="Data de publicação inicial (inclusiva)"),
+    data_fim: Optional[date] = Query(None, description="Data de publicação final (inclusiva)"),
+    fonte: Optional[List[str]] = Query(None, description="Filtra por fonte (source_name); pode repetir"),
+    ordem: str = Query("relevancia", pattern="^(relevancia|recentes)$"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None
+) -> SearchResponse:
+    """
+    Busca textual nos clippings já coletados.
+    
+    Args:
+        q: Texto da busca
+        data_inicio: Data de publicação inicial
+        data_fim: Data de publicação final
+        fonte: Fontes aceitas
+        ordem: 'relevancia' ou 'recentes'
+        limit: Resultados por página
+        cursor: next_cursor da página anterior
+        
+    Returns:
+        Resultados com trechos destacados (<mark>) e cursor da próxima página
+    """
+    apos = _decodificar_cursor(cursor, ordem) if cursor else None
+    try:
+        linhas = await db.buscar_resultados_async(
+            q,
+            data_inicio=datetime.combine(data_inicio, datetime.min.time()) if data_inicio else None,
+            data_fim=datetime.combine(data_fim + timedelta(days=1), datetime.min.time()) if data_fim else None,
+            fontes=fonte,
+            ordem=ordem,
+            apos=apos,
+            limite=limit + 1
+        )
+    except Exception as e:
+        logger.error(f"Erro na busca: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    proximo_cursor = None
+    if len(linhas) > limit:
+        linhas = linhas[:limit]
+        proximo_cursor = _codificar_cursor(ordem, linhas[-1]["chave"])
+    return SearchResponse(
+        results=[SearchResult(**linha) for linha in linhas],
+        next_cursor=proximo_cursor
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -26,8 +26,11 @@ CREATE INDEX idx_status ON clippings_app.clipping_jobs(status);
 CREATE INDEX idx_created_at ON clippings_app.clipping_jobs(created_at);
 CREATE INDEX idx_clipping_jobs_status_created ON clippings_app.clipping_jobs(status, created_at DESC);
 
+-- Tabelas de histórico (resultados e logs) são particionadas por mês: consultas
+-- por janela recente só tocam as partições do período e a retenção remove
+-- partições inteiras (scheduler/retencao.py) em vez de DELETE + VACUUM.
 CREATE TABLE clippings_app.clipping_results (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
     job_id VARCHAR(255) NOT NULL REFERENCES clippings_app.clipping_jobs(job_id),
     source_name VARCHAR(255),
     title TEXT NOT NULL,
@@ -38,14 +41,24 @@ CREATE TABLE clippings_app.clipping_results (
     s3_uri_json TEXT,
     s3_uri_markdown TEXT,
     s3_uri_pdf TEXT,
-    created_at TIMESTAMP DEFAULT NOW()
-);
+    score SMALLINT,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    -- Busca textual (GET /search): título pesa mais que o conteúdo
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('portuguese', COALESCE(title, '')), 'A') ||
+        setweight(to_tsvector('portuguese', COALESCE(content, '')), 'B')
+    ) STORED,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
 
 CREATE INDEX idx_results_job_id ON clippings_app.clipping_results(job_id);
 CREATE INDEX idx_results_created_at ON clippings_app.clipping_results(created_at);
+CREATE INDEX idx_results_date_published ON clippings_app.clipping_results(date_published DESC);
+CREATE INDEX idx_results_source_name ON clippings_app.clipping_results(source_name);
+CREATE INDEX idx_results_search_vector ON clippings_app.clipping_results USING GIN (search_vector);
 
 CREATE TABLE clippings_app.agent_execution_logs (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
     job_id VARCHAR(255) NOT NULL,
     agent_name VARCHAR(100) NOT NULL,
     event_type VARCHAR(100) NOT NULL,
@@ -54,8 +67,9 @@ CREATE TABLE clippings_app.agent_execution_logs (
     output_tokens INTEGER,
     cost_usd DECIMAL(10, 4),
     metadata JSONB,
-    timestamp TIMESTAMP DEFAULT NOW()
-);
+    timestamp TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
 
 CREATE INDEX idx_execution_job_id ON clippings_app.agent_execution_logs(job_id);
 CREATE INDEX idx_execution_agent_name ON clippings_app.agent_execution_logs(agent_name);
@@ -63,20 +77,161 @@ CREATE INDEX idx_execution_timestamp ON clippings_app.agent_execution_logs(times
 CREATE INDEX idx_execution_logs_job_agent ON clippings_app.agent_execution_logs(job_id, agent_name);
 
 CREATE TABLE clippings_app.notification_logs (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
     job_id VARCHAR(255) NOT NULL,
     channel VARCHAR(50) NOT NULL,
     recipient VARCHAR(255),
     subject VARCHAR(255),
     status VARCHAR(50) NOT NULL,
     error_message TEXT,
-    timestamp TIMESTAMP DEFAULT NOW()
-);
+    timestamp TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
 
 CREATE INDEX idx_notification_job_id ON clippings_app.notification_logs(job_id);
 CREATE INDEX idx_notification_channel ON clippings_app.notification_logs(channel);
 CREATE INDEX idx_notification_timestamp ON clippings_app.notification_logs(timestamp);
 
+-- Artigos já clipados, compartilhados entre jobs: chave = URL normalizada
+-- (worker/utils/artigos.py). O item (resumo, score, termos) é reaproveitado
+-- enquanto o conteúdo (content_hash) não mudar.
+CREATE TABLE clippings_app.articles (
+    url_key TEXT NOT NULL,
+    client VARCHAR(100) NOT NULL,
+    url TEXT NOT NULL,
+    content_hash CHAR(64),
+    site VARCHAR(255),
+    title TEXT,
+    date_published TIMESTAMP,
+    score SMALLINT,
+    item JSONB NOT NULL,
+    minhash BYTEA,  -- Assinatura MinHash (128 x uint32) para quase-duplicatas
+    first_seen_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    last_seen_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (url_key, client)
+);
+
+CREATE INDEX idx_articles_content_hash ON clippings_app.articles(content_hash);
+CREATE INDEX idx_articles_client_date ON clippings_app.articles(client, date_published DESC);
+
+-- Partições mensais: <tabela>_pYYYYMM. A partição DEFAULT só recebe linhas
+-- fora dos meses já criados (manutenção atrasada) para que inserts nunca falhem.
+-- Linhas que caíram na DEFAULT impedem criar a partição do mês delas ("default
+-- partition would be violated"): a função começa pelo mês mais antigo presente
+-- na DEFAULT e, para cada mês com linhas lá, desanexa a DEFAULT, cria a partição,
+-- move as linhas e reanexa a DEFAULT (tudo na mesma transação).
+CREATE OR REPLACE FUNCTION clippings_app.criar_particoes_mensais(
+    p_tabela TEXT,
+    p_inicio DATE,
+    p_meses INTEGER
+) RETURNS INTEGER AS $$
+DECLARE
+    v_default TEXT := p_tabela || '_default';
+    v_coluna TEXT;
+    v_colunas TEXT;
+    v_inicio DATE := date_trunc('month', p_inicio)::DATE;
+    v_fim DATE := (date_trunc('month', p_inicio) + make_interval(months => GREATEST(p_meses, 1)))::DATE;
+    v_mais_antigo DATE;
+    v_mes DATE;
+    v_proximo DATE;
+    v_particao TEXT;
+    v_pendentes BOOLEAN;
+    v_criadas INTEGER := 0;
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS clippings_app.%I PARTITION OF clippings_app.%I DEFAULT',
+        v_default, p_tabela
+    );
+    
+    -- Coluna da chave de partição (created_at / timestamp, conforme a tabela)
+    SELECT a.attname INTO v_coluna
+    FROM pg_partitioned_table p
+    JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0]
+    WHERE p.partrelid = ('clippings_app.' || quote_ident(p_tabela))::regclass;
+    
+    -- Colunas copiadas ao mover linhas: geradas (ex.: search_vector) são recalculadas no destino
+    SELECT string_agg(quote_ident(a.attname), ', ' ORDER BY a.attnum) INTO v_colunas
+    FROM pg_attribute a
+    WHERE a.attrelid = ('clippings_app.' || quote_ident(p_tabela))::regclass
+      AND a.attnum > 0
+      AND NOT a.attisdropped
+      AND a.attgenerated = '';
+    
+    EXECUTE format(
+        'SELECT date_trunc(''month'', min(%I))::DATE FROM clippings_app.%I',
+        v_coluna, v_default
+    ) INTO v_mais_antigo;
+    IF v_mais_antigo IS NOT NULL AND v_mais_antigo < v_inicio THEN
+        v_inicio := v_mais_antigo;
+    END IF;
+    
+    v_mes := v_inicio;
+    WHILE v_mes < v_fim LOOP
+        v_proximo := (v_mes + INTERVAL '1 month')::DATE;
+        v_particao := p_tabela || '_p' || to_char(v_mes, 'YYYYMM');
+        IF to_regclass('clippings_app.' || v_particao) IS NULL THEN
+            EXECUTE format(
+                'SELECT EXISTS (SELECT 1 FROM clippings_app.%I WHERE %I >= %L AND %I < %L)',
+                v_default, v_coluna, v_mes, v_coluna, v_proximo
+            ) INTO v_pendentes;
+            IF v_pendentes THEN
+                EXECUTE format(
+                    'ALTER TABLE clippings_app.%I DETACH PARTITION clippings_app.%I',
+                    p_tabela, v_default
+                );
+            END IF;
+            EXECUTE format(
+                'CREATE TABLE clippings_app.%I PARTITION OF clippings_app.%I FOR VALUES FROM (%L) TO (%L)',
+                v_particao, p_tabela, v_mes, v_proximo
+            );
+            IF v_pendentes THEN
+                EXECUTE format(
+                    'WITH movidas AS (DELETE FROM clippings_app.%I WHERE %I >= %L AND %I < %L RETURNING %s) '
+                    'INSERT INTO clippings_app.%I (%s) SELECT %s FROM movidas',
+                    v_default, v_coluna, v_mes, v_coluna, v_proximo, v_colunas,
+                    v_particao, v_colunas, v_colunas
+                );
+                EXECUTE format(
+                    'ALTER TABLE clippings_app.%I ATTACH PARTITION clippings_app.%I DEFAULT',
+                    p_tabela, v_default
+                );
+            END IF;
+            v_criadas := v_criadas + 1;
+        END IF;
+        v_mes := v_proximo;
+    END LOOP;
+    RETURN v_criadas;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT clippings_app.criar_particoes_mensais(tabela, CURRENT_DATE, 4)
+FROM unnest(ARRAY['clipping_results', 'agent_execution_logs', 'notification_logs']) AS tabela;
+
+CREATE TABLE clippings_app.job_stage_checkpoints (
+    job_id VARCHAR(255) NOT NULL REFERENCES clippings_app.clipping_jobs(job_id) ON DELETE CASCADE,
+    stage VARCHAR(50) NOT NULL,
+    output JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (job_id, stage)
+);
+
+CREATE TABLE clippings_app.discovery_watermarks (
+    domain VARCHAR(255) PRIMARY KEY,
+    last_seen_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TABLE clippings_app.llm_interpretation_cache (
+    cache_key CHAR(64) PRIMARY KEY,
+    model VARCHAR(100) NOT NULL,
+    prompt_version VARCHAR(20) NOT NULL,
+    result JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    expires_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX idx_llm_cache_expires_at ON clippings_app.llm_interpretation_cache(expires_at);
+
 -- Grants
 GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA clippings_app TO clippings_user;
 GRANT ALL PRIVILEGES ON ALL SEQUENCES IN SCHEMA clippings_app TO clippings_user;
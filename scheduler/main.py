@@ -15,6 +15,8 @@ from apscheduler.triggers.cron import CronTrigger
 from pydantic_settings import BaseSettings
 import pika
 
+from scheduler.retencao import GerenciadorRetencao, PoliticaRetencao
+
 # Configurar logging
 logging.basicConfig(
     level=os.getenv("LOG_LEVEL", "INFO"),
@@ -31,6 +33,21 @@ class ConfiguracoesScheduler(BaseSettings):
     log_level: str = "INFO"
     debug: bool = False
     timezone: str = "America/Sao_Paulo"
+    clipping_url: str = "https://www.automotivebusiness.com.br/"  # Site do clipping diário
+    
+    # Retenção das tabelas particionadas por mês (0 = nunca arquivar)
+    retention_enabled: bool = True
+    retention_hour: int = 3
+    retention_partitions_ahead: int = 3
+    retention_logs_months: int = 6  # agent_execution_logs e notification_logs
+    retention_results_months: int = 24  # clipping_results
+    
+    # MinIO (destino das partições arquivadas)
+    minio_endpoint: str = "minio:9000"
+    minio_access_key: str = "minioadmin"
+    minio_secret_key: str = "minioadmin"
+    minio_bucket: str = "clippings"
+    minio_use_ssl: bool = False
     
     class Config:
         env_file = ".env"
@@ -64,13 +81,14 @@ class SchedulerAgno:
             logger.error(f"Erro ao conectar ao RabbitMQ: {e}")
             raise
     
-    def enviar_job(self, instrucao: str, parametros: dict = None) -> None:
+    def enviar_job(self, instrucao: str, parametros: dict = None, url: str = None) -> None:
         """
         Envia um job para a fila RabbitMQ.
         
         Args:
             instrucao: Instrução do job
             parametros: Parâmetros adicionais do job
+            url: URL alvo (com url e parâmetros o worker não consulta o LLM)
         """
         try:
             import json
@@ -79,6 +97,8 @@ class SchedulerAgno:
                 "parameters": parametros or {},
                 "created_at": datetime.now().isoformat()
             }
+            if url:
+                mensagem["url"] = url
             
             self.canal_rabbitmq.basic_publish(
                 exchange="",
@@ -99,7 +119,8 @@ class SchedulerAgno:
         self.scheduler.add_job(
             func=lambda: self.enviar_job(
                 "Coletar clippings diários das fontes configuradas",
-                {"tipo": "diario", "horario": "08:00"}
+                {"tipo": "diario", "horario": "08:00"},
+                url=self.config.clipping_url
             ),
             trigger=CronTrigger(hour=8, minute=0),
             id="clipping_diario",
@@ -107,6 +128,33 @@ class SchedulerAgno:
             replace_existing=True
         )
         
+        if self.config.retention_enabled:
+            retencao = GerenciadorRetencao(
+                self.config.database_url,
+                politicas=[
+                    PoliticaRetencao("agent_execution_logs", self.config.retention_logs_months),
+                    PoliticaRetencao("notification_logs", self.config.retention_logs_months),
+                    PoliticaRetencao("clipping_results", self.config.retention_results_months),
+                ],
+                minio_config={
+                    "endpoint": self.config.minio_endpoint,
+                    "access_key": self.config.minio_access_key,
+                    "secret_key": self.config.minio_secret_key,
+                    "bucket": self.config.minio_bucket,
+                    "use_ssl": self.config.minio_use_ssl
+                },
+                meses_a_frente=self.config.retention_partitions_ahead
+            )
+            # Cria partições futuras e arquiva as antigas; roda também na partida
+            self.scheduler.add_job(
+                func=retencao.executar,
+                trigger=CronTrigger(hour=self.config.retention_hour, minute=0),
+                id="retencao_particoes",
+                name="Retenção de Partições",
+                replace_existing=True,
+                next_run_time=datetime.now(self.scheduler.timezone)
+            )
+        
         logger.info("Jobs agendados com sucesso")
     
     def iniciar(self) -> None:
@@ -0,0 +1,214 @@
+"""
+Manutenção das partições mensais das tabelas de histórico.
+
+Executado periodicamente pelo scheduler:
+- cria as partições dos próximos meses (``criar_particoes_mensais`` em init-db.sql),
+  movendo para elas as linhas que tinham caído na partição DEFAULT;
+- alerta quando a DEFAULT continua com linhas (chave nula ou além dos meses
+  criados), já que elas nunca são arquivadas;
+- partições mais antigas que a retenção são desanexadas da tabela pai,
+  exportadas como CSV gzip para o MinIO e então removidas.
+
+Cada partição é processada de forma idempotente: uma partição desanexada
+numa execução que falhou antes do upload é retomada na execução seguinte.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, List, Optional
+import asyncio
+import gzip
+import logging
+import os
+import re
+import tempfile
+
+import asyncpg
+from minio import Minio
+
+logger = logging.getLogger(__name__)
+
+ESQUEMA = "clippings_app"
+
+
+@dataclass
+class PoliticaRetencao:
+    """Retenção de uma tabela particionada por mês."""
+    
+    tabela: str
+    meses: int  # Meses mantidos no banco, incluindo o atual (0 = nunca arquivar)
+
+
+def _inicio_do_mes(referencia: date, deslocamento: int = 0) -> date:
+    """Primeiro dia do mês de referência deslocado em N meses."""
+    indice = referencia.year * 12 + referencia.month - 1 + deslocamento
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+class GerenciadorRetencao:
+    """Cria partições futuras e arquiva/remove as antigas."""
+    
+    def __init__(
+        self,
+        database_url: str,
+        politicas: List[PoliticaRetencao],
+        minio_config: Dict[str, Any],
+        meses_a_frente: int = 3,
+        prefixo_arquivo: str = "arquivo"
+    ):
+        """
+        Inicializa o gerenciador.
+        
+        Args:
+            database_url: URL de conexão do PostgreSQL
+            politicas: Tabelas particionadas e suas retenções
+            minio_config: endpoint, access_key, secret_key, bucket e use_ssl
+            meses_a_frente: Partições criadas além do mês atual
+            prefixo_arquivo: Prefixo dos objetos exportados no bucket
+        """
+        esquema, _, resto = database_url.partition("://")
+        self.database_url = f"{esquema.split('+')[0]}://{resto}"
+        self.politicas = politicas
+        self.meses_a_frente = meses_a_frente
+        self.prefixo_arquivo = prefixo_arquivo.strip("/")
+        self.bucket = minio_config.get("bucket", "clippings")
+        self.minio = Minio(
+            minio_config["endpoint"],
+            access_key=minio_config["access_key"],
+            secret_key=minio_config["secret_key"],
+            secure=minio_config.get("use_ssl", False)
+        )
+    
+    def executar(self, hoje: Optional[date] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Executa a manutenção de todas as tabelas (chamada bloqueante para o APScheduler).
+        
+        Args:
+            hoje: Data de referência (padrão: hoje)
+        
+        Returns:
+            Por tabela, as partições criadas e arquivadas
+        """
+        return asyncio.run(self._executar(hoje or date.today()))
+    
+    async def _executar(self, hoje: date) -> Dict[str, Dict[str, Any]]:
+        relatorio = {}
+        if not await asyncio.to_thread(self.minio.bucket_exists, self.bucket):
+            await asyncio.to_thread(self.minio.make_bucket, self.bucket)
+        conexao = await asyncpg.connect(self.database_url)
+        try:
+            for politica in self.politicas:
+                criadas = await conexao.fetchval(
+                    f"SELECT {ESQUEMA}.criar_particoes_mensais($1, $2, $3)",
+                    politica.tabela, _inicio_do_mes(hoje), self.meses_a_frente + 1
+                )
+                arquivadas = []
+                if politica.meses > 0:
+                    limite = _inicio_do_mes(hoje, -(politica.meses - 1))
+                    for particao in await self._particoes_antigas(conexao, politica.tabela, limite):
+                        try:
+                            await self._arquivar_particao(conexao, politica.tabela, particao)
+                            arquivadas.append(particao)
+                        except Exception as e:
+                            # Segue para as demais; a partição é retomada na próxima execução
+                            logger.error(f"Erro ao arquivar partição {particao}: {e}")
+                linhas_default = await self._linhas_default(conexao, politica.tabela)
+                if linhas_default:
+                    logger.error(
+                        f"Partição {politica.tabela}_default com {linhas_default} linha(s) fora das "
+                        f"partições mensais; elas não entram na retenção"
+                    )
+                relatorio[politica.tabela] = {
+                    "criadas": criadas,
+                    "arquivadas": arquivadas,
+                    "linhas_default": linhas_default,
+                }
+                logger.info(
+                    f"Retenção {politica.tabela}: {criadas} partição(ões) criada(s), "
+                    f"{len(arquivadas)} arquivada(s) {arquivadas or ''}"
+                )
+        finally:
+            await conexao.close()
+        return relatorio
+    
+    async def _linhas_default(self, conexao: asyncpg.Connection, tabela: str) -> int:
+        """
+        Conta as linhas que continuam na partição DEFAULT após a criação das mensais.
+        
+        Args:
+            conexao: Conexão aberta
+            tabela: Tabela pai
+        
+        Returns:
+            Número de linhas na DEFAULT (0 se ela não existir)
+        """
+        particao = f"{tabela}_default"
+        if await conexao.fetchval("SELECT to_regclass($1) IS NULL", f"{ESQUEMA}.{particao}"):
+            return 0
+        return await conexao.fetchval(f'SELECT count(*) FROM {ESQUEMA}."{particao}"')
+    
+    async def _particoes_antigas(self, conexao: asyncpg.Connection, tabela: str, limite: date) -> List[str]:
+        """
+        Lista as partições mensais (anexadas ou já desanexadas) anteriores ao mês limite.
+        
+        Args:
+            conexao: Conexão aberta
+            tabela: Tabela pai
+            limite: Primeiro mês mantido
+        
+        Returns:
+            Nomes das partições, da mais antiga para a mais recente
+        """
+        rows = await conexao.fetch("""
+            SELECT c.relname
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = $1 AND c.relkind = 'r' AND c.relname ~ ('^' || $2 || '_p[0-9]{6}$')
+            ORDER BY c.relname
+        """, ESQUEMA, tabela)
+        padrao = re.compile(rf"^{re.escape(tabela)}_p(\d{{4}})(\d{{2}})$")
+        antigas = []
+        for row in rows:
+            match = padrao.match(row["relname"])
+            if match and date(int(match.group(1)), int(match.group(2)), 1) < limite:
+                antigas.append(row["relname"])
+        return antigas
+    
+    async def _arquivar_particao(self, conexao: asyncpg.Connection, tabela: str, particao: str) -> None:
+        """
+        Desanexa, exporta para o MinIO (CSV gzip) e remove uma partição.
+        
+        A remoção só acontece depois do upload concluído.
+        
+        Args:
+            conexao: Conexão aberta
+            tabela: Tabela pai
+            particao: Partição a arquivar
+        """
+        anexada = await conexao.fetchval("""
+            SELECT EXISTS (
+                SELECT 1 FROM pg_inherits
+                WHERE inhrelid = to_regclass($1) AND inhparent = to_regclass($2)
+            )
+        """, f"{ESQUEMA}.{particao}", f"{ESQUEMA}.{tabela}")
+        if anexada:
+            # A partir daqui as consultas na tabela pai já não veem a partição
+            await conexao.execute(f'ALTER TABLE {ESQUEMA}."{tabela}" DETACH PARTITION {ESQUEMA}."{particao}"')
+        
+        objeto = f"{self.prefixo_arquivo}/{tabela}/{particao}.csv.gz"
+        descritor, caminho = tempfile.mkstemp(suffix=".csv.gz")
+        os.close(descritor)
+        try:
+            with gzip.open(caminho, "wb") as arquivo:
+                await conexao.copy_from_table(
+                    particao, schema_name=ESQUEMA, output=arquivo, format="csv", header=True
+                )
+            await asyncio.to_thread(
+                self.minio.fput_object, self.bucket, objeto, caminho,
+                content_type="application/gzip"
+            )
+        finally:
+            os.remove(caminho)
+        
+        await conexao.execute(f'DROP TABLE {ESQUEMA}."{particao}"')
+        logger.info(f"Partição {particao} arquivada em s3://{self.bucket}/{objeto}")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: extrator JSON de varredura única x regex antigas.
+
+Gera saídas sintéticas de agente (raciocínio longo + JSON do clipping no
+final) de vários tamanhos e mede o tempo de cada abordagem em dois
+cenários: saída completa e saída truncada antes do fim do JSON (caso em
+que as regex com `.*?` reexploram o texto a partir de cada fragmento).
+
+Uso:
+    python scripts/benchmark_json_extractor.py [--tamanhos-mb 0.05 0.1 0.25] [--repeticoes 3]
+
+Tamanhos maiores (ex.: 1 MB) deixam a regex antiga no cenário truncado
+rodando por minutos.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import re
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Carrega o módulo direto do arquivo (worker/ importa dependências pesadas no pacote de agentes)
+_spec = importlib.util.spec_from_file_location(
+    "json_extractor", os.path.join(RAIZ, "worker", "utils", "json_extractor.py")
+)
+json_extractor = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(json_extractor)
+
+# Regex usadas antes em BrowserAgent._extrair_e_estruturar_resultado e SkyvernAgent._extrair_json_do_resultado
+REGEX_BROWSER = r'\{[^{}]*"itens"[^{}]*\{[^{}]*\}.*?"email_body_ptbr"[^{}]*\}'
+REGEX_SKYVERN = r'\{[^{}]*"metadata"[^{}]*\{[^{}]*\}.*?"itens"[^{}]*\[.*?\]'
+
+CLIPPING = {
+    "metadata": {"cliente": "LEAR", "periodo": "últimos 30 dias", "status": "completo"},
+    "itens": [
+        {
+            "site": "automotivebusiness.com.br",
+            "url": f"https://www.automotivebusiness.com.br/pt/posts/noticia-{i}",
+            "titulo": f"Notícia {i} sobre chicotes elétricos {{rascunho}}",
+            "resumo_2l": "Resumo com \"aspas\" e chaves { } dentro da string.",
+            "termos_encontrados": ["chicote elétrico", "Lear"],
+            "score": 3,
+        }
+        for i in range(15)
+    ],
+    "email_body_ptbr": "Resumo LEAR – Período: últimos 30 dias",
+    "log_execucao": ["passo 1", "passo 2"],
+}
+
+PARAGRAFO = (
+    "[Passo {n}] Analisando a página de listagem {seção notícias}: encontrei links com "
+    "\"itens\" candidatos, mas a data não está visível; vou abrir o próximo artigo e verificar "
+    "o campo {\"data\": ...} antes de incluir. Rascunho: {\"itens\": [{\"url\": \"/noticia-{n}\"}]} "
+)
+
+
+def gerar_saida(tamanho_bytes: int, truncada: bool = False) -> str:
+    """Raciocínio repetido até o tamanho pedido, seguido do JSON final em bloco markdown."""
+    partes = []
+    total = 0
+    n = 0
+    while total < tamanho_bytes:
+        trecho = PARAGRAFO.replace("{n}", str(n))
+        partes.append(trecho)
+        total += len(trecho)
+        n += 1
+    final = json.dumps(CLIPPING, ensure_ascii=False, indent=2)
+    if truncada:
+        final = final[: final.index('"email_body_ptbr"')]
+    partes.append("\n```json\n" + final + "\n```\n")
+    return "".join(partes)
+
+
+def via_regex(texto: str, padrao: str):
+    match = re.search(padrao, texto, re.DOTALL)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+
+
+def medir(funcao, texto: str, repeticoes: int):
+    melhor = float("inf")
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(texto)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos-mb", type=float, nargs="+", default=[0.05, 0.1, 0.25])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    abordagens = [
+        ("varredura única", json_extractor.extrair_json),
+        ("regex browser", lambda texto: via_regex(texto, REGEX_BROWSER)),
+        ("regex skyvern", lambda texto: via_regex(texto, REGEX_SKYVERN)),
+    ]
+
+    print(f"{'cenário':<9} | {'tamanho':>9} | {'abordagem':<16} | {'tempo (s)':>10} | resultado")
+    print("-" * 82)
+    for truncada in (False, True):
+        cenario = "truncada" if truncada else "completa"
+        for tamanho_mb in args.tamanhos_mb:
+            texto = gerar_saida(int(tamanho_mb * 1024 * 1024), truncada=truncada)
+            for nome, funcao in abordagens:
+                tempo, resultado = medir(funcao, texto, args.repeticoes)
+                if isinstance(resultado, dict) and len(resultado.get("itens", [])) == len(CLIPPING["itens"]):
+                    status = f"ok ({len(resultado['itens'])} itens)"
+                elif isinstance(resultado, dict):
+                    status = f"rascunho ({len(resultado.get('itens', []))} itens)"
+                else:
+                    status = "JSON do clipping não encontrado"
+                print(f"{cenario:<9} | {tamanho_mb:>7.2f}MB | {nome:<16} | {tempo:>10.4f} | {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,20 @@
 """Módulo de Agentes Agno especializados."""
 
+from .base_agent import BaseAgent
 from .super_agent import SuperAgent
 from .browser_agent import BrowserAgent
+from .discovery_agent import DiscoveryAgent
+from .http_agent import HttpAgent
 from .skyvern_agent import SkyvernAgent
 from .file_agent import FileAgent
 from .notification_agent import NotificationAgent
 
 __all__ = [
+    "BaseAgent",
     "SuperAgent",
     "BrowserAgent",
+    "DiscoveryAgent",
+    "HttpAgent",
     "SkyvernAgent",
     "FileAgent",
     "NotificationAgent",
@@ -6,6 +6,7 @@ Define a interface comum que todos os agentes devem implementar.
 
 from abc import ABC, abstractmethod
 from typing import Any, Dict, Optional
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,6 +15,9 @@ logger = logging.getLogger(__name__)
 class BaseAgent(ABC):
     """Classe base abstrata para agentes Agno."""
     
+    # Escritor em lote de agent_execution_logs (definido pelo worker; None = só logger)
+    escritor_logs = None
+    
     def __init__(self, nome: str, configuracao: Dict[str, Any]):
         """
         Inicializa o agente base.
@@ -39,6 +43,22 @@ class BaseAgent(ABC):
         """
         pass
     
+    async def executar_async(self, contexto: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Versão aguardável de executar (modo assíncrono do worker).
+        
+        Por padrão roda executar numa thread, para não bloquear o event loop
+        compartilhado; agentes dominados por I/O longo (browser, Skyvern)
+        sobrescrevem com uma implementação nativa.
+        
+        Args:
+            contexto: Contexto de execução com dados do job
+            
+        Returns:
+            Resultado da execução do agente
+        """
+        return await asyncio.to_thread(self.executar, contexto)
+    
     def validar_contexto(self, contexto: Dict[str, Any]) -> bool:
         """
         Valida o contexto de execução.
@@ -55,10 +75,17 @@ class BaseAgent(ABC):
         """
         Registra um log de execução.
         
+        Além do logger, o evento é enfileirado para agent_execution_logs
+        (gravação em lote em segundo plano, sem bloquear o agente).
+        
         Args:
             evento: Tipo do evento
             mensagem: Mensagem do log
-            metadata: Metadados adicionais
+            metadata: Metadados adicionais (input_tokens/output_tokens/cost_usd
+                vão para as colunas próprias)
         """
         self.logger.info(f"[{evento}] {mensagem}", extra={"metadata": metadata or {}})
+        escritor = BaseAgent.escritor_logs
+        if escritor is not None:
+            escritor.registrar(self.nome, evento, mensagem, metadata)
 
@@ -9,12 +9,9 @@ buscas) e entrega de reasoning completo.
 from __future__ import annotations
 
 import asyncio
-import time
 import logging
 import os
-import threading
 import json
-import re
 from typing import Dict, Any, Optional, List
 from urllib.parse import urlencode, urlparse, urlunparse
 
@@ -27,10 +24,20 @@ from browser_use.llm.models import ChatOpenAI
 from websockets.exceptions import ConnectionClosedError
 
 from .base_agent import BaseAgent
+from ..utils.artigos import normalizar_url
+from ..utils.bloqueio_recursos import DOMINIOS_RASTREAMENTO_PADRAO, TIPOS_PADRAO, BloqueadorRecursos
+from ..utils.browser_pool import PoolSessoesBrowser
+from ..utils.disjuntor import Disjuntor
+from ..utils.json_extractor import extrair_json
+from ..utils.retry import ErroPermanente
 
 logger = logging.getLogger(__name__)
 
 
+# Falhas que indicam o Browserless fora do ar (contam para o disjuntor)
+ERROS_CONEXAO = (ConnectionClosedError, ConnectionError, TimeoutError)
+
+
 class BrowserAgent(BaseAgent):
     """Agente especializado em navegação web utilizando BrowserUSE + Browserless."""
     
@@ -52,8 +59,6 @@ class BrowserAgent(BaseAgent):
         ]
         self.downloads_path = configuracao.get("downloads_path", "/tmp/browseruse_downloads")
         os.makedirs(self.downloads_path, exist_ok=True)
-        self.http_timeout = max(self.timeout_ms / 1000 if self.timeout_ms else 60, 60)  # Aumentado para 60s mínimo
-        self.cdp_connection_timeout = 120  # 120 segundos para conexão CDP (WebSocket handshake)
         # Caminho para storage_state (sessão do Chrome)
         self.storage_state_path = configuracao.get("storage_state_path", "/app/browser_session/storage_state.json")
         os.environ.setdefault("CDP_CONNECTION_TIMEOUT", "60")
@@ -62,14 +67,71 @@ class BrowserAgent(BaseAgent):
             self.registrar_log("info", "✅ Modo LOCAL ativado (Playwright - Chrome local)")
         else:
             self.registrar_log("info", "✅ Modo REMOTO ativado (Browserless)")
+        
+        # Saúde do Browserless compartilhada entre jobs: checagem em cache e falha rápida com o circuito aberto
+        self.disjuntor: Optional[Disjuntor] = None
+        if not self.use_local_browser:
+            disjuntor = configuracao.get("disjuntor_browserless") or {}
+            self.timeout_sonda = disjuntor.get("timeout_sonda", 5.0)
+            self.disjuntor = Disjuntor(
+                "Browserless",
+                self._sondar_browserless,
+                limite_falhas=disjuntor.get("limite_falhas", 3),
+                intervalo_sonda=disjuntor.get("intervalo_sonda", 15.0),
+                ttl_saude=disjuntor.get("ttl_saude", 30.0)
+            )
+        
+        # Bloqueio de imagens/fontes/mídia e rastreadores (local e Browserless)
+        bloqueio = configuracao.get("bloqueio_recursos") or {}
+        self.bloqueio_ativo = bloqueio.get("ativo", True)
+        self.bloqueio_tipos = bloqueio.get("tipos") or list(TIPOS_PADRAO)
+        self.bloqueio_dominios = list(DOMINIOS_RASTREAMENTO_PADRAO) + list(bloqueio.get("dominios_extras") or [])
+        
+        # Pool de sessões pré-aquecidas reaproveitadas entre jobs
+        self.browser_pool: Optional[PoolSessoesBrowser] = None
+        if configuracao.get("browser_pool_enabled", True):
+            storage_state = self._carregar_storage_state()
+            self.browser_pool = PoolSessoesBrowser(
+                fabrica_perfil=lambda: self._criar_browser_profile(storage_state),
+                tamanho=configuracao.get("browser_pool_size", 3),
+                max_usos=configuracao.get("browser_pool_max_usos", 20),
+                max_memoria_mb=configuracao.get("browser_pool_max_memoria_mb", 1500),
+                storage_state=storage_state,
+                loop=configuracao.get("event_loop"),
+                fabrica_bloqueador=self._criar_bloqueador if self.bloqueio_ativo else None
+            )
+            self.browser_pool.aquecer()
+            self.registrar_log("info", f"♻️ Pool de browser ativado ({self.browser_pool.tamanho} sessões)")
+    
+    def _criar_bloqueador(self) -> BloqueadorRecursos:
+        return BloqueadorRecursos(tipos=self.bloqueio_tipos, dominios=self.bloqueio_dominios)
+    
+    def fechar(self) -> None:
+        """Encerra as sessões de browser mantidas pelo pool e a sonda do Browserless."""
+        if self.browser_pool:
+            self.browser_pool.fechar()
+        if self.disjuntor:
+            self.disjuntor.fechar()
     
     def executar(self, contexto: Dict[str, Any]) -> Dict[str, Any]:
+        """Executa o agente de forma bloqueante (no loop do pool, quando ativo)."""
+        if self.browser_pool:
+            return self.browser_pool.executar(self._executar_async(contexto))
+        return asyncio.run(self._executar_async(contexto))
+    
+    async def executar_async(self, contexto: Dict[str, Any]) -> Dict[str, Any]:
+        """Executa o agente como corrotina (as sessões do pool só podem ser usadas no loop do pool)."""
+        if self.browser_pool:
+            return await self.browser_pool.aguardar(self._executar_async(contexto))
+        return await self._executar_async(contexto)
+    
+    async def _executar_async(self, contexto: Dict[str, Any]) -> Dict[str, Any]:
         if not self.openai_api_key:
             raise ValueError("Chave da OpenAI não configurada para o Browser Agent.")
         
         url = contexto.get("url")
         if not url:
-            raise ValueError("URL não fornecida no contexto")
+            raise ErroPermanente("URL não fornecida no contexto")
         
         tarefa = self._montar_tarefa(contexto)
         self.registrar_log("navegacao", f"🌐 Iniciando BrowserUSE")
@@ -78,8 +140,17 @@ class BrowserAgent(BaseAgent):
         self.registrar_log("navegacao", f"👀 Acompanhe em: http://localhost:3001/ (clique em 'Sessions')")
         
         # Executar com logging em tempo real
-        history = self._executar_com_retries_com_logging(tarefa)
-        self._logar_passos(history)
+        bloqueio: Dict[str, Any] = {}
+        history = await self._executar_com_retries(tarefa, bloqueio)
+        if bloqueio:
+            contexto["recursos_bloqueados"] = bloqueio
+            self.registrar_log(
+                "recursos_bloqueados",
+                f"🚫 {sum(bloqueio['requisicoes_bloqueadas'].values())} recursos e "
+                f"{bloqueio['rastreadores_bloqueados']} rastreadores bloqueados; "
+                f"{bloqueio['bytes_economizados'] / 1024:.0f} KiB economizados",
+                metadata=bloqueio
+            )
         
         # Extrair resultado final e estruturar
         resultado_final = history.final_result() or self._resumir_passos(history)
@@ -104,7 +175,8 @@ class BrowserAgent(BaseAgent):
             "email_body_ptbr": resultado_estruturado.get("email_body_ptbr"),
             "itens": resultado_estruturado.get("itens", []),
             "status": "sucesso",
-            "tamanho": len(resultado_estruturado.get("conteudo_completo", "")) if resultado_estruturado.get("conteudo_completo") else 0
+            "tamanho": len(resultado_estruturado.get("conteudo_completo", "")) if resultado_estruturado.get("conteudo_completo") else 0,
+            "recursos_bloqueados": bloqueio or None
         }
         self.registrar_log("sucesso", f"BrowserUSE finalizado. {len(resultado_estruturado.get('itens', []))} itens coletados")
         return resultado
@@ -163,93 +235,104 @@ class BrowserAgent(BaseAgent):
         # Adicionar instrução de timeout no final
         prompt += f"\n\n## Timeout\n\nTempo máximo de execução: {self.browser_use_timeout} segundos. Colete o máximo de itens possível dentro deste tempo. Não há limite rígido de quantidade - apenas limite de tempo."
         
+        prompt += self._secao_coleta_previa(contexto)
         return prompt
     
-    def _executar_com_retries(self, tarefa: str) -> AgentHistoryList:
-        tentativas = max(1, int(self.browser_use_retries))
-        erros: List[str] = []
+    def _secao_coleta_previa(self, contexto: Dict[str, Any]) -> str:
+        """Informa ao agente o que já foi descoberto/coletado e o que ficou pendente."""
+        secao = ""
+        ja_coletadas = [url for url in contexto.get("urls_ja_coletadas") or [] if url]
+        chaves_coletadas = {normalizar_url(url) for url in ja_coletadas}
+        candidatos = [
+            c.get("url") for c in contexto.get("candidatos") or []
+            if c.get("url") and normalizar_url(c.get("url")) not in chaves_coletadas
+        ]
+        if candidatos and "urls_pendentes" not in contexto:
+            # Sem caminho HTTP: o browser visita diretamente os candidatos do sitemap/RSS
+            secao += (
+                "\n\n## Artigos candidatos (sitemap/RSS, já filtrados pelo período)\n\n"
+                "Visite APENAS estas URLs, na ordem, em vez de navegar pela homepage:\n"
+                + "\n".join(f"- {url}" for url in candidatos)
+            )
+        pendentes = [url for url in contexto.get("urls_pendentes") or [] if url]
+        if ja_coletadas:
+            secao += "\n\n## Artigos já coletados (NÃO visitar novamente)\n\n" + "\n".join(f"- {url}" for url in ja_coletadas)
+        if pendentes:
+            secao += (
+                "\n\n## Páginas que exigem JavaScript/interação (visitar primeiro)\n\n"
+                + "\n".join(f"- {url}" for url in pendentes)
+            )
+        return secao
+    
+    async def _executar_com_retries(self, tarefa: str, bloqueio: Dict[str, Any]) -> AgentHistoryList:
+        """
+        Executa BrowserUSE com logging em tempo real dos reasonings, com retries.
         
-        retry_waits = [10, 15, 20]
-        for tentativa in range(1, tentativas + 1):
-            try:
-                return self._executar_browser_use(tarefa)
-            except (ConnectionClosedError, TimeoutError, RuntimeError) as exc:
-                msg = f"Tentativa {tentativa}/{tentativas} falhou: {exc}"
-                erros.append(msg)
-                self.registrar_log("erro", f"[BrowserUSE] {msg}")
-                if tentativa < tentativas:
-                    wait_time = retry_waits[min(tentativa - 1, len(retry_waits) - 1)]
-                    self.registrar_log("info", f"⏳ Aguardando {wait_time}s antes de retry...")
-                    time.sleep(wait_time)
-                    # Tentar reconectar ao CDP
-                    try:
-                        self.registrar_log("info", "🔄 Tentando reconectar ao Browserless...")
-                        cdp_url = self._obter_cdp_url()
-                        self.registrar_log("info", f"✅ Reconectado: {cdp_url[:50]}...")
-                    except Exception as reconexao_error:
-                        self.registrar_log("aviso", f"⚠️ Erro na reconexão: {reconexao_error}")
-                continue
+        Quedas do Browserless não são esperadas aqui: as falhas de conexão
+        alimentam o disjuntor e, com o circuito aberto, ``CircuitoAberto``
+        sobe na hora para o worker reagendar o job com atraso.
         
-        raise RuntimeError("BrowserUSE falhou após múltiplas tentativas: " + "; ".join(erros))
-    
-    def _executar_com_retries_com_logging(self, tarefa: str) -> AgentHistoryList:
-        """Executa BrowserUSE com logging em tempo real dos reasonings."""
+        Args:
+            tarefa: Prompt do agente
+            bloqueio: Acumula as métricas de bloqueio de recursos de todas as tentativas
+        """
         tentativas = max(1, int(self.browser_use_retries))
         erros: List[str] = []
         
-        retry_waits = [10, 15, 20]
+        retry_waits = [2, 5]  # Só absorve falhas pontuais; quedas ficam com o disjuntor
         for tentativa in range(1, tentativas + 1):
             try:
-                return self._executar_browser_use_com_logging(tarefa)
-            except (ConnectionClosedError, TimeoutError, RuntimeError) as exc:
+                return await self._executar_browser_use(tarefa, bloqueio)
+            except ERROS_CONEXAO + (RuntimeError,) as exc:
+                if self.disjuntor is not None and isinstance(exc, ERROS_CONEXAO):
+                    self.disjuntor.registrar_falha(exc)
                 msg = f"Tentativa {tentativa}/{tentativas} falhou: {exc}"
                 erros.append(msg)
                 self.registrar_log("erro", f"[BrowserUSE] {msg}")
                 if tentativa < tentativas:
                     wait_time = retry_waits[min(tentativa - 1, len(retry_waits) - 1)]
                     self.registrar_log("info", f"⏳ Aguardando {wait_time}s antes de retry...")
-                    time.sleep(wait_time)
-                    # Tentar reconectar ao CDP
-                    try:
-                        self.registrar_log("info", "🔄 Tentando reconectar ao Browserless...")
-                        cdp_url = self._obter_cdp_url()
-                        self.registrar_log("info", f"✅ Reconectado: {cdp_url[:50]}...")
-                    except Exception as reconexao_error:
-                        self.registrar_log("aviso", f"⚠️ Erro na reconexão: {reconexao_error}")
+                    await asyncio.sleep(wait_time)
                 continue
         
         raise RuntimeError("BrowserUSE falhou após múltiplas tentativas: " + "; ".join(erros))
     
-    def _executar_browser_use(self, tarefa: str) -> AgentHistoryList:
-        """Executa BrowserUSE sem logging em tempo real (método original)."""
-        return self._executar_browser_use_com_logging(tarefa)
-    
-    def _executar_browser_use_com_logging(self, tarefa: str) -> AgentHistoryList:
-        """Executa BrowserUSE com logging em tempo real dos reasonings."""
-        from threading import Timer
-        import json
-        from queue import Queue
-        
-        # Carregar storage_state se existir (sessão do Chrome)
-        storage_state = None
-        if os.path.exists(self.storage_state_path):
-            try:
-                with open(self.storage_state_path, 'r') as f:
-                    storage_state = json.load(f)
-                cookie_count = len(storage_state.get('cookies', []))
-                self.registrar_log("info", f"🍪 Sessão do Chrome carregada: {cookie_count} cookies")
-            except Exception as e:
-                self.registrar_log("aviso", f"⚠️ Erro ao carregar storage_state: {e}")
-        else:
-            self.registrar_log("info", "ℹ️ Nenhuma sessão do Chrome encontrada (storage_state.json não existe)")
-        
-        # Escolher entre modo local (Playwright) ou remoto (Browserless)
-        if self.use_local_browser:
-            browser_profile = self._criar_browser_profile_local(storage_state)
+    async def _executar_browser_use(self, tarefa: str, bloqueio: Dict[str, Any]) -> AgentHistoryList:
+        """
+        Executa BrowserUSE com logging em tempo real dos reasonings.
+        
+        Os passos são registrados pelo hook on_step_end do browser-use, no
+        mesmo event loop do agente, e o timeout é um asyncio.wait_for: ao
+        estourar, a execução é cancelada dentro do loop e o histórico parcial
+        é devolvido. Nenhuma thread auxiliar por job; as chamadas bloqueantes
+        (pool, perfil remoto) vão para threads para não travar o loop
+        compartilhado com os demais jobs.
+        """
+        if self.disjuntor is not None:
+            self.disjuntor.permitir()  # Circuito aberto: nem ocupa sessão do pool
+        
+        sessao_pool = None
+        bloqueador: Optional[BloqueadorRecursos] = None
+        if self.browser_pool:
+            sessao_pool = await asyncio.to_thread(self.browser_pool.adquirir)
+            browser_session = sessao_pool.browser_session
+            bloqueador = sessao_pool.bloqueador
+            if bloqueador is not None:
+                bloqueador.coletar()  # Descarta o que foi contado fora do job (isolamento da sessão)
+            self.registrar_log("info", f"♻️ Sessão de browser reaproveitada do pool (uso #{sessao_pool.usos})")
         else:
-            browser_profile = self._criar_browser_profile_remoto(storage_state)
+            browser_session = BrowserSession(
+                browser_profile=await asyncio.to_thread(self._criar_browser_profile, self._carregar_storage_state())
+            )
+            if self.bloqueio_ativo:
+                bloqueador = self._criar_bloqueador()
+                try:
+                    await browser_session.start()
+                    await bloqueador.aplicar(browser_session)
+                except Exception as e:
+                    self.registrar_log("aviso", f"⚠️ Bloqueio de recursos não aplicado: {e}")
+                    bloqueador = None
         
-        browser_session = BrowserSession(browser_profile=browser_profile)
         llm = ChatOpenAI(
             model=self.browser_use_model,
             api_key=self.openai_api_key,
@@ -265,71 +348,39 @@ class BrowserAgent(BaseAgent):
             include_attributes=["href", "title", "text", "id", "class"]  # Atributos essenciais para DOM
         )
         
-        history_ref = {"history": None}  # Usar dict para referência mutável
-        timeout_ocorreu = [False]  # Lista para permitir modificação em closure
+        passos_registrados = [0]
+        timeout_ocorreu = [False]
+        descartar_sessao = [False]  # Sessão do pool não deve voltar após timeout/erro
         
-        def timeout_handler():
-            timeout_ocorreu[0] = True
-            self.registrar_log("aviso", f"⏱️ Timeout de {self.browser_use_timeout}s atingido")
-            try:
-                asyncio.run(browser_session.stop())
-            except:
-                pass
-        
-        # Thread para monitorar history em tempo real
-        def monitorar_reasonings():
-            ultimo_step = 0
-            while not timeout_ocorreu[0]:
-                try:
-                    current_history = history_ref["history"]
-                    if current_history and hasattr(current_history, 'history') and len(current_history.history) > ultimo_step:
-                        # Novo passo detectado
-                        for idx in range(ultimo_step, len(current_history.history)):
-                            passo = current_history.history[idx]
-                            step_num = idx + 1
-                            for resultado in passo.result:
-                                # Extrair thinking/reasoning
-                                thinking = getattr(resultado, "thinking", None)
-                                if thinking and thinking.strip():
-                                    self.registrar_log("reasoning", f"🧠 [Passo {step_num}] {thinking.strip()}")
-                                
-                                # Extrair ação
-                                action = getattr(resultado, "action", None)
-                                if action:
-                                    action_type = type(action).__name__
-                                    if hasattr(action, "extracted_content") and action.extracted_content:
-                                        content = action.extracted_content.strip()[:200]
-                                        self.registrar_log("acao", f"⚡ [Passo {step_num}] {action_type}: {content}...")
-                                    elif hasattr(action, "long_term_memory") and action.long_term_memory:
-                                        memory = action.long_term_memory.strip()[:200]
-                                        self.registrar_log("memoria", f"💭 [Passo {step_num}] Memória: {memory}...")
-                        ultimo_step = len(current_history.history)
-                    time.sleep(0.5)  # Verificar a cada 500ms
-                except Exception:
-                    # Ignorar erros no monitoramento
-                    time.sleep(1)
-        
-        timer = Timer(self.browser_use_timeout, timeout_handler)
-        monitor_thread = threading.Thread(target=monitorar_reasonings, daemon=True)
+        def registrar_novos_passos(historico: Optional[AgentHistoryList]) -> None:
+            if historico is None:
+                return
+            for indice in range(passos_registrados[0], len(historico.history)):
+                self._registrar_passo(indice + 1, historico.history[indice])
+            passos_registrados[0] = len(historico.history)
+        
+        async def ao_fim_do_passo(agente_browser: BrowserUseAgent) -> None:
+            registrar_novos_passos(self._historico_do_agente(agente_browser))
         
         try:
-            timer.start()
-            monitor_thread.start()
-            
             self.registrar_log("inicio", "🚀 Iniciando execução BrowserUSE...")
-            history = agente.run_sync(max_steps=self.browser_use_max_steps)
-            history_ref["history"] = history  # Atualizar referência
-            timer.cancel()
+            try:
+                history = await asyncio.wait_for(
+                    agente.run(max_steps=self.browser_use_max_steps, on_step_end=ao_fim_do_passo),
+                    timeout=self.browser_use_timeout
+                )
+            except asyncio.TimeoutError:
+                timeout_ocorreu[0] = True
+                descartar_sessao[0] = True
+                self.registrar_log("aviso", f"⏱️ Timeout de {self.browser_use_timeout}s atingido")
+                history = self._historico_do_agente(agente)
+            # Só os passos que o hook não chegou a ver (ex.: passo interrompido pelo timeout)
+            registrar_novos_passos(history)
+            if self.disjuntor is not None:
+                self.disjuntor.registrar_sucesso()
             
-            # Log final dos reasonings
             if history and len(history.history) > 0:
                 self.registrar_log("info", f"✅ BrowserUSE completou {len(history.history)} passos")
-                # Logar reasonings finais que podem ter sido perdidos
-                for idx, passo in enumerate(history.history, start=1):
-                    for resultado in passo.result:
-                        thinking = getattr(resultado, "thinking", None)
-                        if thinking and thinking.strip():
-                            self.registrar_log("reasoning", f"🧠 [Passo {idx}] {thinking.strip()}")
             
             if timeout_ocorreu[0]:
                 self.registrar_log("aviso", "⏱️ Timeout atingido, retornando resultado parcial")
@@ -343,54 +394,106 @@ class BrowserAgent(BaseAgent):
                 self.registrar_log("aviso", "⚠️ BrowserUSE completou com resultado parcial")
                 return history
             raise RuntimeError("BrowserUSE não retornou resultado")
-        except (ConnectionClosedError, TimeoutError, RuntimeError) as e:
-            timer.cancel()
+        except ERROS_CONEXAO + (RuntimeError,) as e:
+            descartar_sessao[0] = True
             self.registrar_log("erro", f"❌ Erro durante execução BrowserUSE: {e}")
             # Tentar extrair resultado parcial mesmo com erro
-            history = history_ref.get("history")
+            history = self._historico_do_agente(agente)
+            registrar_novos_passos(history)
             if history and len(history.history) > 0:
+                if self.disjuntor is not None and isinstance(e, ERROS_CONEXAO):
+                    self.disjuntor.registrar_falha(e)
                 self.registrar_log("aviso", "⚠️ Retornando resultado parcial apesar do erro")
-                # Aguardar um pouco para garantir que tudo foi processado
-                time.sleep(2)
                 return history
-            # Se não houver histórico, tentar reconectar uma última vez
-            self.registrar_log("info", "🔄 Tentando reconexão final...")
-            try:
-                time.sleep(5)
-                cdp_url = self._obter_cdp_url()
-                self.registrar_log("info", f"✅ Reconexão bem-sucedida: {cdp_url[:50]}...")
-            except Exception as reconexao_error:
-                self.registrar_log("erro", f"❌ Falha na reconexão final: {reconexao_error}")
+            # Sem histórico: a nova tentativa (ou o disjuntor) decide se ainda vale conectar
             raise
         finally:
-            timer.cancel()
-            timeout_ocorreu[0] = True  # Parar thread de monitoramento
-            time.sleep(0.6)  # Aguardar thread finalizar
+            if bloqueador is not None:
+                self._somar_bloqueio(bloqueio, bloqueador.coletar())
+            if sessao_pool is not None:
+                try:
+                    await asyncio.to_thread(self.browser_pool.devolver, sessao_pool, descartar_sessao[0])
+                except Exception as e:
+                    self.registrar_log("aviso", f"Erro ao devolver sessão ao pool: {e}")
+            else:
+                # Mesmo loop em que a sessão foi usada: sem corrida com o encerramento
+                try:
+                    await browser_session.stop()
+                except Exception as e:
+                    self.registrar_log("aviso", f"Erro ao parar sessão: {e}")
+    
+    @staticmethod
+    def _somar_bloqueio(total: Dict[str, Any], parcial: Dict[str, Any]) -> None:
+        """Acumula as métricas de bloqueio de uma tentativa no total do job."""
+        if not total:
+            total.update(parcial)
+            return
+        for tipo, quantidade in parcial["requisicoes_bloqueadas"].items():
+            total["requisicoes_bloqueadas"][tipo] = total["requisicoes_bloqueadas"].get(tipo, 0) + quantidade
+        for chave in ("rastreadores_bloqueados", "bytes_economizados", "respostas_sem_tamanho"):
+            total[chave] += parcial[chave]
+    
+    @staticmethod
+    def _historico_do_agente(agente: BrowserUseAgent) -> Optional[AgentHistoryList]:
+        """Histórico acumulado pelo agente (disponível também após cancelamento)."""
+        historico = getattr(agente, "history", None)
+        if historico is None:
+            historico = getattr(getattr(agente, "state", None), "history", None)
+        return historico if hasattr(historico, "history") else None
+    
+    def _registrar_passo(self, step_num: int, passo: Any) -> None:
+        """Registra reasoning, ações e memória de um passo do browser-use."""
+        for resultado in passo.result:
+            # Extrair thinking/reasoning
+            thinking = getattr(resultado, "thinking", None)
+            if thinking and thinking.strip():
+                self.registrar_log("reasoning", f"🧠 [Passo {step_num}] {thinking.strip()}")
+            
+            # Extrair ação
+            action = getattr(resultado, "action", None)
+            if action:
+                action_type = type(action).__name__
+                if hasattr(action, "extracted_content") and action.extracted_content:
+                    content = action.extracted_content.strip()[:200]
+                    self.registrar_log("acao", f"⚡ [Passo {step_num}] {action_type}: {content}...")
+                elif hasattr(action, "long_term_memory") and action.long_term_memory:
+                    memory = action.long_term_memory.strip()[:200]
+                    self.registrar_log("memoria", f"💭 [Passo {step_num}] Memória: {memory}...")
+    
+    def _carregar_storage_state(self) -> Optional[Dict[str, Any]]:
+        """Carrega storage_state se existir (sessão do Chrome)."""
+        storage_state = None
+        if os.path.exists(self.storage_state_path):
             try:
-                asyncio.run(browser_session.stop())
+                with open(self.storage_state_path, 'r') as f:
+                    storage_state = json.load(f)
+                cookie_count = len(storage_state.get('cookies', []))
+                self.registrar_log("info", f"🍪 Sessão do Chrome carregada: {cookie_count} cookies")
             except Exception as e:
-                self.registrar_log("aviso", f"Erro ao parar sessão: {e}")
+                self.registrar_log("aviso", f"⚠️ Erro ao carregar storage_state: {e}")
+        else:
+            self.registrar_log("info", "ℹ️ Nenhuma sessão do Chrome encontrada (storage_state.json não existe)")
+        return storage_state
     
-    def _verificar_browserless_disponivel(self) -> bool:
-        """Verifica se o Browserless está disponível antes de tentar conectar."""
-        try:
-            # Tentar /json/version que sempre funciona
-            version_url = f"{self.browserless_url}/json/version"
-            with httpx.Client(timeout=15.0) as client:
-                response = client.get(version_url)
-                if response.status_code == 200:
-                    data = response.json()
-                    ws_url = data.get("webSocketDebuggerUrl")
-                    if ws_url:
-                        self.registrar_log("info", "✅ Browserless está disponível e respondendo")
-                        return True
-            return False
-        except Exception as e:
-            self.registrar_log("aviso", f"⚠️ Browserless não disponível: {e}")
-            return False
+    def _criar_browser_profile(self, storage_state: Optional[Dict[str, Any]]) -> BrowserProfile:
+        """Escolhe entre modo local (Playwright) ou remoto (Browserless)."""
+        if self.use_local_browser:
+            return self._criar_browser_profile_local(storage_state)
+        return self._criar_browser_profile_remoto(storage_state)
     
-    def _obter_cdp_url(self, max_retries: int = 3) -> str:
-        """Obtém URL CDP com retry e timeout aumentado."""
+    def _sondar_browserless(self) -> str:
+        """
+        Sonda de saúde do disjuntor: obtém a URL CDP e testa o handshake WebSocket.
+        
+        Timeouts curtos e uma única tentativa; a repetição fica com a sonda em
+        background do disjuntor, fora dos slots de job.
+        
+        Returns:
+            URL CDP (reaproveitada enquanto a sonda estiver válida)
+        
+        Raises:
+            RuntimeError: Browserless fora do ar (a falha já é contada pelo disjuntor)
+        """
         params = {}
         if self.browserless_token:
             params["token"] = self.browserless_token
@@ -398,36 +501,31 @@ class BrowserAgent(BaseAgent):
         if params:
             version_url = f"{version_url}?{urlencode(params)}"
         
-        # Verificar disponibilidade primeiro
-        if not self._verificar_browserless_disponivel():
-            self.registrar_log("aviso", "⚠️ Browserless não está disponível. Aguardando 5s...")
-            time.sleep(5)
+        try:
+            with httpx.Client(timeout=self.timeout_sonda) as client:
+                response = client.get(version_url)
+                response.raise_for_status()
+                data = response.json()
+        except Exception as e:
+            raise RuntimeError(f"Browserless não respondeu em /json/version: {e}") from e
         
-        ultimo_erro = None
-        for tentativa in range(1, max_retries + 1):
-            try:
-                self.registrar_log("info", f"🔌 Tentativa {tentativa}/{max_retries} de obter CDP URL...")
-                with httpx.Client(timeout=self.http_timeout) as client:
-                    response = client.get(version_url)
-                    response.raise_for_status()
-                    data = response.json()
-                
-                ws_url = data.get("webSocketDebuggerUrl")
-                if not ws_url:
-                    raise RuntimeError("Browserless não retornou webSocketDebuggerUrl.")
-                
-                cdp_url = self._ajustar_ws_url(ws_url)
-                self.registrar_log("info", f"✅ CDP URL obtida com sucesso: {cdp_url[:50]}...")
-                return cdp_url
-            except Exception as e:
-                ultimo_erro = e
-                self.registrar_log("aviso", f"⚠️ Erro ao obter CDP URL (tentativa {tentativa}/{max_retries}): {e}")
-                if tentativa < max_retries:
-                    wait_time = 5 * tentativa
-                    self.registrar_log("info", f"⏳ Aguardando {wait_time}s antes de retry...")
-                    time.sleep(wait_time)
+        ws_url = data.get("webSocketDebuggerUrl")
+        if not ws_url:
+            raise RuntimeError("Browserless não retornou webSocketDebuggerUrl.")
         
-        raise RuntimeError(f"Falha ao obter CDP URL após {max_retries} tentativas: {ultimo_erro}")
+        cdp_url = self._ajustar_ws_url(ws_url)
+        if not self._testar_conexao_websocket(cdp_url, timeout=self.timeout_sonda):
+            raise RuntimeError("Handshake WebSocket com o Browserless falhou")
+        return cdp_url
+    
+    def _obter_cdp_url(self) -> str:
+        """
+        URL CDP da última sonda saudável do Browserless.
+        
+        Raises:
+            CircuitoAberto: Browserless marcado como fora do ar (sem espera)
+        """
+        return self.disjuntor.verificar()
     
     def _ajustar_ws_url(self, ws_url: str) -> str:
         parsed_ws = urlparse(ws_url)
@@ -465,25 +563,10 @@ class BrowserAgent(BaseAgent):
         """Cria BrowserProfile usando Browserless remoto."""
         self.registrar_log("info", f"🔌 Conectando ao Browserless: {self.browserless_url}")
         
-        # Aguardar um pouco para garantir que o Browserless está totalmente pronto
-        self.registrar_log("info", "⏳ Aguardando 8s para garantir que Browserless está totalmente pronto...")
-        time.sleep(8)
-        
-        # Verificar disponibilidade e obter CDP URL com retry
-        cdp_url = self._obter_cdp_url(max_retries=5)  # 5 tentativas com backoff
+        # /json/version + handshake WebSocket testados pelo disjuntor (em cache entre jobs)
+        cdp_url = self._obter_cdp_url()
         self.registrar_log("info", f"✅ CDP URL obtida: {cdp_url[:50]}...")
         
-        # Testar conexão WebSocket antes de passar para browser-use
-        self.registrar_log("info", "🧪 Testando conexão WebSocket antes de iniciar browser-use...")
-        if not self._testar_conexao_websocket(cdp_url):
-            self.registrar_log("aviso", "⚠️ Teste de WebSocket falhou. Aguardando 10s e tentando novamente...")
-            time.sleep(10)
-            cdp_url = self._obter_cdp_url(max_retries=3)  # Tentar obter nova URL
-            if not self._testar_conexao_websocket(cdp_url):
-                raise RuntimeError("Não foi possível estabelecer conexão WebSocket com Browserless após múltiplas tentativas")
-        
-        self.registrar_log("info", "✅ Conexão WebSocket testada e funcionando")
-        
         browser_profile = BrowserProfile(
             cdp_url=cdp_url,
             headless=True,
@@ -534,19 +617,6 @@ class BrowserAgent(BaseAgent):
                         partes.append(f"Passo {idx}: {pensamento or acao}")
         return "\n".join(partes) if partes else ""
     
-    def _logar_passos(self, history: AgentHistoryList) -> None:
-        for idx, passo in enumerate(history.history, start=1):
-            for resultado in passo.result:
-                pensamento = getattr(resultado, "thinking", None)
-                if pensamento:
-                    self.registrar_log("detalhe", f"[BrowserUSE][Passo {idx}] Pensamento: {pensamento}")
-                acao = getattr(resultado, "action", None)
-                if acao and getattr(acao, "extracted_content", None):
-                    preview = acao.extracted_content.strip()
-                    if len(preview) > 400:
-                        preview = preview[:400] + "..."
-                    self.registrar_log("detalhe", f"[BrowserUSE][Passo {idx}] Resultado: {preview}")
-    
     def _converter_usage(self, usage: Any) -> Dict[str, float]:
         return {
             "prompt_tokens": usage.total_prompt_tokens or 0,
@@ -567,6 +637,12 @@ class BrowserAgent(BaseAgent):
         detalhes = contexto.get("llm_usage_details", {}).copy()
         detalhes[label] = usage
         contexto["llm_usage_details"] = detalhes
+        
+        self.registrar_log(
+            "llm_usage",
+            f"{label}: {usage.get('total_tokens', 0)} tokens, US$ {usage.get('total_cost_usd', 0.0):.4f}",
+            metadata={"label": label, **usage}
+        )
     
     def _extrair_e_estruturar_resultado(self, resultado_final: str, contexto: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -589,33 +665,16 @@ class BrowserAgent(BaseAgent):
         if not resultado_final:
             return resultado_estruturado
         
-        # Tentar extrair JSON do resultado
-        try:
-            # Procurar por blocos JSON no resultado
-            json_pattern = r'\{[^{}]*"itens"[^{}]*\{[^{}]*\}.*?"email_body_ptbr"[^{}]*\}'
-            json_match = re.search(json_pattern, resultado_final, re.DOTALL)
-            
-            if json_match:
-                json_str = json_match.group(0)
-                clipping_data = json.loads(json_str)
-                resultado_estruturado["clipping_json"] = clipping_data
-                resultado_estruturado["itens"] = clipping_data.get("itens", [])
-                resultado_estruturado["email_body_ptbr"] = clipping_data.get("email_body_ptbr", "")
-                self.registrar_log("info", f"✅ JSON estruturado extraído: {len(resultado_estruturado['itens'])} itens")
-            else:
-                # Tentar parsear o resultado inteiro como JSON
-                try:
-                    clipping_data = json.loads(resultado_final.strip())
-                    if isinstance(clipping_data, dict) and "itens" in clipping_data:
-                        resultado_estruturado["clipping_json"] = clipping_data
-                        resultado_estruturado["itens"] = clipping_data.get("itens", [])
-                        resultado_estruturado["email_body_ptbr"] = clipping_data.get("email_body_ptbr", "")
-                        self.registrar_log("info", f"✅ JSON completo parseado: {len(resultado_estruturado['itens'])} itens")
-                except json.JSONDecodeError:
-                    # Se não for JSON, manter como texto
-                    self.registrar_log("aviso", "⚠️ Resultado não é JSON válido, mantendo como texto")
-        except Exception as e:
-            self.registrar_log("aviso", f"⚠️ Erro ao extrair JSON: {e}, mantendo resultado como texto")
+        # Varredura única do texto: escolhe o objeto JSON com o schema do clipping
+        clipping_data = extrair_json(resultado_final, chaves_obrigatorias=("itens",))
+        if clipping_data is not None:
+            resultado_estruturado["clipping_json"] = clipping_data
+            resultado_estruturado["itens"] = clipping_data.get("itens", [])
+            resultado_estruturado["email_body_ptbr"] = clipping_data.get("email_body_ptbr", "")
+            self.registrar_log("info", f"✅ JSON estruturado extraído: {len(resultado_estruturado['itens'])} itens")
+        else:
+            # Se não houver JSON do clipping, manter como texto
+            self.registrar_log("aviso", "⚠️ Resultado não é JSON válido, mantendo como texto")
         
         return resultado_estruturado
     
@@ -0,0 +1,298 @@
+"""
+Discovery Agent - Descoberta de artigos via sitemaps e feeds RSS/Atom.
+
+Antes de qualquer navegação, lê robots.txt, sitemap.xml (incluindo índices
+e sitemaps Google News) e feeds RSS/Atom dos domínios permitidos, filtra as
+entradas pela janela do período e devolve uma lista ranqueada de URLs
+candidatas. A descoberta é incremental: cada domínio guarda a data mais
+recente já vista (watermark), usada para marcar/filtrar entradas novas e
+para não baixar sitemaps filhos antigos. O novo watermark só considera as
+entradas aceitas (limitado ao instante atual) e fica pendente no contexto
+(``watermarks_descoberta``): o worker o grava apenas quando o job termina
+com sucesso, para que um job que falhe volte a ver as mesmas entradas.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+import httpx
+
+from .base_agent import BaseAgent
+from .http_agent import HEADERS_NAVEGADOR
+from ..utils.feeds import (
+    CAMINHOS_FEED,
+    CAMINHOS_SITEMAP,
+    analisar_feed,
+    analisar_sitemap,
+    encontrar_feeds,
+    sitemaps_do_robots,
+)
+from ..utils.html_extractor import CAMINHOS_EXCLUIDOS, EXTENSOES_EXCLUIDAS
+from ..utils.scoring import calcular_relevancia, chave_url, dias_do_periodo
+
+
+class DiscoveryAgent(BaseAgent):
+    """Agente que descobre URLs candidatas sem browser e sem LLM."""
+    
+    def __init__(self, configuracao: Dict[str, Any], watermarks: Optional[Any] = None):
+        """
+        Inicializa o Discovery Agent.
+        
+        Args:
+            configuracao: dominios, config_path, timeout, max_sitemaps, max_candidatos, incremental
+            watermarks: Armazenamento dos watermarks por domínio (ex.: DatabaseManager)
+        """
+        super().__init__("DiscoveryAgent", configuracao)
+        self.dominios: List[str] = configuracao.get("dominios") or []
+        self.config_path = configuracao.get("config_path")
+        self.max_sitemaps = configuracao.get("max_sitemaps", 10)
+        self.max_candidatos = configuracao.get("max_candidatos", 100)
+        self.incremental = configuracao.get("incremental", False)
+        self.watermarks = watermarks
+        
+        self.client = httpx.Client(
+            headers=HEADERS_NAVEGADOR,
+            timeout=httpx.Timeout(configuracao.get("timeout", 15.0), connect=10.0),
+            follow_redirects=True
+        )
+    
+    def fechar(self) -> None:
+        """Fecha o pool de conexões HTTP."""
+        self.client.close()
+    
+    def executar(self, contexto: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Descobre e ranqueia URLs candidatas para os domínios do job.
+        
+        Args:
+            contexto: Contexto do job (url e parametros: cliente, periodo, incremental)
+        
+        Returns:
+            Resultado com a lista ranqueada de candidatos
+        """
+        inicio = time.time()
+        parametros = contexto.get("parametros", {})
+        cliente = parametros.get("cliente", "LEAR")
+        incremental = bool(parametros.get("incremental", self.incremental))
+        agora = datetime.utcnow()
+        inicio_janela = agora - timedelta(days=dias_do_periodo(parametros.get("periodo")))
+        
+        sites = self._sites_do_job(contexto.get("url"))
+        watermarks = self._carregar_watermarks([self._dominio(site) for site in sites])
+        
+        candidatos: Dict[str, Dict[str, Any]] = {}
+        por_dominio: Dict[str, int] = {}
+        novos_watermarks: Dict[str, str] = {}
+        for site in sites:
+            dominio = self._dominio(site)
+            try:
+                entradas = self._coletar_entradas(site, inicio_janela)
+            except Exception as e:
+                self.registrar_log("aviso", f"⚠️ Falha na descoberta em {dominio}: {e}")
+                continue
+            
+            watermark = watermarks.get(dominio)
+            mais_recente = None
+            aceitas = 0
+            for entrada in entradas:
+                publicado_em = entrada["publicado_em"]
+                if not self._aceitar(entrada, dominio, inicio_janela):
+                    continue
+                # Só entradas aceitas avançam o watermark; lastmod no futuro não passa de agora
+                if publicado_em and (mais_recente is None or publicado_em > mais_recente):
+                    mais_recente = min(publicado_em, agora)
+                novo = watermark is None or publicado_em is None or publicado_em > watermark
+                if incremental and not novo:
+                    continue
+                
+                chave = chave_url(entrada["url"])
+                existente = candidatos.get(chave)
+                if existente is not None:
+                    # Mesma URL no sitemap e no feed: manter título/resumo do feed
+                    existente["titulo"] = existente["titulo"] or entrada["titulo"]
+                    existente["resumo"] = existente["resumo"] or entrada["resumo"]
+                    existente["fontes"].append(entrada["fonte"])
+                    continue
+                candidatos[chave] = {
+                    "url": entrada["url"],
+                    "titulo": entrada["titulo"],
+                    "resumo": entrada["resumo"],
+                    "publicado_em": publicado_em,
+                    "novo": novo,
+                    "fontes": [entrada["fonte"]],
+                }
+                aceitas += 1
+            
+            por_dominio[dominio] = aceitas
+            self.registrar_log("discovery", f"{dominio}: {len(entradas)} entradas lidas, {aceitas} candidatas no período")
+            if mais_recente is not None and (watermark is None or mais_recente > watermark):
+                novos_watermarks[dominio] = mais_recente.isoformat()
+        
+        ranqueados = self._ranquear(list(candidatos.values()), cliente)[: self.max_candidatos]
+        contexto["candidatos"] = ranqueados
+        # Gravados pelo worker só quando o job for concluído (ISO: o contexto vai para o checkpoint)
+        contexto["watermarks_descoberta"] = novos_watermarks
+        
+        tempo = round(time.time() - inicio, 1)
+        self.registrar_log("sucesso", f"Descoberta finalizada em {tempo}s: {len(ranqueados)} candidatos")
+        return {
+            "candidatos": ranqueados,
+            "total": len(ranqueados),
+            "por_dominio": por_dominio,
+            "incremental": incremental,
+            "status": "sucesso",
+        }
+    
+    def _sites_do_job(self, url_job: Optional[str]) -> List[str]:
+        """Site do job, site de config/clipping_params.json e domínios permitidos (sem duplicar www)."""
+        candidatos = [url_job, self._site_configurado()] + [f"https://{dominio}/" for dominio in self.dominios]
+        sites: List[str] = []
+        vistos = set()
+        for site in candidatos:
+            if not site:
+                continue
+            dominio = self._dominio(site)
+            if dominio and dominio not in vistos:
+                vistos.add(dominio)
+                partes = urlparse(site if "://" in site else f"https://{site}")
+                sites.append(f"{partes.scheme}://{partes.netloc}/")
+        return sites
+    
+    def _site_configurado(self) -> Optional[str]:
+        if not self.config_path or not os.path.exists(self.config_path):
+            return None
+        try:
+            with open(self.config_path, "r", encoding="utf-8") as f:
+                return json.load(f).get("site")
+        except (OSError, ValueError) as e:
+            self.registrar_log("aviso", f"⚠️ Erro ao ler {self.config_path}: {e}")
+            return None
+    
+    @staticmethod
+    def _dominio(url: str) -> str:
+        netloc = urlparse(url if "://" in url else f"https://{url}").netloc
+        return netloc.lower().removeprefix("www.")
+    
+    def _coletar_entradas(self, site: str, inicio_janela: datetime) -> List[Dict[str, Any]]:
+        """
+        Lê sitemaps e feeds de um site.
+        
+        Args:
+            site: URL raiz do site
+            inicio_janela: Início da janela do período (UTC)
+        
+        Returns:
+            Entradas com url, titulo, resumo, publicado_em e fonte
+        """
+        entradas: List[Dict[str, Any]] = []
+        
+        robots = self._obter(urljoin(site, "robots.txt"))
+        sitemaps = sitemaps_do_robots(robots.text) if robots is not None else []
+        entradas += self._ler_sitemaps(sitemaps or [urljoin(site, caminho) for caminho in CAMINHOS_SITEMAP], inicio_janela)
+        
+        homepage = self._obter(site)
+        feeds = encontrar_feeds(homepage.text, str(homepage.url)) if homepage is not None else []
+        for feed in feeds or [urljoin(site, caminho) for caminho in CAMINHOS_FEED]:
+            resposta = self._obter(feed)
+            if resposta is None:
+                continue
+            itens_feed = analisar_feed(resposta.content, str(resposta.url))
+            entradas += [dict(item, fonte="feed") for item in itens_feed]
+            if itens_feed and not feeds:
+                # Sem feed declarado: o primeiro caminho padrão que funcionar basta
+                break
+        return entradas
+    
+    def _ler_sitemaps(self, urls: List[str], inicio_janela: datetime) -> List[Dict[str, Any]]:
+        """Percorre sitemaps e índices, pulando sitemaps filhos anteriores à janela."""
+        pendentes = list(urls)
+        visitados = set()
+        entradas: List[Dict[str, Any]] = []
+        while pendentes and len(visitados) < self.max_sitemaps:
+            url = pendentes.pop(0)
+            if url in visitados:
+                continue
+            visitados.add(url)
+            resposta = self._obter(url)
+            if resposta is None:
+                continue
+            filhos, itens = analisar_sitemap(resposta.content)
+            entradas += [dict(item, fonte="sitemap") for item in itens]
+            
+            # Filhos mais recentes primeiro; os modificados antes da janela não têm artigos do período
+            filhos = [filho for filho in filhos if filho["publicado_em"] is None or filho["publicado_em"] >= inicio_janela]
+            filhos.sort(key=lambda filho: filho["publicado_em"] or datetime.min, reverse=True)
+            pendentes = [filho["url"] for filho in filhos] + pendentes
+        return entradas
+    
+    @staticmethod
+    def _aceitar(entrada: Dict[str, Any], dominio: str, inicio_janela: datetime) -> bool:
+        """Mantém só artigos do próprio domínio, dentro da janela do período."""
+        partes = urlparse(entrada["url"])
+        if partes.scheme not in ("http", "https") or partes.netloc.lower().removeprefix("www.") != dominio:
+            return False
+        caminho = partes.path.lower()
+        if caminho in ("", "/") or caminho.endswith(EXTENSOES_EXCLUIDAS):
+            return False
+        if any(excluido in caminho for excluido in CAMINHOS_EXCLUIDOS):
+            return False
+        publicado_em = entrada["publicado_em"]
+        if publicado_em is None:
+            # Sitemaps sem data listam páginas institucionais; feeds são recentes por natureza
+            return entrada["fonte"] == "feed"
+        return publicado_em >= inicio_janela
+    
+    @staticmethod
+    def _ranquear(candidatos: List[Dict[str, Any]], cliente: str) -> List[Dict[str, Any]]:
+        """
+        Ordena por relevância prévia (título/resumo ou slug), novidade e data.
+        
+        Args:
+            candidatos: Candidatos aceitos
+            cliente: Nome do cliente
+        
+        Returns:
+            Candidatos serializáveis, do mais para o menos promissor
+        """
+        for candidato in candidatos:
+            titulo = candidato["titulo"] or urlparse(candidato["url"]).path.rstrip("/").rsplit("/", 1)[-1].replace("-", " ")
+            candidato["score"] = calcular_relevancia(titulo, candidato["resumo"], cliente)["score"]
+        
+        candidatos.sort(
+            key=lambda c: (c["score"], c["novo"], c["publicado_em"] or datetime.min),
+            reverse=True
+        )
+        return [
+            {
+                "url": c["url"],
+                "titulo": c["titulo"],
+                "data_iso": c["publicado_em"].strftime("%Y-%m-%d") if c["publicado_em"] else None,
+                "score": c["score"],
+                "novo": c["novo"],
+                "fontes": c["fontes"],
+            }
+            for c in candidatos
+        ]
+    
+    def _obter(self, url: str) -> Optional[httpx.Response]:
+        try:
+            resposta = self.client.get(url)
+        except httpx.HTTPError as e:
+            self.logger.debug(f"Falha HTTP em {url}: {e}")
+            return None
+        return resposta if resposta.status_code == 200 else None
+    
+    def _carregar_watermarks(self, dominios: List[str]) -> Dict[str, datetime]:
+        if not self.watermarks:
+            return {}
+        try:
+            return self.watermarks.carregar_watermarks(dominios)
+        except Exception as e:
+            self.registrar_log("aviso", f"⚠️ Erro ao carregar watermarks de descoberta: {e}")
+            return {}
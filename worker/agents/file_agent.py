@@ -240,8 +240,13 @@ class FileAgent(BaseAgent):
 - **Resumo:** {item.get('resumo_2l', 'Sem resumo')}
 - **Termos encontrados:** {', '.join(item.get('termos_encontrados', []))}
 - **Menciona LEAR:** {'Sim' if item.get('menciona_lear', False) else 'Não'}
-
 """
+                    outras_fontes = (item.get("fontes") or [])[1:]
+                    if outras_fontes:
+                        markdown += "- **Também publicado em:** " + ", ".join(
+                            f"[{fonte.get('site') or fonte.get('url')}]({fonte.get('url')})" for fonte in outras_fontes
+                        ) + "\n"
+                    markdown += "\n"
             
             markdown += f"""## Consumo de LLM
 
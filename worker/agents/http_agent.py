@@ -0,0 +1,352 @@
+"""
+HTTP Agent - Caminho rápido de coleta sem browser e sem LLM.
+
+Busca páginas de listagem e artigos com um cliente httpx compartilhado
+(keep-alive) e extrai título, data, autor e corpo de forma determinística.
+Só as páginas que exigem JavaScript ou interação ficam para o BrowserAgent.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse, urlunparse
+
+import httpx
+
+from .base_agent import BaseAgent
+from ..utils.artigos import hash_conteudo, normalizar_url
+from ..utils.html_extractor import extrair_artigo, extrair_links_artigos
+from ..utils.scoring import (
+    calcular_relevancia,
+    chave_url,
+    dentro_do_periodo,
+    dias_do_periodo,
+    montar_email_body,
+    ordenar_itens,
+    resumir,
+)
+
+# Sites permitidos pelo prompt (além do site principal do job)
+SITES_PADRAO = [
+    "https://www.automotivebusiness.com.br/",
+    "https://sindipecas.org.br/",
+    "https://anfavea.com.br/site/press-releases-3/",
+    "https://iqa.org.br/",
+    "https://cni.portaldaindustria.com.br/",
+]
+
+# Seções comuns tentadas a partir da homepage (PASSO 2 do prompt)
+SECOES_LISTAGEM = ["", "noticias", "posts", "pt/posts/", "artigos", "news"]
+
+# Falhas que podem dar certo no browser (instabilidade, rate limit, bloqueio anti-bot);
+# os demais erros (404, 410...) descartam a URL
+STATUS_DELEGAVEIS = {403, 408, 425, 429}
+
+# Headers realistas exigidos pelo prompt para evitar HTTP 403
+HEADERS_NAVEGADOR = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
+    "DNT": "1",
+    "Upgrade-Insecure-Requests": "1",
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "none",
+    "Cache-Control": "max-age=0",
+}
+
+
+class HttpAgent(BaseAgent):
+    """Agente de coleta via HTTP puro para páginas renderizadas no servidor."""
+    
+    def __init__(self, configuracao: Dict[str, Any]):
+        """
+        Inicializa o HTTP Agent.
+        
+        Args:
+            configuracao: sites, timeout, delay_seconds, max_paginas, max_conexoes
+        """
+        super().__init__("HttpAgent", configuracao)
+        self.sites: List[str] = configuracao.get("sites") or SITES_PADRAO
+        self.timeout = configuracao.get("timeout", 20.0)  # TIMEOUT POR PÁGINA do prompt
+        self.delay_seconds = configuracao.get("delay_seconds", 1.0)
+        self.max_paginas = configuracao.get("max_paginas", 60)
+        max_conexoes = configuracao.get("max_conexoes", 10)
+        
+        # Cliente único (thread-safe) com pool de conexões keep-alive entre jobs
+        self.client = httpx.Client(
+            headers=HEADERS_NAVEGADOR,
+            timeout=httpx.Timeout(self.timeout, connect=10.0),
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_conexoes, max_keepalive_connections=max_conexoes)
+        )
+        self._ultima_requisicao: Dict[str, float] = {}
+        self._lock_hosts = threading.Lock()
+    
+    def fechar(self) -> None:
+        """Fecha o pool de conexões HTTP."""
+        self.client.close()
+    
+    def executar(self, contexto: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Coleta artigos via HTTP e devolve o mesmo formato do Browser Agent.
+        
+        Args:
+            contexto: Contexto do job (url, parametros e, opcionalmente, candidatos
+                e artigos_conhecidos/hashes_conhecidos de jobs anteriores)
+        
+        Returns:
+            Resultado com itens, clipping_json, urls_pendentes e flag 'suficiente'
+        """
+        inicio = time.time()
+        parametros = contexto.get("parametros", {})
+        cliente = parametros.get("cliente", "LEAR")
+        periodo = parametros.get("periodo", "últimos 30 dias")
+        max_itens = int(parametros.get("max_itens", 15))
+        dias = dias_do_periodo(periodo)
+        log_execucao: List[str] = []
+        
+        def registrar(mensagem: str) -> None:
+            log_execucao.append(f"{datetime.now().strftime('%H:%M:%S')} - {mensagem}")
+            self.registrar_log("http", mensagem)
+        
+        sites = self._sites_do_job(contexto.get("url"))
+        candidatos = list(contexto.get("candidatos") or [])
+        if candidatos:
+            registrar(f"Usando {len(candidatos)} candidatos descobertos via sitemap/RSS")
+        if len(candidatos) < max_itens:
+            # Poucos candidatos: completar com as páginas de listagem
+            candidatos += self._descobrir_por_listagens(sites, registrar)
+        
+        conhecidos = contexto.get("artigos_conhecidos") or {}
+        hashes_conhecidos = contexto.get("hashes_conhecidos") or {}
+        itens: List[Dict[str, Any]] = []
+        pendentes: List[str] = []
+        vistos = set()
+        incluidos = set()
+        reaproveitados = 0
+        paginas = 0
+        for candidato in candidatos:
+            url = candidato["url"] if isinstance(candidato, dict) else candidato
+            chave = chave_url(url)
+            if chave in vistos:
+                continue
+            vistos.add(chave)
+            if len(itens) >= max_itens or paginas >= self.max_paginas:
+                break
+            
+            # Já resumido e pontuado num job anterior: reaproveitar sem baixar a página
+            chave_artigo = normalizar_url(url)
+            if not chave_artigo:
+                registrar(f"URL inválida ignorada: {url}")
+                continue
+            if chave_artigo in incluidos:
+                continue
+            if chave_artigo in conhecidos:
+                incluidos.add(chave_artigo)
+                itens.append(conhecidos[chave_artigo])
+                reaproveitados += 1
+                continue
+            paginas += 1
+            
+            resposta, delegar = self._buscar(url)
+            if resposta is None:
+                if delegar:
+                    pendentes.append(url)
+                continue
+            artigo = extrair_artigo(resposta.text, str(resposta.url))
+            if artigo["exige_js"] or not artigo["titulo"]:
+                registrar(f"Página exige JS/interação, delegando ao browser: {url}")
+                pendentes.append(url)
+                continue
+            if dentro_do_periodo(artigo["data_iso"], dias) is False:
+                registrar(f"Data fora do período ({artigo['data_iso']}): {url}")
+                continue
+            
+            # Mesmo texto publicado sob outra URL já clipada
+            chave_original = hashes_conhecidos.get(hash_conteudo({"texto": self._corpo(artigo["texto"])}))
+            if chave_original in conhecidos:
+                if chave_original not in incluidos:
+                    incluidos.add(chave_original)
+                    itens.append(conhecidos[chave_original])
+                    reaproveitados += 1
+                registrar(f"Conteúdo idêntico a artigo já clipado ({chave_original}): {url}")
+                continue
+            
+            relevancia = calcular_relevancia(artigo["titulo"], artigo["texto"], cliente)
+            if relevancia["score"] < 1:
+                continue
+            item = self._montar_item(artigo, relevancia)
+            incluidos.add(chave_artigo)
+            itens.append(item)
+            registrar(f"✓ Artigo válido (score: {item['score']}, data: {item['data_iso']}): '{item['titulo'][:80]}'")
+        
+        if reaproveitados:
+            registrar(f"{reaproveitados} artigos reaproveitados de jobs anteriores sem nova visita")
+        itens = ordenar_itens(itens)
+        tempo = int(time.time() - inicio)
+        status = "completo" if len(itens) >= max_itens else ("parcial" if itens else "vazio")
+        clipping_json = {
+            "metadata": {
+                "cliente": cliente,
+                "periodo": periodo,
+                "sites_visitados": [urlparse(site).netloc for site in sites],
+                "total_artigos_encontrados": len(vistos),
+                "total_artigos_validos": len(itens),
+                "total_artigos_reaproveitados": reaproveitados,
+                "tempo_utilizado_segundos": tempo,
+                "coletado_em": datetime.now().isoformat(),
+                "status": status,
+                "mensagem": f"Coleta HTTP: {len(itens)} itens relevantes, {len(pendentes)} páginas delegadas ao browser",
+                "engine": "http",
+            },
+            "itens": itens,
+            "email_body_ptbr": montar_email_body(cliente, periodo, itens),
+            "log_execucao": log_execucao,
+        }
+        conteudo = json.dumps(clipping_json, ensure_ascii=False, indent=2)
+        
+        contexto["conteudo_extraido"] = conteudo
+        contexto["clipping_json"] = clipping_json
+        contexto["email_body_ptbr"] = clipping_json["email_body_ptbr"]
+        contexto["itens_coletados"] = itens
+        
+        self.registrar_log("sucesso", f"Coleta HTTP finalizada em {tempo}s: {len(itens)} itens, {len(pendentes)} pendentes")
+        return {
+            "url": contexto.get("url"),
+            "conteudo": conteudo,
+            "clipping_json": clipping_json,
+            "email_body_ptbr": clipping_json["email_body_ptbr"],
+            "itens": itens,
+            "urls_pendentes": pendentes,
+            "suficiente": len(itens) >= max_itens,
+            "status": "sucesso",
+            "tamanho": len(conteudo),
+        }
+    
+    def _sites_do_job(self, url_job: Optional[str]) -> List[str]:
+        """Site do job primeiro (prioridade máxima), seguido dos demais sites permitidos."""
+        sites = [url_job] if url_job else []
+        hosts = {urlparse(url_job).netloc.lower().removeprefix("www.")} if url_job else set()
+        for site in self.sites:
+            host = urlparse(site).netloc.lower().removeprefix("www.")
+            if host not in hosts:
+                hosts.add(host)
+                sites.append(site)
+        return sites
+    
+    def _descobrir_por_listagens(self, sites: List[str], registrar) -> List[Dict[str, str]]:
+        """Lê as páginas de listagem de cada site e acumula links de artigos."""
+        candidatos: List[Dict[str, str]] = []
+        vistos = set()
+        for site in sites:
+            encontrados_site = 0
+            base = site if site.endswith("/") else f"{site}/"
+            for secao in SECOES_LISTAGEM:
+                listagem = urljoin(base, secao)
+                resposta = self._obter(listagem)
+                if resposta is None:
+                    continue
+                for link in extrair_links_artigos(resposta.text, str(resposta.url)):
+                    chave = chave_url(link["url"])
+                    if chave not in vistos:
+                        vistos.add(chave)
+                        candidatos.append(link)
+                        encontrados_site += 1
+                if encontrados_site >= self.max_paginas:
+                    break
+            registrar(f"{encontrados_site} links de artigos encontrados em {urlparse(site).netloc}")
+        return candidatos
+    
+    def _obter(self, url: str) -> Optional[httpx.Response]:
+        """
+        GET com delay por host e fallback de 403 (www/sem www, HTTPS/HTTP).
+        
+        Args:
+            url: URL a buscar
+        
+        Returns:
+            Resposta HTML bem-sucedida ou None
+        """
+        return self._buscar(url)[0]
+    
+    def _buscar(self, url: str) -> Tuple[Optional[httpx.Response], bool]:
+        """
+        Como _obter, indicando também se a falha justifica tentar no browser.
+        
+        Args:
+            url: URL a buscar
+        
+        Returns:
+            (resposta HTML ou None, True se a URL deve ser delegada ao BrowserAgent)
+        """
+        for variante in self._variantes_url(url):
+            self._aguardar_vez(urlparse(variante).netloc)
+            try:
+                resposta = self.client.get(variante)
+            except httpx.HTTPError as e:
+                self.registrar_log("aviso", f"⚠️ Falha HTTP em {variante}: {e}")
+                continue
+            if resposta.status_code == 403:
+                continue
+            if resposta.status_code != 200:
+                transitorio = resposta.status_code in STATUS_DELEGAVEIS or resposta.status_code >= 500
+                if not transitorio:
+                    self.registrar_log("aviso", f"⚠️ HTTP {resposta.status_code} em {url}; descartando")
+                return None, transitorio
+            if "html" not in resposta.headers.get("content-type", "html"):
+                return None, False
+            return resposta, False
+        # Só sai do laço com 403 ou erro de rede em todas as variantes
+        self.registrar_log("aviso", f"⚠️ Falha persistente (403/rede) em {url}")
+        return None, True
+    
+    @staticmethod
+    def _variantes_url(url: str) -> List[str]:
+        """Variações tentadas em 403, na ordem do prompt."""
+        partes = urlparse(url)
+        host = partes.netloc
+        host_alternativo = host[4:] if host.startswith("www.") else f"www.{host}"
+        esquema_alternativo = "http" if partes.scheme == "https" else "https"
+        variantes = [
+            url,
+            urlunparse(partes._replace(netloc=host_alternativo)),
+            urlunparse(partes._replace(scheme=esquema_alternativo, netloc=host_alternativo)),
+        ]
+        return list(dict.fromkeys(variantes))
+    
+    def _aguardar_vez(self, host: str) -> None:
+        """Respeita um intervalo mínimo entre requisições ao mesmo host."""
+        with self._lock_hosts:
+            agora = time.monotonic()
+            proxima = max(agora, self._ultima_requisicao.get(host, 0.0) + self.delay_seconds)
+            self._ultima_requisicao[host] = proxima
+        if proxima > agora:
+            time.sleep(proxima - agora)
+    
+    @staticmethod
+    def _montar_item(artigo: Dict[str, Any], relevancia: Dict[str, Any]) -> Dict[str, Any]:
+        """Monta o item no schema do prompt."""
+        return {
+            "site": urlparse(artigo["url"]).netloc.lower().removeprefix("www."),
+            "url": artigo["url"],
+            "titulo": artigo["titulo"],
+            "data_iso": artigo["data_iso"],
+            "secao": artigo["secao"],
+            "autor": artigo["autor"],
+            "resumo_2l": resumir(artigo["texto"]),
+            "termos_encontrados": relevancia["termos_encontrados"],
+            "menciona_lear": relevancia["menciona_lear"],
+            "score": relevancia["score"],
+            "coletado_em_iso": datetime.now().isoformat(),
+            "texto": HttpAgent._corpo(artigo["texto"]),
+        }
+    
+    @staticmethod
+    def _corpo(texto: str) -> str:
+        """Corpo truncado em 1500 palavras (limite do prompt)."""
+        return " ".join(texto.split()[:1500])
@@ -17,6 +17,8 @@ from pathlib import Path
 from typing import Dict, Any, Optional
 
 from .base_agent import BaseAgent
+from ..utils.json_extractor import extrair_json
+from ..utils.mcp_pool import PoolSessoesMCP
 
 logger = logging.getLogger(__name__)
 
@@ -44,10 +46,32 @@ class SkyvernAgent(BaseAgent):
             raise ValueError("Chave da OpenAI não configurada para o Skyvern Agent.")
         
         self.registrar_log("info", f"✅ SkyvernAgent inicializado (transport={self.skyvern_transport})")
+        
+        # Pool de sessões MCP abertas reaproveitadas entre jobs (sem spawn/handshake por job)
+        self.mcp_pool: Optional[PoolSessoesMCP] = None
+        if configuracao.get("mcp_pool_enabled", True):
+            self.mcp_pool = PoolSessoesMCP(
+                fabrica_ferramentas=self._criar_mcp_tools,
+                tamanho=configuracao.get("mcp_pool_size", 1),
+                jobs_por_sessao=configuracao.get("mcp_pool_jobs_por_sessao", 4),
+                max_usos=configuracao.get("mcp_pool_max_usos", 50),
+                loop=configuracao.get("event_loop")
+            )
+            self.mcp_pool.aquecer()
+            self.registrar_log(
+                "info",
+                f"♻️ Pool MCP ativado ({self.mcp_pool.tamanho} sessões, "
+                f"{self.mcp_pool.jobs_por_sessao} jobs por sessão)"
+            )
+    
+    def fechar(self) -> None:
+        """Encerra as sessões MCP mantidas pelo pool."""
+        if self.mcp_pool:
+            self.mcp_pool.fechar()
     
     def executar(self, contexto: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Executa o clipping usando Skyvern MCP + Agno.
+        Executa o clipping usando Skyvern MCP + Agno (bloqueante; no loop do pool, quando ativo).
         
         Args:
             contexto: Contexto com parâmetros de execução
@@ -55,6 +79,25 @@ class SkyvernAgent(BaseAgent):
         Returns:
             Dicionário com resultado estruturado
         """
+        if self.mcp_pool:
+            return self.mcp_pool.executar(self._executar_async(contexto))
+        return asyncio.run(self._executar_async(contexto))
+    
+    async def executar_async(self, contexto: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Executa o clipping como corrotina (as sessões do pool só podem ser usadas no loop do pool).
+        
+        Args:
+            contexto: Contexto com parâmetros de execução
+            
+        Returns:
+            Dicionário com resultado estruturado
+        """
+        if self.mcp_pool:
+            return await self.mcp_pool.aguardar(self._executar_async(contexto))
+        return await self._executar_async(contexto)
+    
+    async def _executar_async(self, contexto: Dict[str, Any]) -> Dict[str, Any]:
         try:
             self.registrar_log("info", "🚀 Iniciando clipping automotivo com Skyvern MCP")
             
@@ -66,12 +109,12 @@ class SkyvernAgent(BaseAgent):
             self.registrar_log("info", f"📝 Prompt carregado e parametrizado para {config.get('cliente', 'LEAR')}")
             
             # Executar com Skyvern via Agno
-            resultado = asyncio.run(self._executar_com_skyvern(prompt_parametrizado, config))
+            resultado = await self._executar_com_skyvern(prompt_parametrizado, config)
             
             # Salvar resultado
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             resultado_path = os.path.join(self.results_dir, f"clipping_resultado_{timestamp}.json")
-            self._salvar_resultado(resultado, resultado_path)
+            await asyncio.to_thread(self._salvar_resultado, resultado, resultado_path)
             
             self.registrar_log("info", f"✅ Clipping concluído. Resultado salvo em: {resultado_path}")
             
@@ -136,66 +179,75 @@ class SkyvernAgent(BaseAgent):
         self.registrar_log("info", "✅ Prompt parametrizado com sucesso")
         return prompt
     
+    def _criar_mcp_tools(self) -> Any:
+        """Cria o MCPTools do Skyvern (ainda não conectado) conforme o transporte configurado."""
+        # Importar Agno (pode não estar instalado)
+        try:
+            from agno.tools.mcp import MCPTools
+        except ImportError as e:
+            self.registrar_log("erro", f"❌ Agno não instalado. Execute: pip install agno")
+            raise ImportError("Agno framework não está instalado. Instale com: pip install agno") from e
+        
+        self.registrar_log("info", f"🔌 Inicializando Skyvern MCP (transport={self.skyvern_transport})...")
+        
+        if self.skyvern_transport == "http":
+            # Modo HTTP: conectar ao servidor Skyvern local
+            mcp_tools = MCPTools(
+                transport="http",
+                url=self.skyvern_base_url
+            )
+            self.registrar_log("info", f"✅ Skyvern MCP configurado (HTTP: {self.skyvern_base_url})")
+        else:
+            # Modo stdio: executar skyvern run mcp diretamente
+            mcp_tools = MCPTools(
+                transport="stdio",
+                command="python -m skyvern run mcp"
+            )
+            self.registrar_log("info", "✅ Skyvern MCP configurado (stdio)")
+        return mcp_tools
+    
     async def _executar_com_skyvern(self, prompt: str, config: Dict[str, Any]) -> Dict[str, Any]:
-        """Executa o clipping usando Skyvern MCP via Agno."""
+        """Executa o clipping usando Skyvern MCP via Agno (sessão emprestada do pool, quando ativo)."""
         try:
             # Importar Agno (pode não estar instalado)
             try:
                 from agno.agent import Agent
                 from agno.models.openai import OpenAIChat
-                from agno.tools.mcp import MCPTools
             except ImportError as e:
                 self.registrar_log("erro", f"❌ Agno não instalado. Execute: pip install agno")
                 raise ImportError("Agno framework não está instalado. Instale com: pip install agno") from e
             
-            self.registrar_log("info", f"🔌 Inicializando Skyvern MCP (transport={self.skyvern_transport})...")
-            
-            # Configurar MCPTools para Skyvern
-            if self.skyvern_transport == "http":
-                # Modo HTTP: conectar ao servidor Skyvern local
-                mcp_tools = MCPTools(
-                    transport="http",
-                    url=self.skyvern_base_url
-                )
-                self.registrar_log("info", f"✅ Skyvern MCP configurado (HTTP: {self.skyvern_base_url})")
-            else:
-                # Modo stdio: executar skyvern run mcp diretamente
-                mcp_tools = MCPTools(
-                    transport="stdio",
-                    command="python -m skyvern run mcp"
+            def criar_agente(mcp_tools: Any) -> Any:
+                # Agent por job (barato, sem I/O): o estado da execução não é compartilhado entre jobs
+                agent = Agent(
+                    model=OpenAIChat(id=self.skyvern_model, api_key=self.openai_api_key),
+                    tools=[mcp_tools],
+                    markdown=True,
+                    add_datetime_to_context=True
                 )
-                self.registrar_log("info", "✅ Skyvern MCP configurado (stdio)")
-            
-            # Criar agent Agno
-            agent = Agent(
-                model=OpenAIChat(id=self.skyvern_model, api_key=self.openai_api_key),
-                tools=[mcp_tools],
-                markdown=True,
-                add_datetime_to_context=True
-            )
-            
-            self.registrar_log("info", "👨‍💻 Agent Agno criado com sucesso")
-            self.registrar_log("info", "🌐 Iniciando navegação e coleta de artigos...")
+                self.registrar_log("info", "👨‍💻 Agent Agno criado com sucesso")
+                self.registrar_log("info", "🌐 Iniciando navegação e coleta de artigos...")
+                return agent
             
             # Executar com Skyvern
             resultado_texto = ""
             try:
-                # MCPTools deve ser usado como context manager
-                async with mcp_tools:
-                    # Executar agent de forma assíncrona
-                    # Nota: Agno pode usar diferentes métodos dependendo da versão
-                    if hasattr(agent, 'aprint_response'):
-                        resultado = await agent.aprint_response(
-                            input=prompt,
-                            stream=True
-                        )
-                    elif hasattr(agent, 'run'):
-                        resultado = await agent.run(prompt)
-                    else:
-                        # Fallback: usar run síncrono
-                        resultado = agent.run(prompt)
-                    
-                    resultado_texto = str(resultado) if resultado else ""
+                if self.mcp_pool:
+                    sessao = await self.mcp_pool.adquirir()
+                    self.registrar_log("info", f"♻️ Sessão MCP reaproveitada do pool (uso #{sessao.usos})")
+                    descartar = False
+                    try:
+                        resultado_texto = await self._rodar_agente(criar_agente(sessao.ferramentas), prompt)
+                    except BaseException:
+                        descartar = True  # A sessão pode ter ficado num estado inconsistente
+                        raise
+                    finally:
+                        await self.mcp_pool.devolver(sessao, descartar)
+                else:
+                    # MCPTools deve ser usado como context manager
+                    mcp_tools = self._criar_mcp_tools()
+                    async with mcp_tools:
+                        resultado_texto = await self._rodar_agente(criar_agente(mcp_tools), prompt)
             except Exception as e:
                 self.registrar_log("erro", f"❌ Erro ao executar agent: {e}")
                 raise
@@ -213,46 +265,50 @@ class SkyvernAgent(BaseAgent):
             self.registrar_log("erro", f"❌ Erro ao executar com Skyvern: {e}")
             raise
     
+    @staticmethod
+    async def _rodar_agente(agent: Any, prompt: str) -> str:
+        """Executa o agent Agno e devolve a resposta como texto."""
+        # Nota: Agno pode usar diferentes métodos dependendo da versão
+        if hasattr(agent, 'aprint_response'):
+            resultado = await agent.aprint_response(
+                input=prompt,
+                stream=True
+            )
+        elif hasattr(agent, 'run'):
+            resultado = await agent.run(prompt)
+        else:
+            # Fallback: usar run síncrono
+            resultado = agent.run(prompt)
+        return str(resultado) if resultado else ""
+    
     def _extrair_json_do_resultado(self, resultado_texto: str) -> Dict[str, Any]:
         """Extrai JSON estruturado do resultado do agent."""
         try:
-            # Tentar encontrar JSON no resultado
-            import re
-            
-            # Procurar por blocos JSON
-            json_pattern = r'\{[^{}]*"metadata"[^{}]*\{[^{}]*\}.*?"itens"[^{}]*\[.*?\]'
-            json_match = re.search(json_pattern, resultado_texto, re.DOTALL)
-            
-            if json_match:
-                json_str = json_match.group(0)
-                resultado = json.loads(json_str)
+            # Varredura única do texto: escolhe o objeto JSON com o schema do clipping
+            resultado = extrair_json(resultado_texto, chaves_obrigatorias=("itens",))
+            if resultado is not None:
                 self.registrar_log("info", f"✅ JSON extraído: {len(resultado.get('itens', []))} itens")
                 return resultado
-            else:
-                # Tentar parsear o resultado inteiro como JSON
-                try:
-                    resultado = json.loads(resultado_texto.strip())
-                    return resultado
-                except:
-                    # Se não for JSON válido, criar estrutura básica
-                    self.registrar_log("aviso", "⚠️ Não foi possível extrair JSON. Criando estrutura básica.")
-                    return {
-                        "metadata": {
-                            "cliente": "LEAR",
-                            "periodo": "últimos 30 dias",
-                            "sites_visitados": [],
-                            "total_artigos_encontrados": 0,
-                            "total_artigos_validos": 0,
-                            "tempo_utilizado_segundos": 0,
-                            "coletado_em": datetime.now().isoformat(),
-                            "status": "parcial",
-                            "mensagem": "Resultado não pôde ser parseado como JSON"
-                        },
-                        "itens": [],
-                        "email_body_ptbr": "Nenhum resultado coletado.",
-                        "log_execucao": [f"Erro ao parsear resultado: {resultado_texto[:200]}"]
-                    }
-                    
+            
+            # Se não for JSON válido, criar estrutura básica
+            self.registrar_log("aviso", "⚠️ Não foi possível extrair JSON. Criando estrutura básica.")
+            return {
+                "metadata": {
+                    "cliente": "LEAR",
+                    "periodo": "últimos 30 dias",
+                    "sites_visitados": [],
+                    "total_artigos_encontrados": 0,
+                    "total_artigos_validos": 0,
+                    "tempo_utilizado_segundos": 0,
+                    "coletado_em": datetime.now().isoformat(),
+                    "status": "parcial",
+                    "mensagem": "Resultado não pôde ser parseado como JSON"
+                },
+                "itens": [],
+                "email_body_ptbr": "Nenhum resultado coletado.",
+                "log_execucao": [f"Erro ao parsear resultado: {resultado_texto[:200]}"]
+            }
+            
         except Exception as e:
             self.registrar_log("erro", f"❌ Erro ao extrair JSON: {e}")
             raise
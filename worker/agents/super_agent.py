@@ -4,30 +4,67 @@ Super Agent - Agente Orquestrador Principal.
 Coordena a execução dos outros agentes e gerencia o fluxo completo de clipping.
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+import asyncio
+import copy
+import json
 import logging
+import time
+from datetime import datetime, timedelta
 from .base_agent import BaseAgent
+from ..utils.artigos import hash_conteudo, normalizar_url
+from ..utils.quase_duplicatas import LIMIAR_PADRAO, agrupar, assinatura_minhash, mesclar_grupo, texto_do_item
+from ..utils.scoring import dias_do_periodo, montar_email_body, ordenar_itens
 
 logger = logging.getLogger(__name__)
 
+# Artigos de jobs anteriores carregados por job (os mais recentes do período)
+LIMITE_ARTIGOS_CONHECIDOS = 500
+
 
 class SuperAgent(BaseAgent):
     """Agente orquestrador que coordena todos os outros agentes."""
     
-    def __init__(self, configuracao: Dict[str, Any], agentes: Dict[str, BaseAgent]):
+    def __init__(
+        self,
+        configuracao: Dict[str, Any],
+        agentes: Dict[str, BaseAgent],
+        checkpoints: Optional[Any] = None,
+        artigos: Optional[Any] = None
+    ):
         """
         Inicializa o Super Agent.
         
         Args:
             configuracao: Configurações do agente
             agentes: Dicionário com os outros agentes disponíveis
+            checkpoints: Armazenamento de checkpoints por etapa (ex.: DatabaseManager)
+            artigos: Repositório de artigos já clipados entre jobs (ex.: DatabaseManager)
         """
         super().__init__("SuperAgent", configuracao)
         self.agentes = agentes
+        self.checkpoints = checkpoints
+        self.artigos = artigos
     
     def executar(self, contexto: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Executa o fluxo completo de clipping.
+        Executa o fluxo completo de clipping (bloqueante, num event loop próprio).
+        
+        Args:
+            contexto: Contexto com instrução e parâmetros do job
+            
+        Returns:
+            Resultado completo do processamento
+        """
+        return asyncio.run(self.executar_async(contexto))
+    
+    async def executar_async(self, contexto: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Executa o fluxo completo de clipping como corrotina.
+        
+        Cada etapa é aguardada via executar_async do agente; acesso ao banco
+        e o processamento dos itens (MinHash) rodam em threads, para que
+        vários jobs compartilhem o mesmo event loop no modo assíncrono.
         
         Args:
             contexto: Contexto com instrução e parâmetros do job
@@ -44,34 +81,76 @@ class SuperAgent(BaseAgent):
             "resultados": {}
         }
         
+        concluidas = await asyncio.to_thread(self._carregar_checkpoints, contexto.get("job_id"))
+        
         try:
-            # Etapa 1: Browser Agent - Navegação e extração
-            if "browser" in self.agentes:
-                self.registrar_log("etapa", "Executando Browser Agent")
-                browser_result = self.agentes["browser"].executar(contexto)
-                resultado["etapas"].append("browser")
-                resultado["resultados"]["browser"] = browser_result
+            # Etapa 0: Discovery Agent - Candidatos via sitemaps e feeds RSS/Atom
+            if "discovery" in self.agentes:
+                try:
+                    await self._executar_etapa("discovery", contexto, resultado, concluidas)
+                except Exception as e:
+                    self.registrar_log("aviso", f"Descoberta via sitemap/RSS falhou, seguindo sem candidatos: {e}")
+            
+            # Artigos do período já clipados em jobs anteriores (reaproveitados sem nova visita)
+            assinaturas = await asyncio.to_thread(self._carregar_artigos_conhecidos, contexto)
+            conhecidos = contexto.get("artigos_conhecidos") or {}
+            
+            # Etapa 1a: HTTP Agent - Caminho rápido para páginas estáticas
+            http_result = None
+            if "http" in self.agentes:
+                try:
+                    http_result = await self._executar_etapa("http", contexto, resultado, concluidas)
+                except Exception as e:
+                    self.registrar_log("aviso", f"Caminho HTTP falhou, seguindo com o browser: {e}")
+            
+            # Etapa 1b: Browser Agent - Navegação e extração (só quando o HTTP não bastou)
+            coleta_result = http_result
+            if "browser" in self.agentes and not (http_result and http_result.get("suficiente")):
+                if http_result:
+                    contexto["urls_ja_coletadas"] = [item.get("url") for item in http_result.get("itens", [])]
+                    contexto["urls_pendentes"] = http_result.get("urls_pendentes", [])
+                # Só artigos conhecidos reencontrados nesta execução (candidatos da descoberta)
+                reencontrados = self._conhecidos_reencontrados(contexto, conhecidos, http_result)
+                if reencontrados:
+                    contexto["urls_ja_coletadas"] = list(dict.fromkeys(
+                        (contexto.get("urls_ja_coletadas") or []) + [item["url"] for item in reencontrados]
+                    ))
+                try:
+                    coleta_result = await self._executar_etapa("browser", contexto, resultado, concluidas)
+                except Exception as e:
+                    if not (http_result and http_result.get("itens")):
+                        raise
+                    self.registrar_log("aviso", f"Browser Agent falhou; usando itens do caminho HTTP: {e}")
+                    coleta_result = http_result
+                else:
+                    if http_result and http_result.get("itens"):
+                        self._mesclar_itens_http(http_result, coleta_result, contexto)
+                    if reencontrados:
+                        self._mesclar_itens_http(
+                            {"itens": reencontrados}, coleta_result, contexto, origem="de jobs anteriores"
+                        )
+            elif http_result:
+                self.registrar_log("etapa", "Caminho HTTP coletou itens suficientes; Browser Agent não executado")
+            
+            if coleta_result is not None:
+                # Artigos gravados um a um (por URL); o agrupamento só afeta a apresentação
+                await asyncio.to_thread(self._processar_itens_coletados, contexto, coleta_result, assinaturas)
                 
-                # Atualizar contexto com resultado do browser
-                contexto["conteudo_extraido"] = browser_result.get("conteudo")
-                contexto["url"] = browser_result.get("url")
+                # Atualizar contexto com resultado da coleta
+                contexto["conteudo_extraido"] = coleta_result.get("conteudo")
+                contexto["url"] = coleta_result.get("url") or contexto.get("url")
+                resultado["resultados"]["browser"] = coleta_result
             
             # Etapa 2: File Agent - Processamento de arquivos
             if "file" in self.agentes and contexto.get("conteudo_extraido"):
-                self.registrar_log("etapa", "Executando File Agent")
-                file_result = self.agentes["file"].executar(contexto)
-                resultado["etapas"].append("file")
-                resultado["resultados"]["file"] = file_result
+                file_result = await self._executar_etapa("file", contexto, resultado, concluidas)
                 contexto["artefatos"] = file_result.get("formats", {})
                 if contexto.get("conteudo_extraido"):
                     contexto["resumo_conteudo"] = contexto["conteudo_extraido"][:600]
             
             # Etapa 3: Notification Agent - Enviar notificações
             if "notification" in self.agentes:
-                self.registrar_log("etapa", "Executando Notification Agent")
-                notification_result = self.agentes["notification"].executar(contexto)
-                resultado["etapas"].append("notification")
-                resultado["resultados"]["notification"] = notification_result
+                await self._executar_etapa("notification", contexto, resultado, concluidas)
             
             resultado["status"] = "concluido"
             self.registrar_log("sucesso", f"Job {contexto.get('job_id')} processado com sucesso")
@@ -83,4 +162,331 @@ class SuperAgent(BaseAgent):
             raise
         
         return resultado
-
+    
+    def _carregar_checkpoints(self, job_id: Optional[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Carrega as etapas já concluídas numa entrega anterior do job.
+        
+        Args:
+            job_id: ID do job
+            
+        Returns:
+            Dicionário etapa -> checkpoint (vazio se não houver)
+        """
+        if not self.checkpoints or not job_id:
+            return {}
+        try:
+            concluidas = self.checkpoints.carregar_checkpoints(job_id)
+        except Exception as e:
+            self.registrar_log("aviso", f"Erro ao carregar checkpoints do job {job_id}: {e}")
+            return {}
+        if concluidas:
+            self.registrar_log("retomada", f"Job {job_id} retomado; etapas já concluídas: {', '.join(concluidas)}")
+        return concluidas
+    
+    def _processar_itens_coletados(
+        self,
+        contexto: Dict[str, Any],
+        coleta_result: Dict[str, Any],
+        assinaturas: Dict[str, bytes]
+    ) -> None:
+        """Assina os itens (MinHash), grava no repositório de artigos e agrupa quase-duplicatas."""
+        self._assinar_itens(coleta_result.get("itens") or [], assinaturas)
+        self._salvar_artigos(contexto, coleta_result, assinaturas)
+        if self.config.get("quase_duplicatas", True):
+            self._agrupar_quase_duplicatas(coleta_result, contexto, assinaturas)
+    
+    async def _executar_etapa(
+        self,
+        etapa: str,
+        contexto: Dict[str, Any],
+        resultado: Dict[str, Any],
+        concluidas: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Executa uma etapa ou a restaura a partir do checkpoint.
+        
+        A saída da etapa e as chaves do contexto que ela alterou são
+        persistidas, para que uma nova entrega do job pule direto para a
+        etapa que falhou.
+        
+        Args:
+            etapa: Nome da etapa (chave em self.agentes)
+            contexto: Contexto compartilhado do job
+            resultado: Resultado consolidado do Super Agent
+            concluidas: Checkpoints carregados para o job
+            
+        Returns:
+            Resultado da etapa
+        """
+        checkpoint = concluidas.get(etapa)
+        if checkpoint is not None:
+            self.registrar_log("etapa", f"Etapa '{etapa}' restaurada do checkpoint")
+            contexto.update(checkpoint.get("contexto", {}))
+            etapa_result = checkpoint.get("resultado", {})
+        else:
+            self.registrar_log("etapa", f"Executando {self.agentes[etapa].nome}")
+            # Cópia profunda: agentes também alteram listas/dicts do contexto no lugar
+            antes = copy.deepcopy(contexto)
+            inicio = time.perf_counter()
+            etapa_result = await self.agentes[etapa].executar_async(contexto)
+            duracao_ms = round((time.perf_counter() - inicio) * 1000, 1)
+            self.registrar_log(
+                "etapa_concluida",
+                f"{self.agentes[etapa].nome} concluído em {duracao_ms:.0f}ms",
+                metadata={"etapa": etapa, "agente": self.agentes[etapa].nome, "duracao_ms": duracao_ms}
+            )
+            alteracoes = {
+                chave: valor for chave, valor in contexto.items()
+                if chave not in antes or antes[chave] != valor
+            }
+            await asyncio.to_thread(self._salvar_checkpoint, contexto.get("job_id"), etapa, etapa_result, alteracoes)
+        
+        resultado["etapas"].append(etapa)
+        resultado["resultados"][etapa] = etapa_result
+        return etapa_result
+    
+    def _salvar_checkpoint(
+        self,
+        job_id: Optional[str],
+        etapa: str,
+        etapa_result: Dict[str, Any],
+        alteracoes: Dict[str, Any]
+    ) -> None:
+        """
+        Persiste o checkpoint de uma etapa sem interromper o job em caso de falha.
+        
+        Args:
+            job_id: ID do job
+            etapa: Nome da etapa
+            etapa_result: Resultado retornado pelo agente
+            alteracoes: Chaves do contexto criadas/alteradas pela etapa
+        """
+        if not self.checkpoints or not job_id:
+            return
+        try:
+            dados = json.loads(json.dumps(
+                {"resultado": etapa_result, "contexto": alteracoes},
+                ensure_ascii=False,
+                default=str
+            ))
+            self.checkpoints.salvar_checkpoint(job_id, etapa, dados)
+        except Exception as e:
+            self.registrar_log("aviso", f"Erro ao salvar checkpoint da etapa '{etapa}': {e}")
+    
+    def _mesclar_itens_http(
+        self,
+        http_result: Dict[str, Any],
+        browser_result: Dict[str, Any],
+        contexto: Dict[str, Any],
+        origem: str = "do caminho HTTP"
+    ) -> None:
+        """
+        Junta ao resultado do browser os itens já coletados pelo caminho HTTP.
+        
+        A lista final é limitada a ``max_itens`` do job (os de maior score ficam).
+        
+        Args:
+            http_result: Resultado do HTTP Agent (ou dicionário com os itens a mesclar)
+            browser_result: Resultado do Browser Agent (alterado in-place)
+            contexto: Contexto do job (alterado in-place)
+            origem: Origem dos itens, para o log
+        """
+        itens_browser = browser_result.get("itens") or []
+        urls_browser = {normalizar_url(item.get("url")) for item in itens_browser}
+        novos = [item for item in http_result.get("itens", []) if normalizar_url(item.get("url")) not in urls_browser]
+        if not novos:
+            return
+        
+        max_itens = int(contexto.get("parametros", {}).get("max_itens", 15))
+        itens = ordenar_itens(itens_browser + novos)
+        self._substituir_itens(browser_result, contexto, itens[:max_itens], http_result.get("clipping_json"))
+        self.registrar_log(
+            "etapa",
+            f"{len(novos)} itens {origem} mesclados ao resultado do browser"
+            + (f" ({len(itens) - max_itens} acima de max_itens descartados)" if len(itens) > max_itens else "")
+        )
+    
+    @staticmethod
+    def _conhecidos_reencontrados(
+        contexto: Dict[str, Any],
+        conhecidos: Dict[str, Dict[str, Any]],
+        http_result: Optional[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Artigos de jobs anteriores cujas URLs apareceram de novo nesta execução.
+        
+        O histórico do período inteiro não entra no resultado: só os
+        candidatos da descoberta que já estavam no repositório (e que o
+        caminho HTTP ainda não incluiu) são reaproveitados sem nova visita.
+        
+        Args:
+            contexto: Contexto do job (candidatos da descoberta)
+            conhecidos: url normalizada -> item de jobs anteriores
+            http_result: Resultado do HTTP Agent (itens já incluídos)
+        
+        Returns:
+            Itens conhecidos a reaproveitar
+        """
+        if not conhecidos:
+            return []
+        ja_incluidos = {normalizar_url(item.get("url")) for item in (http_result or {}).get("itens", [])}
+        reencontrados = []
+        for candidato in contexto.get("candidatos") or []:
+            chave = normalizar_url(candidato.get("url") if isinstance(candidato, dict) else candidato)
+            if chave and chave in conhecidos and chave not in ja_incluidos:
+                ja_incluidos.add(chave)
+                reencontrados.append(conhecidos[chave])
+        return reencontrados
+    
+    def _substituir_itens(
+        self,
+        coleta_result: Dict[str, Any],
+        contexto: Dict[str, Any],
+        itens: List[Dict[str, Any]],
+        clipping_base: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Troca os itens do resultado da coleta, refazendo clipping_json, email e conteúdo.
+        
+        Args:
+            coleta_result: Resultado da coleta (alterado in-place)
+            contexto: Contexto do job (alterado in-place)
+            itens: Nova lista de itens, já ordenada
+            clipping_base: clipping_json usado quando a coleta não tem um
+        """
+        clipping_json = coleta_result.get("clipping_json") or dict(clipping_base or {})
+        metadata = clipping_json.get("metadata", {})
+        email_body = montar_email_body(metadata.get("cliente", "LEAR"), metadata.get("periodo", ""), itens)
+        clipping_json["itens"] = itens
+        clipping_json["email_body_ptbr"] = email_body
+        
+        conteudo = json.dumps(clipping_json, ensure_ascii=False, indent=2)
+        coleta_result.update({
+            "itens": itens,
+            "clipping_json": clipping_json,
+            "email_body_ptbr": email_body,
+            "conteudo": conteudo,
+        })
+        contexto["itens_coletados"] = itens
+        contexto["clipping_json"] = clipping_json
+        contexto["email_body_ptbr"] = email_body
+    
+    def _carregar_artigos_conhecidos(self, contexto: Dict[str, Any]) -> Dict[str, bytes]:
+        """
+        Coloca no contexto os artigos do período já clipados para o cliente.
+        
+        ``artigos_conhecidos`` (url normalizada -> item) e ``hashes_conhecidos``
+        (hash do conteúdo -> url normalizada) permitem ao HTTP Agent e ao
+        browser pular páginas já resumidas e pontuadas em jobs anteriores.
+        O reaproveitamento por URL não revalida o conteúdo (não há ETag nem
+        Last-Modified guardados, e baixar a página para comparar o hash
+        anularia o ganho): dentro do período uma notícia publicada é tratada
+        como imutável; o hash só identifica o mesmo texto sob outra URL.
+        
+        Args:
+            contexto: Contexto do job (alterado in-place)
+            
+        Returns:
+            Assinaturas MinHash já calculadas (url normalizada -> assinatura)
+        """
+        if not self.artigos or "artigos_conhecidos" in contexto:
+            return {}
+        parametros = contexto.get("parametros", {})
+        desde = datetime.now() - timedelta(days=dias_do_periodo(parametros.get("periodo")))
+        try:
+            linhas = self.artigos.carregar_artigos(parametros.get("cliente", "LEAR"), desde, LIMITE_ARTIGOS_CONHECIDOS)
+        except Exception as e:
+            self.registrar_log("aviso", f"Erro ao carregar artigos de jobs anteriores: {e}")
+            return {}
+        contexto["artigos_conhecidos"] = {linha["url_key"]: linha["item"] for linha in linhas}
+        contexto["hashes_conhecidos"] = {
+            linha["content_hash"]: linha["url_key"] for linha in linhas if linha.get("content_hash")
+        }
+        if linhas:
+            self.registrar_log("etapa", f"{len(linhas)} artigos do período já clipados em jobs anteriores serão reaproveitados")
+        return {linha["url_key"]: bytes(linha["minhash"]) for linha in linhas if linha.get("minhash")}
+    
+    def _salvar_artigos(
+        self,
+        contexto: Dict[str, Any],
+        coleta_result: Dict[str, Any],
+        assinaturas: Dict[str, bytes]
+    ) -> None:
+        """
+        Grava os itens coletados no repositório de artigos sem interromper o job em caso de falha.
+        
+        Args:
+            contexto: Contexto do job
+            coleta_result: Resultado da coleta (HTTP e/ou browser)
+            assinaturas: Assinaturas MinHash por url normalizada
+        """
+        if not self.artigos:
+            return
+        artigos = []
+        for item in coleta_result.get("itens") or []:
+            if isinstance(item, dict) and item.get("url"):
+                url_key = normalizar_url(item["url"])
+                if not url_key:
+                    continue
+                artigos.append({
+                    "url_key": url_key,
+                    "content_hash": hash_conteudo(item),
+                    "item": item,
+                    "minhash": assinaturas.get(url_key),
+                })
+        if not artigos:
+            return
+        try:
+            total = self.artigos.salvar_artigos(contexto.get("parametros", {}).get("cliente", "LEAR"), artigos)
+            self.registrar_log("etapa", f"{total} artigos gravados no repositório compartilhado entre jobs")
+        except Exception as e:
+            self.registrar_log("aviso", f"Erro ao gravar artigos: {e}")
+    
+    @staticmethod
+    def _assinar_itens(itens: List[Dict[str, Any]], assinaturas: Dict[str, bytes]) -> None:
+        """
+        Calcula a assinatura MinHash dos itens que ainda não têm uma.
+        
+        Args:
+            itens: Itens coletados
+            assinaturas: url normalizada -> assinatura (alterado in-place)
+        """
+        for item in itens:
+            if isinstance(item, dict) and item.get("url"):
+                url_key = normalizar_url(item["url"])
+                if url_key and url_key not in assinaturas:
+                    assinatura = assinatura_minhash(texto_do_item(item))
+                    if assinatura:
+                        assinaturas[url_key] = assinatura
+    
+    def _agrupar_quase_duplicatas(
+        self,
+        coleta_result: Dict[str, Any],
+        contexto: Dict[str, Any],
+        assinaturas: Dict[str, bytes]
+    ) -> None:
+        """
+        Junta releases republicados com pequenas edições num único item com várias fontes.
+        
+        Args:
+            coleta_result: Resultado da coleta (alterado in-place)
+            contexto: Contexto do job (alterado in-place)
+            assinaturas: Assinaturas MinHash por url normalizada
+        """
+        itens = [item for item in coleta_result.get("itens") or [] if isinstance(item, dict)]
+        if len(itens) < 2:
+            return
+        grupos = agrupar(
+            [assinaturas.get(normalizar_url(item.get("url"))) for item in itens],
+            limiar=self.config.get("limiar_quase_duplicatas", LIMIAR_PADRAO)
+        )
+        if len(grupos) == len(itens):
+            return
+        
+        agrupados = [itens[grupo[0]] if len(grupo) == 1 else mesclar_grupo(itens[i] for i in grupo) for grupo in grupos]
+        self._substituir_itens(coleta_result, contexto, ordenar_itens(agrupados))
+        self.registrar_log(
+            "etapa",
+            f"{len(itens) - len(agrupados)} quase-duplicatas agrupadas ({len(itens)} -> {len(agrupados)} itens)"
+        )
@@ -6,21 +6,26 @@ e processa jobs de clipping usando os agentes Agno especializados.
 """
 
 import asyncio
+import functools
 import json
 import logging
 import os
 import sys
 import uuid
 import threading
-from typing import Optional, Dict, Any, List
-from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Set
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 
 import pika
 from pydantic_settings import BaseSettings
 
-from worker.agents import SuperAgent, BrowserAgent, SkyvernAgent, FileAgent, NotificationAgent
+from worker.agents import BaseAgent, SuperAgent, BrowserAgent, DiscoveryAgent, HttpAgent, SkyvernAgent, FileAgent, NotificationAgent
 from worker.utils.database import DatabaseManager
 from worker.utils.llm_interpreter import LLMInterpreter
+from worker.utils.log_writer import EscritorLogsExecucao, job_atual
+from worker.utils.metadata_externo import ArmazenamentoMetadata
+from worker.utils.retry import ErroPermanente, GerenciadorRetry
 
 # Configurar logging
 logging.basicConfig(
@@ -34,20 +39,36 @@ class ConfiguracoesWorker(BaseSettings):
     """Configurações do Worker."""
     
     database_url: str
+    db_pool_size: int = 0  # 0 = worker_concurrency + 1
+    db_pool_max_overflow: int = 10
+    db_statement_cache_size: int = 100  # Statements preparados por conexão (0 com PgBouncer em modo transaction)
+    db_pool_timeout: float = 30.0
+    execution_logs_enabled: bool = True  # Eventos dos agentes em agent_execution_logs (gravação em lote)
+    execution_logs_batch_size: int = 200
+    execution_logs_flush_seconds: float = 2.0
+    execution_logs_max_pending: int = 10000
     rabbitmq_url: str
     rabbitmq_host: str = "rabbitmq"
     rabbitmq_port: int = 5672
     log_level: str = "INFO"
     debug: bool = False
     worker_concurrency: int = 3
+    worker_async_mode: bool = False  # Jobs como corrotinas num único event loop (em vez de uma thread por job)
+    worker_async_concurrency: int = 20  # Jobs simultâneos no modo assíncrono
     max_retries: int = 3
     backoff_seconds: int = 30
+    backoff_max_seconds: int = 3600
+    max_unavailable_requeues: int = 10  # Reagendamentos por dependência fora do ar (circuito aberto) sem gastar tentativas
     
     # LLM
     openai_api_key: str
     llm_model: str = "gpt-4o"
     llm_input_cost_per_1k: float = 0.005
     llm_output_cost_per_1k: float = 0.015
+    llm_cache_enabled: bool = True
+    llm_cache_ttl_seconds: int = 7 * 24 * 3600  # Interpretações repetidas (scheduler) sem chamada ao LLM
+    llm_cache_max_itens: int = 256
+    llm_rules_min_confidence: float = 0.7  # Confiança mínima do interpretador por regras para dispensar o LLM
     
     # Browser Automation - Escolha do Engine
     browser_engine: str = "browser-use"  # "browser-use" ou "skyvern"
@@ -56,12 +77,38 @@ class ConfiguracoesWorker(BaseSettings):
     use_local_browser: bool = True  # True = Playwright local, False = Browserless remoto
     browserless_url: str = "http://browserless:3000"
     browserless_token: Optional[str] = None
+    browserless_circuit_failures: int = 3  # Falhas seguidas que abrem o circuito do Browserless
+    browserless_circuit_probe_seconds: float = 15.0  # Intervalo da sonda em background com o circuito aberto
+    browserless_health_ttl_seconds: float = 30.0  # Validade da última checagem de saúde bem-sucedida
+    browserless_probe_timeout_seconds: float = 5.0
     browser_use_model: str = "gpt-5-mini-2025-08-07"
     browser_use_max_steps: int = 30
     browser_use_temperature: float = 0.2
     browser_use_allowed_domains: Optional[str] = None
     browser_use_retries: int = 3
     browser_use_timeout: int = 3600  # 60 minutos máximo (aumentado para máxima estabilidade)
+    browser_pool_enabled: bool = True  # Reaproveitar sessões de browser pré-aquecidas entre jobs
+    browser_pool_max_usos: int = 20  # Jobs por sessão antes de reciclar
+    browser_pool_max_memoria_mb: int = 1500  # Memória do Chrome antes de reciclar
+    browser_block_resources: bool = True  # Bloquear imagens/fontes/mídia e rastreadores nas sessões
+    browser_block_resource_types: str = "Image,Font,Media"  # Tipos de recurso do CDP
+    browser_block_extra_domains: Optional[str] = None  # Domínios extras de anúncios/rastreamento (vírgula)
+    
+    # Descoberta de artigos via sitemap.xml e feeds RSS/Atom
+    discovery_enabled: bool = True
+    discovery_incremental: bool = False  # Só candidatos mais novos que o watermark do domínio
+    discovery_max_candidatos: int = 100
+    
+    # Repositório de artigos entre jobs (reaproveita resumo/score de URLs já clipadas)
+    article_store_enabled: bool = True
+    near_dup_enabled: bool = True  # Agrupar releases republicados (MinHash LSH) num único item
+    near_dup_threshold: float = 0.7  # Similaridade de Jaccard mínima entre quase-duplicatas
+    
+    # Caminho rápido HTTP (páginas estáticas sem browser/LLM)
+    http_fast_path_enabled: bool = True
+    http_fast_path_sites: Optional[str] = None  # URLs separadas por vírgula (padrão: sites do prompt)
+    http_fast_path_delay_seconds: float = 1.0  # Intervalo mínimo entre requisições ao mesmo host
+    http_fast_path_max_paginas: int = 60
     
     # Skyvern MCP (para browser_engine="skyvern")
     skyvern_model: str = "gpt-5-mini-2025-08-07"
@@ -71,6 +118,10 @@ class ConfiguracoesWorker(BaseSettings):
     skyvern_results_dir: str = "/app/results"
     skyvern_transport: str = "http"  # "http" (servidor local) ou "stdio" (execução direta)
     skyvern_base_url: str = "http://localhost:8000"  # URL do servidor Skyvern local
+    skyvern_mcp_pool_enabled: bool = True  # Reaproveitar sessões MCP abertas entre jobs
+    skyvern_mcp_pool_size: int = 1  # Sessões MCP (conexões HTTP ou processos stdio) mantidas abertas
+    skyvern_mcp_jobs_per_session: int = 4  # Jobs simultâneos numa mesma sessão MCP
+    skyvern_mcp_max_usos: int = 50  # Jobs por sessão antes de reciclar
     
     # MinIO
     minio_endpoint: Optional[str] = None
@@ -78,6 +129,7 @@ class ConfiguracoesWorker(BaseSettings):
     minio_secret_key: Optional[str] = None
     minio_bucket: str = "clippings"
     minio_use_ssl: bool = False
+    result_metadata_offload_bytes: int = 262144  # result_metadata maior que isso vai para o MinIO (0 = sempre inline)
     
     # Notificações (opcional)
     slack_webhook_url: Optional[str] = None
@@ -108,21 +160,78 @@ class WorkerAgno:
         self.config = configuracoes
         self.conexao: Optional[pika.BlockingConnection] = None
         self.canal: Optional[pika.channel.Channel] = None
-        self.executor = ThreadPoolExecutor(max_workers=configuracoes.worker_concurrency)
+        self.concorrencia = (
+            configuracoes.worker_async_concurrency if configuracoes.worker_async_mode else configuracoes.worker_concurrency
+        )
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.loop_jobs: Optional[asyncio.AbstractEventLoop] = None
+        self._jobs_em_andamento: Set[Future] = set()
+        if configuracoes.worker_async_mode:
+            # Um único event loop para todos os jobs; o semáforo limita quantos rodam ao mesmo tempo.
+            # Etapas síncronas (HTTP, arquivos, banco) usam o executor padrão do loop.
+            self.loop_jobs = asyncio.new_event_loop()
+            self.loop_jobs.set_default_executor(
+                ThreadPoolExecutor(max_workers=self.concorrencia * 2 + 4, thread_name_prefix="jobs-io")
+            )
+            threading.Thread(target=self.loop_jobs.run_forever, name="jobs-loop", daemon=True).start()
+            self.semaforo_jobs = asyncio.Semaphore(self.concorrencia)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=configuracoes.worker_concurrency)
         self.lock = threading.Lock()
+        self.retry = GerenciadorRetry(
+            fila="clippings.jobs",
+            max_retries=configuracoes.max_retries,
+            backoff_seconds=configuracoes.backoff_seconds,
+            backoff_max_seconds=configuracoes.backoff_max_seconds,
+            max_reagendamentos_indisponivel=configuracoes.max_unavailable_requeues
+        )
         
         # Inicializar componentes
-        self.db = DatabaseManager(configuracoes.database_url)
+        armazenamento_metadata = None
+        if configuracoes.result_metadata_offload_bytes > 0:
+            armazenamento_metadata = ArmazenamentoMetadata(
+                self._config_minio(),
+                limiar_bytes=configuracoes.result_metadata_offload_bytes
+            )
+        self.db = DatabaseManager(
+            configuracoes.database_url,
+            pool_size=configuracoes.db_pool_size or self.concorrencia + 1,
+            max_overflow=configuracoes.db_pool_max_overflow,
+            statement_cache_size=configuracoes.db_statement_cache_size,
+            pool_timeout=configuracoes.db_pool_timeout,
+            armazenamento_metadata=armazenamento_metadata
+        )
+        self.escritor_logs: Optional[EscritorLogsExecucao] = None
+        if configuracoes.execution_logs_enabled:
+            self.escritor_logs = EscritorLogsExecucao(
+                self.db,
+                tamanho_lote=configuracoes.execution_logs_batch_size,
+                intervalo_segundos=configuracoes.execution_logs_flush_seconds,
+                max_pendentes=configuracoes.execution_logs_max_pending
+            )
+            BaseAgent.escritor_logs = self.escritor_logs
         self.llm = LLMInterpreter(
             api_key=configuracoes.openai_api_key,
             model=configuracoes.llm_model,
             input_cost_per_1k=configuracoes.llm_input_cost_per_1k,
-            output_cost_per_1k=configuracoes.llm_output_cost_per_1k
+            output_cost_per_1k=configuracoes.llm_output_cost_per_1k,
+            cache_persistente=self.db,
+            cache_ttl_seconds=configuracoes.llm_cache_ttl_seconds if configuracoes.llm_cache_enabled else 0,
+            cache_max_itens=configuracoes.llm_cache_max_itens,
+            limiar_confianca=configuracoes.llm_rules_min_confidence
         )
         
         # Inicializar agentes
         self.agentes = self._inicializar_agentes()
-        self.super_agent = SuperAgent({}, self.agentes)
+        self.super_agent = SuperAgent(
+            {
+                "quase_duplicatas": configuracoes.near_dup_enabled,
+                "limiar_quase_duplicatas": configuracoes.near_dup_threshold
+            },
+            self.agentes,
+            checkpoints=self.db,
+            artigos=self.db if configuracoes.article_store_enabled else None
+        )
         
     def conectar_rabbitmq(self) -> None:
         """Estabelece conexão com RabbitMQ."""
@@ -131,14 +240,25 @@ class WorkerAgno:
             self.conexao = pika.BlockingConnection(parametros)
             self.canal = self.conexao.channel()
             
-            # Declarar fila
+            # Declarar fila principal, filas de atraso e DLQ
             self.canal.queue_declare(queue="clippings.jobs", durable=True)
+            self.retry.declarar_filas(self.canal)
             
             logger.info("Conectado ao RabbitMQ com sucesso")
         except Exception as e:
             logger.error(f"Erro ao conectar ao RabbitMQ: {e}")
             raise
     
+    def _config_minio(self) -> Dict[str, Any]:
+        """Configuração do MinIO (FileAgent e result_metadata grandes)."""
+        return {
+            "endpoint": self.config.minio_endpoint or "minio:9000",
+            "access_key": self.config.minio_access_key or "minioadmin",
+            "secret_key": self.config.minio_secret_key or "minioadmin",
+            "bucket": self.config.minio_bucket,
+            "use_ssl": self.config.minio_use_ssl
+        }
+    
     def _inicializar_agentes(self) -> Dict[str, Any]:
         """
         Inicializa todos os agentes especializados.
@@ -148,6 +268,31 @@ class WorkerAgno:
         """
         agentes = {}
         
+        allowed_domains = self.config.browser_use_allowed_domains
+        if allowed_domains:
+            allowed_domains = [dom.strip() for dom in allowed_domains.split(",") if dom.strip()]
+        else:
+            allowed_domains = ["automotivebusiness.com.br", "www.automotivebusiness.com.br"]
+        
+        # Discovery Agent - candidatos via sitemaps e feeds antes da coleta
+        if self.config.discovery_enabled:
+            agentes["discovery"] = DiscoveryAgent({
+                "dominios": allowed_domains,
+                "config_path": self.config.skyvern_config_path,
+                "max_candidatos": self.config.discovery_max_candidatos,
+                "incremental": self.config.discovery_incremental
+            }, watermarks=self.db)
+        
+        # HTTP Agent - caminho rápido tentado antes do browser
+        if self.config.http_fast_path_enabled:
+            sites = self.config.http_fast_path_sites
+            agentes["http"] = HttpAgent({
+                "sites": [site.strip() for site in sites.split(",") if site.strip()] if sites else None,
+                "delay_seconds": self.config.http_fast_path_delay_seconds,
+                "max_paginas": self.config.http_fast_path_max_paginas,
+                "max_conexoes": self.concorrencia * 4
+            })
+        
         # Browser Agent - Escolha entre browser-use e skyvern
         if self.config.browser_engine.lower() == "skyvern":
             # Usar Skyvern MCP + Agno
@@ -159,20 +304,25 @@ class WorkerAgno:
                 "config_path": self.config.skyvern_config_path,
                 "results_dir": self.config.skyvern_results_dir,
                 "skyvern_transport": self.config.skyvern_transport,
-                "skyvern_base_url": self.config.skyvern_base_url
+                "skyvern_base_url": self.config.skyvern_base_url,
+                "mcp_pool_enabled": self.config.skyvern_mcp_pool_enabled,
+                "mcp_pool_size": self.config.skyvern_mcp_pool_size,
+                "mcp_pool_jobs_por_sessao": self.config.skyvern_mcp_jobs_per_session,
+                "mcp_pool_max_usos": self.config.skyvern_mcp_max_usos,
+                "event_loop": self.loop_jobs
             })
         else:
             # Usar Browser-Use (padrão)
-            allowed_domains = self.config.browser_use_allowed_domains
-            if allowed_domains:
-                allowed_domains = [dom.strip() for dom in allowed_domains.split(",") if dom.strip()]
-            else:
-                allowed_domains = ["automotivebusiness.com.br", "www.automotivebusiness.com.br"]
-            
             agentes["browser"] = BrowserAgent({
                 "use_local_browser": self.config.use_local_browser,
                 "browserless_url": self.config.browserless_url,
                 "browserless_token": self.config.browserless_token,
+                "disjuntor_browserless": {
+                    "limite_falhas": self.config.browserless_circuit_failures,
+                    "intervalo_sonda": self.config.browserless_circuit_probe_seconds,
+                    "ttl_saude": self.config.browserless_health_ttl_seconds,
+                    "timeout_sonda": self.config.browserless_probe_timeout_seconds
+                },
                 "timeout": 30000,
                 "openai_api_key": self.config.openai_api_key,
                 "browser_use_model": self.config.browser_use_model,
@@ -181,18 +331,25 @@ class WorkerAgno:
                 "browser_use_retries": self.config.browser_use_retries,
                 "browser_use_timeout": self.config.browser_use_timeout,
                 "storage_state_path": "/app/browser_session/storage_state.json",
-                "allowed_domains": allowed_domains
+                "allowed_domains": allowed_domains,
+                "browser_pool_enabled": self.config.browser_pool_enabled,
+                "browser_pool_size": self.concorrencia,
+                "event_loop": self.loop_jobs,
+                "browser_pool_max_usos": self.config.browser_pool_max_usos,
+                "browser_pool_max_memoria_mb": self.config.browser_pool_max_memoria_mb,
+                "bloqueio_recursos": {
+                    "ativo": self.config.browser_block_resources,
+                    "tipos": [tipo.strip() for tipo in self.config.browser_block_resource_types.split(",") if tipo.strip()],
+                    "dominios_extras": [
+                        dominio.strip() for dominio in (self.config.browser_block_extra_domains or "").split(",")
+                        if dominio.strip()
+                    ]
+                }
             })
         
         # File Agent
         agentes["file"] = FileAgent({
-            "minio": {
-                "endpoint": self.config.minio_endpoint or "minio:9000",
-                "access_key": self.config.minio_access_key or "minioadmin",
-                "secret_key": self.config.minio_secret_key or "minioadmin",
-                "bucket": self.config.minio_bucket,
-                "use_ssl": self.config.minio_use_ssl
-            }
+            "minio": self._config_minio()
         })
         
         # Notification Agent
@@ -224,38 +381,123 @@ class WorkerAgno:
         # Executar em thread separada para permitir paralelismo
         self.executor.submit(self._executar_job_em_thread, ch, method, properties, body)
     
+    def _processar_job_no_loop(self, ch, method, properties, body: bytes) -> None:
+        """
+        Callback que agenda o job como corrotina no event loop compartilhado (modo assíncrono).
+        
+        Args:
+            ch: Canal do RabbitMQ
+            method: Método de entrega
+            properties: Propriedades da mensagem
+            body: Corpo da mensagem
+        """
+        futuro = asyncio.run_coroutine_threadsafe(
+            self._executar_job_no_loop(ch, method, properties, body), self.loop_jobs
+        )
+        with self.lock:
+            self._jobs_em_andamento.add(futuro)
+        futuro.add_done_callback(self._job_finalizado)
+    
+    def _job_finalizado(self, futuro: Future) -> None:
+        with self.lock:
+            self._jobs_em_andamento.discard(futuro)
+    
+    async def _executar_job_no_loop(self, ch, method, properties, body: bytes) -> None:
+        """
+        Executa o job no event loop compartilhado, respeitando o limite de concorrência.
+        
+        Args:
+            ch: Canal do RabbitMQ que entregou a mensagem
+            method: Método de entrega
+            properties: Propriedades da mensagem
+            body: Corpo da mensagem
+        """
+        async with self.semaforo_jobs:
+            try:
+                await self.processar_mensagem(ch, method, properties, body)
+            except Exception as e:
+                logger.error(f"Erro inesperado ao executar job no event loop: {e}", exc_info=True)
+    
     def _executar_job_em_thread(self, ch, method, properties, body: bytes) -> None:
         """
         Executa processamento do job em thread separada.
         
+        O ack/nack é devolvido à thread da conexão de consumo via
+        ``add_callback_threadsafe``, pois pika não é thread-safe e o
+        delivery_tag só é válido no canal que entregou a mensagem.
+        
         Args:
-            ch: Canal do RabbitMQ (não usado, mas necessário para compatibilidade)
+            ch: Canal do RabbitMQ que entregou a mensagem
             method: Método de entrega
             properties: Propriedades da mensagem
             body: Corpo da mensagem
         """
-        # Criar nova conexão para esta thread (pika não é thread-safe)
         try:
-            parametros = pika.URLParameters(self.config.rabbitmq_url)
-            thread_conn = pika.BlockingConnection(parametros)
-            thread_ch = thread_conn.channel()
+            asyncio.run(self.processar_mensagem(ch, method, properties, body))
         except Exception as e:
-            logger.error(f"Erro ao criar conexão RabbitMQ na thread: {e}")
-            return
+            logger.error(f"Erro inesperado ao executar job na thread: {e}", exc_info=True)
+    
+    def _agendar_no_canal(self, ch, callback) -> None:
+        """
+        Agenda uma operação no canal a partir de uma thread de job.
         
-        try:
-            self.processar_mensagem(thread_ch, method, properties, body)
-        finally:
-            if thread_conn:
-                try:
-                    thread_conn.close()
-                except:
-                    pass
+        Args:
+            ch: Canal do RabbitMQ que entregou a mensagem
+            callback: Operação a ser executada na thread da conexão
+        """
+        def executar_se_aberto() -> None:
+            if ch.is_open:
+                callback()
+            else:
+                logger.warning("Canal fechado antes do ack/nack; mensagem será reentregue pelo broker")
+        
+        ch.connection.add_callback_threadsafe(executar_se_aberto)
+    
+    def _ack(self, ch, delivery_tag: int) -> None:
+        """Confirma a mensagem no canal de consumo (thread-safe)."""
+        self._agendar_no_canal(ch, functools.partial(ch.basic_ack, delivery_tag=delivery_tag))
+    
+    def _nack(self, ch, delivery_tag: int, requeue: bool = True) -> None:
+        """Rejeita a mensagem no canal de consumo (thread-safe)."""
+        self._agendar_no_canal(
+            ch, functools.partial(ch.basic_nack, delivery_tag=delivery_tag, requeue=requeue)
+        )
     
-    def processar_mensagem(self, ch, method, properties, body: bytes) -> None:
+    def _reagendar(self, ch, delivery_tag: int, properties, body: bytes, erro: Exception, destino: str) -> None:
+        """
+        Republica a mensagem na fila de atraso/DLQ e confirma a original (thread-safe).
+        
+        Se a republicação falhar, a mensagem original é devolvida à fila para
+        não ser perdida.
+        
+        Args:
+            ch: Canal do RabbitMQ que entregou a mensagem
+            delivery_tag: Tag de entrega da mensagem original
+            properties: Propriedades da mensagem original
+            body: Corpo a ser republicado
+            erro: Exceção que causou a falha
+            destino: Fila de destino calculada pelo GerenciadorRetry
+        """
+        def republicar_e_confirmar() -> None:
+            try:
+                self.retry.republicar(ch, properties, body, erro, destino)
+            except Exception as e:
+                logger.error(f"Erro ao republicar mensagem em {destino}: {e}")
+                ch.basic_nack(delivery_tag=delivery_tag, requeue=True)
+                return
+            ch.basic_ack(delivery_tag=delivery_tag)
+        
+        self._agendar_no_canal(ch, republicar_e_confirmar)
+    
+    async def processar_mensagem(self, ch, method, properties, body: bytes) -> None:
         """
         Processa uma mensagem recebida da fila.
         
+        A mesma corrotina serve aos dois modos: numa thread do executor (um
+        event loop por job) ou como tarefa no loop compartilhado do modo
+        assíncrono. Chamadas bloqueantes usam as variantes _async do banco
+        ou asyncio.to_thread.
+        
         Args:
             ch: Canal do RabbitMQ
             method: Método de entrega
@@ -263,26 +505,36 @@ class WorkerAgno:
             body: Corpo da mensagem
         """
         job_id = None
+        token_job = None
         try:
             # Parsear mensagem
-            mensagem = json.loads(body.decode())
+            try:
+                mensagem = json.loads(body.decode())
+            except (UnicodeDecodeError, ValueError) as e:
+                raise ErroPermanente(f"Mensagem inválida (JSON): {e}") from e
+            if not isinstance(mensagem, dict):
+                raise ErroPermanente("Mensagem inválida: esperado um objeto JSON")
             instrucao = mensagem.get("instruction", mensagem.get("text", str(body.decode())))
+            if not isinstance(instrucao, str) or not instrucao.strip():
+                raise ErroPermanente("Instrução vazia ou inválida")
             
             # Gerar ID único para o job
             job_id = mensagem.get("job_id") or f"job_{uuid.uuid4().hex[:12]}"
+            token_job = job_atual.set(job_id)
             
             logger.info(f"Processando job {job_id}: {instrucao[:100]}...")
             
             # Criar job no banco
-            parametros = mensagem.get("parameters", {})
-            if isinstance(parametros, dict):
-                parametros = json.dumps(parametros)
-            job_data = self.db.criar_job(job_id, instrucao, parametros)
-            self.db.atualizar_job(job_id, "processing")
+            job_data = await self.db.criar_job_async(job_id, instrucao, mensagem.get("parameters", {}), status="processing")
             
-            # Interpretar instrução usando LLM
-            logger.info(f"Interpretando instrução com LLM...")
-            interpretacao = self.llm.interpretar_instrucao(instrucao)
+            # Interpretar instrução (mensagem estruturada -> regras -> cache -> LLM)
+            logger.info(f"Interpretando instrução...")
+            interpretacao = await asyncio.to_thread(
+                self.llm.interpretar_instrucao,
+                instrucao,
+                url=mensagem.get("url"),
+                parametros=mensagem.get("parameters")
+            )
             llm_usage = interpretacao.pop("llm_usage", None)
             
             # Preparar contexto para os agentes
@@ -298,55 +550,115 @@ class WorkerAgno:
                 contexto["llm_usage"] = llm_usage
                 contexto["llm_usage_details"] = {"interprete": llm_usage}
                 logger.info(
-                    "LLM usage job=%s prompt_tokens=%s completion_tokens=%s total_cost_usd=%.6f",
+                    "LLM usage job=%s prompt_tokens=%s completion_tokens=%s total_cost_usd=%.6f cache_hit=%s",
                     job_id,
                     llm_usage.get("prompt_tokens"),
                     llm_usage.get("completion_tokens"),
-                    llm_usage.get("total_cost_usd", 0.0)
+                    llm_usage.get("total_cost_usd", 0.0),
+                    llm_usage.get("cache_hit", False)
                 )
+                if self.escritor_logs:
+                    self.escritor_logs.registrar(
+                        "LLMInterpreter",
+                        "llm_usage",
+                        f"Interpretação da instrução (origem: {llm_usage.get('origem', 'llm')})",
+                        metadata=llm_usage
+                    )
             
             if not contexto["url"]:
-                raise ValueError("URL não encontrada na instrução e não fornecida nos parâmetros")
+                raise ErroPermanente("URL não encontrada na instrução e não fornecida nos parâmetros")
             
             logger.info(f"URL identificada: {contexto['url']}")
             
             # Executar Super Agent (orquestra todos os outros)
-            resultado = self.super_agent.executar(contexto)
+            resultado = await self.super_agent.executar_async(contexto)
             
             # Salvar resultados no banco
             browser_result = resultado.get("resultados", {}).get("browser", {})
             file_result = resultado.get("resultados", {}).get("file", {})
             
-            if browser_result.get("conteudo"):
-                self.db.salvar_resultado(
+            s3_uri_json = file_result.get("formats", {}).get("json", {}).get("uri")
+            s3_uri_markdown = file_result.get("formats", {}).get("markdown", {}).get("uri")
+            itens = browser_result.get("itens") or []
+            if itens:
+                # Uma linha por artigo (consultável sem abrir o JSON do job)
+                total_itens = await self.db.salvar_itens_async(job_id, itens, s3_uri_json=s3_uri_json, s3_uri_markdown=s3_uri_markdown)
+                logger.info(f"{total_itens} itens gravados em clipping_results para o job {job_id}")
+            elif browser_result.get("conteudo"):
+                await self.db.salvar_resultado_async(
                     job_id=job_id,
                     titulo=browser_result.get("url", "Sem título"),
                     url=contexto["url"],
                     conteudo=browser_result.get("conteudo", ""),
-                    s3_uri_json=file_result.get("formats", {}).get("json", {}).get("uri"),
-                    s3_uri_markdown=file_result.get("formats", {}).get("markdown", {}).get("uri")
+                    s3_uri_json=s3_uri_json,
+                    s3_uri_markdown=s3_uri_markdown
                 )
             
             # Atualizar status do job
-            self.db.atualizar_job(job_id, "completed", resultado)
+            await self.db.atualizar_job_async(job_id, "completed", resultado)
+            self._registrar_status(job_id, "completed")
+            try:
+                await self.db.limpar_checkpoints_async(job_id)
+            except Exception as e:
+                logger.warning(f"Erro ao limpar checkpoints do job {job_id}: {e}")
+            await self._salvar_watermarks(contexto)
             
             logger.info(f"Job {job_id} processado com sucesso")
+            metricas_db = self.db.metricas_pool()
+            logger.info(
+                "DB pool job=%s espera_media_ms=%.3f espera_max_ms=%.3f tamanho=%s ociosas=%s timeouts=%s",
+                job_id,
+                metricas_db["espera_media_ms"],
+                metricas_db["espera_max_ms"],
+                metricas_db["tamanho"],
+                metricas_db["ociosas"],
+                metricas_db["timeouts"],
+                extra={"metadata": metricas_db}
+            )
             
             # Acknowledge da mensagem
-            ch.basic_ack(delivery_tag=method.delivery_tag)
+            self._ack(ch, method.delivery_tag)
             
         except Exception as e:
             logger.error(f"Erro ao processar mensagem: {e}", exc_info=True)
             
+            destino = self.retry.destino(properties, e)
+            
             # Atualizar job com erro
             if job_id:
                 try:
-                    self.db.atualizar_job(job_id, "failed", erro=str(e))
+                    status = "failed" if destino == self.retry.fila_dlq else "retrying"
+                    await self.db.atualizar_job_async(job_id, status, erro=str(e))
+                    self._registrar_status(job_id, status)
                 except:
                     pass
+                if destino == self.retry.fila_dlq:
+                    # Job encerrado: os checkpoints por etapa não serão mais retomados
+                    try:
+                        await self.db.limpar_checkpoints_async(job_id)
+                    except Exception as erro_limpeza:
+                        logger.warning(f"Erro ao limpar checkpoints do job {job_id}: {erro_limpeza}")
             
-            # Rejeitar mensagem e reenviar para fila (máximo de retries)
-            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+            # Reagendar com backoff ou enviar para a DLQ (nunca requeue imediato)
+            body = self.retry.corpo_com_job_id(body, job_id)
+            self._reagendar(ch, method.delivery_tag, properties, body, e, destino)
+        finally:
+            # As threads do executor são reaproveitadas entre jobs
+            if token_job is not None:
+                job_atual.reset(token_job)
+    
+    async def _salvar_watermarks(self, contexto: Dict[str, Any]) -> None:
+        """Avança os watermarks de descoberta do job concluído (entradas vistas só contam após o sucesso)."""
+        for dominio, visto_em in (contexto.get("watermarks_descoberta") or {}).items():
+            try:
+                await self.db.salvar_watermark_async(dominio, datetime.fromisoformat(visto_em))
+            except Exception as e:
+                logger.warning(f"Erro ao salvar watermark de {dominio}: {e}")
+    
+    def _registrar_status(self, job_id: str, status: str) -> None:
+        """Registra a mudança de status do job (encerra o stream SSE em status finais)."""
+        if self.escritor_logs:
+            self.escritor_logs.registrar("Worker", "job_status", status, metadata={"status": status}, job_id=job_id)
     
     def iniciar(self) -> None:
         """Inicia o worker e começa a consumir mensagens."""
@@ -354,15 +666,16 @@ class WorkerAgno:
             self.conectar_rabbitmq()
             
             # Configurar QoS
-            self.canal.basic_qos(prefetch_count=self.config.worker_concurrency)
+            self.canal.basic_qos(prefetch_count=self.concorrencia)
             
             # Consumir mensagens com processamento paralelo
             self.canal.basic_consume(
                 queue="clippings.jobs",
-                on_message_callback=self._processar_job_em_thread
+                on_message_callback=self._processar_job_no_loop if self.loop_jobs else self._processar_job_em_thread
             )
             
-            logger.info(f"Worker iniciado e aguardando mensagens (concorrência: {self.config.worker_concurrency})...")
+            modo = "assíncrono" if self.loop_jobs else "threads"
+            logger.info(f"Worker iniciado e aguardando mensagens (modo: {modo}, concorrência: {self.concorrencia})...")
             self.canal.start_consuming()
             
         except KeyboardInterrupt:
@@ -376,10 +689,25 @@ class WorkerAgno:
         """Para o worker e fecha conexões."""
         if self.canal and not self.canal.is_closed:
             self.canal.stop_consuming()
-        if self.conexao and not self.conexao.is_closed:
-            self.conexao.close()
         if self.executor:
             self.executor.shutdown(wait=True)
+        if self.loop_jobs:
+            with self.lock:
+                em_andamento = list(self._jobs_em_andamento)
+            wait(em_andamento)
+        for agente in self.agentes.values():
+            if hasattr(agente, "fechar"):
+                agente.fechar()
+        if self.loop_jobs:
+            self.loop_jobs.call_soon_threadsafe(self.loop_jobs.stop)
+        if self.conexao and not self.conexao.is_closed:
+            # Processar acks/nacks agendados pelas threads antes de fechar
+            self.conexao.process_data_events(time_limit=0)
+            self.conexao.close()
+        if self.escritor_logs:
+            # Gravar os eventos ainda no buffer antes de fechar o pool
+            self.escritor_logs.fechar()
+        self.db.fechar()
         logger.info("Worker parado")
 
 
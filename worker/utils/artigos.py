@@ -0,0 +1,78 @@
+"""
+Identidade de artigos entre jobs: URL normalizada e hash de conteúdo.
+
+A mesma notícia aparece com variações de URL (www/sem www, http/https,
+parâmetros de rastreamento, barra final) - as mesmas variações que o
+prompt manda tentar em HTTP 403. ``normalizar_url`` reduz todas a uma
+única chave, usada como chave da tabela ``articles``; ``hash_conteudo``
+identifica o mesmo texto publicado sob URLs diferentes.
+"""
+
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse
+import hashlib
+import re
+
+# Parâmetros que não mudam o conteúdo da página
+PARAMETROS_RASTREAMENTO = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "ref", "ref_src", "amp",
+}
+_PREFIXOS_RASTREAMENTO = ("utm_", "pk_", "mtm_")
+
+
+def normalizar_url(url: Optional[str]) -> str:
+    """
+    Chave canônica de um artigo: host sem www, caminho sem barra final e query sem rastreamento.
+    
+    O esquema é descartado (http e https são a mesma página) e os
+    parâmetros restantes são ordenados.
+    
+    Args:
+        url: URL como encontrada na listagem, sitemap ou resultado do agente
+    
+    Returns:
+        Chave no formato host/caminho?query (string vazia para URL inválida)
+    """
+    if not url:
+        return ""
+    try:
+        partes = urlparse(url.strip() if "://" in url else f"https://{url.strip()}")
+        host = (partes.hostname or "").lower().removeprefix("www.")
+        porta = partes.port
+    except ValueError:
+        # IPv6 malformado, porta não numérica etc. (URLs vindas do LLM ou de feeds)
+        return ""
+    if not host:
+        return ""
+    if porta and porta not in (80, 443):
+        host = f"{host}:{porta}"
+    caminho = re.sub(r"/{2,}", "/", partes.path or "/").rstrip("/")
+    if caminho.endswith("/amp"):
+        caminho = caminho[:-4]
+    parametros = sorted(
+        (chave, valor) for chave, valor in parse_qsl(partes.query, keep_blank_values=True)
+        if chave.lower() not in PARAMETROS_RASTREAMENTO and not chave.lower().startswith(_PREFIXOS_RASTREAMENTO)
+    )
+    query = f"?{urlencode(parametros)}" if parametros else ""
+    return f"{host}{caminho}{query}"
+
+
+def hash_conteudo(item: Dict[str, Any]) -> Optional[str]:
+    """
+    Hash SHA-256 do conteúdo de um item (corpo, ou título + resumo quando não há corpo).
+    
+    Espaços e caixa são normalizados para que mudanças de layout não
+    alterem o hash.
+    
+    Args:
+        item: Item no schema do prompt
+    
+    Returns:
+        Hash hexadecimal ou None se o item não tiver texto
+    """
+    texto = item.get("texto") or " ".join(filter(None, [item.get("titulo"), item.get("resumo_2l")]))
+    texto = " ".join(str(texto).split()).lower()
+    if not texto:
+        return None
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
@@ -0,0 +1,167 @@
+"""
+Bloqueio de recursos desnecessários nas sessões de browser (imagens, fontes, mídia, rastreadores).
+
+O prompt proíbe conteúdo de mídia e o agente trabalha só com o DOM
+(use_vision=False), mas o Chrome baixa tudo de cada página de notícia. O
+bloqueio usa o domínio Fetch do CDP no alvo do browser, o que vale igualmente
+para o Chrome local e para o Browserless e cobre abas novas:
+
+- domínios de anúncios/rastreamento são recusados no estágio Request (a
+  requisição nem sai do browser);
+- tipos de recurso (Image, Font, Media...) são recusados no estágio Response,
+  logo após os cabeçalhos: o corpo não é baixado e o Content-Length informa
+  quantos bytes foram economizados.
+
+Só as requisições que casam com os padrões são pausadas; as demais não
+passam pelo worker.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Tipos de recurso do CDP (Network.ResourceType); Document/Script/XHR nunca são bloqueados
+TIPOS_PADRAO = ("Image", "Font", "Media")
+TIPOS_PROTEGIDOS = {"Document", "Script", "XHR", "Fetch"}
+
+DOMINIOS_RASTREAMENTO_PADRAO = (
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googletagservices.com",
+    "googletagmanager.com",
+    "google-analytics.com",
+    "googleadservices.com",
+    "adservice.google.com",
+    "amazon-adsystem.com",
+    "adnxs.com",
+    "criteo.com",
+    "criteo.net",
+    "taboola.com",
+    "outbrain.com",
+    "scorecardresearch.com",
+    "quantserve.com",
+    "chartbeat.com",
+    "chartbeat.net",
+    "hotjar.com",
+    "clarity.ms",
+    "connect.facebook.net",
+    "analytics.tiktok.com",
+    "ads-twitter.com",
+    "rubiconproject.com",
+    "pubmatic.com",
+    "casalemedia.com",
+    "smartadserver.com",
+)
+
+
+class BloqueadorRecursos:
+    """Aplica o bloqueio numa sessão de browser e contabiliza o que foi economizado."""
+    
+    def __init__(self, tipos: Iterable[str] = TIPOS_PADRAO, dominios: Iterable[str] = DOMINIOS_RASTREAMENTO_PADRAO):
+        """
+        Inicializa o bloqueador.
+        
+        Args:
+            tipos: Tipos de recurso do CDP a bloquear (Image, Font, Media, Stylesheet...)
+            dominios: Domínios de anúncios/rastreamento (subdomínios incluídos)
+        """
+        self.tipos = [tipo for tipo in dict.fromkeys(tipos) if tipo and tipo not in TIPOS_PROTEGIDOS]
+        self.dominios = [dominio.strip().lower().lstrip(".") for dominio in dict.fromkeys(dominios) if dominio.strip()]
+        self._lock = threading.Lock()
+        self._zerar()
+    
+    def _zerar(self) -> None:
+        self._bloqueadas: Dict[str, int] = {}
+        self._bytes_economizados = 0
+        self._sem_tamanho = 0
+        self._rastreadores = 0
+    
+    def _padroes(self) -> List[Dict[str, str]]:
+        padroes = []
+        for dominio in self.dominios:
+            padroes.append({"urlPattern": f"*://{dominio}/*", "requestStage": "Request"})
+            padroes.append({"urlPattern": f"*://*.{dominio}/*", "requestStage": "Request"})
+        for tipo in self.tipos:
+            padroes.append({"urlPattern": "*", "resourceType": tipo, "requestStage": "Response"})
+        return padroes
+    
+    async def aplicar(self, browser_session: Any) -> bool:
+        """
+        Ativa a interceptação na conexão CDP da sessão (já iniciada).
+        
+        Args:
+            browser_session: BrowserSession do browser-use
+        
+        Returns:
+            True se o bloqueio ficou ativo
+        """
+        cliente = getattr(browser_session, "cdp_client", None)
+        padroes = self._padroes()
+        if cliente is None or not padroes:
+            if cliente is None:
+                logger.warning("BrowserSession sem cliente CDP; bloqueio de recursos desativado")
+            return False
+        
+        def ao_pausar(evento: Dict[str, Any], session_id: Optional[str] = None) -> None:
+            asyncio.ensure_future(self._tratar(cliente, evento, session_id))
+        
+        cliente.register.Fetch.requestPaused(ao_pausar)
+        await cliente.send.Fetch.enable(params={"patterns": padroes})
+        logger.info(
+            f"Bloqueio de recursos ativo: tipos={','.join(self.tipos) or '-'}, "
+            f"{len(self.dominios)} domínios de rastreamento"
+        )
+        return True
+    
+    async def _tratar(self, cliente: Any, evento: Dict[str, Any], session_id: Optional[str]) -> None:
+        """Recusa a requisição pausada e contabiliza (toda requisição pausada precisa de resposta)."""
+        em_resposta = "responseStatusCode" in evento or "responseErrorReason" in evento
+        tamanho = None
+        if em_resposta:
+            for cabecalho in evento.get("responseHeaders") or []:
+                if cabecalho.get("name", "").lower() == "content-length":
+                    try:
+                        tamanho = int(cabecalho.get("value"))
+                    except (TypeError, ValueError):
+                        tamanho = None
+                    break
+        
+        with self._lock:
+            if em_resposta:
+                tipo = evento.get("resourceType", "Other")
+                self._bloqueadas[tipo] = self._bloqueadas.get(tipo, 0) + 1
+                if tamanho is None:
+                    self._sem_tamanho += 1
+                else:
+                    self._bytes_economizados += tamanho
+            else:
+                self._rastreadores += 1
+        
+        try:
+            await cliente.send.Fetch.failRequest(
+                params={"requestId": evento["requestId"], "errorReason": "BlockedByClient"},
+                session_id=session_id
+            )
+        except Exception as e:
+            logger.debug(f"Erro ao recusar requisição {evento.get('requestId')}: {e}")
+    
+    def coletar(self) -> Dict[str, Any]:
+        """
+        Devolve e zera os contadores (chamado ao fim de cada job; a sessão pode ser reaproveitada).
+        
+        Returns:
+            requisicoes_bloqueadas por tipo, rastreadores_bloqueados,
+            bytes_economizados (pelo Content-Length) e respostas_sem_tamanho
+        """
+        with self._lock:
+            metricas = {
+                "requisicoes_bloqueadas": dict(self._bloqueadas),
+                "rastreadores_bloqueados": self._rastreadores,
+                "bytes_economizados": self._bytes_economizados,
+                "respostas_sem_tamanho": self._sem_tamanho,
+            }
+            self._zerar()
+        return metricas
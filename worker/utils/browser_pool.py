@@ -0,0 +1,366 @@
+"""
+Pool de sessões de browser pré-aquecidas para o BrowserAgent.
+
+Mantém sessões BrowserUSE já iniciadas (Chrome local ou CDP do Browserless)
+num event loop persistente, para que cada job não pague o launch do Chrome,
+o handshake CDP e a injeção do storage_state. Entre jobs a sessão é isolada
+via CDP (abas extras fechadas, cache HTTP, cookies e storage das origens
+visitadas apagados, storage_state reaplicado); sessões que falham no health
+check, atingem o limite de usos ou crescem demais em memória são recicladas.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+from browser_use.browser.profile import BrowserProfile
+from browser_use.browser.session import BrowserSession
+
+from .bloqueio_recursos import BloqueadorRecursos
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psutil
+except ImportError:  # psutil é dependência do browser-use, mas não obrigatória aqui
+    psutil = None
+
+
+class SessaoPool:
+    """Sessão de browser gerenciada pelo pool."""
+    
+    def __init__(self, browser_session: BrowserSession, pid: Optional[int], bloqueador: Optional[BloqueadorRecursos] = None):
+        """
+        Args:
+            browser_session: Sessão BrowserUSE já iniciada
+            pid: PID do processo principal do Chrome lançado pelo BrowserUSE (None no modo CDP remoto)
+            bloqueador: Bloqueio de recursos ativo na sessão (contadores por job)
+        """
+        self.browser_session = browser_session
+        self.pid = pid
+        self.bloqueador = bloqueador
+        self.usos = 0
+        self.criada_em = time.time()
+    
+    def processos(self) -> List[Any]:
+        """Processo principal do Chrome e seus descendentes (renderers, GPU...)."""
+        if psutil is None or self.pid is None:
+            return []
+        try:
+            principal = psutil.Process(self.pid)
+            return [principal] + principal.children(recursive=True)
+        except psutil.Error:
+            return []
+    
+    def memoria_mb(self) -> float:
+        """Memória residente (MB) dos processos Chrome desta sessão."""
+        total = 0
+        for processo in self.processos():
+            try:
+                total += processo.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+    
+    def processos_vivos(self) -> bool:
+        """Indica se o processo principal do Chrome da sessão continua rodando."""
+        if psutil is None or self.pid is None:
+            return True
+        return psutil.pid_exists(self.pid)
+
+
+class PoolSessoesBrowser:
+    """Pool thread-safe de sessões BrowserUSE num event loop dedicado."""
+    
+    def __init__(
+        self,
+        fabrica_perfil: Callable[[], BrowserProfile],
+        tamanho: int = 3,
+        max_usos: int = 20,
+        max_memoria_mb: int = 1500,
+        storage_state: Optional[Dict[str, Any]] = None,
+        timeout_inicio: float = 180.0,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        fabrica_bloqueador: Optional[Callable[[], BloqueadorRecursos]] = None
+    ):
+        """
+        Inicializa o pool (as sessões são criadas sob demanda ou em aquecer()).
+        
+        Args:
+            fabrica_perfil: Função que cria o BrowserProfile (local ou remoto)
+            tamanho: Número máximo de sessões simultâneas (worker_concurrency)
+            max_usos: Jobs atendidos por sessão antes de reciclar
+            max_memoria_mb: Memória máxima dos processos Chrome antes de reciclar
+            storage_state: Sessão do Chrome reaplicada a cada job
+            timeout_inicio: Tempo máximo para iniciar uma sessão
+            loop: Event loop já em execução (modo assíncrono do worker); None cria um loop dedicado
+            fabrica_bloqueador: Cria o bloqueio de recursos aplicado a cada sessão nova (None = sem bloqueio)
+        """
+        self.fabrica_perfil = fabrica_perfil
+        self.tamanho = max(1, int(tamanho))
+        self.max_usos = max(1, int(max_usos))
+        self.max_memoria_mb = max_memoria_mb
+        self.storage_state = storage_state
+        self.timeout_inicio = timeout_inicio
+        self.fabrica_bloqueador = fabrica_bloqueador
+        
+        self._livres: "queue.LifoQueue[SessaoPool]" = queue.LifoQueue()
+        self._vagas = threading.BoundedSemaphore(self.tamanho)
+        self._fechado = False
+        
+        # Event loop persistente: sessões CDP ficam presas ao loop que as criou
+        self._loop_proprio = loop is None
+        self.loop = loop or asyncio.new_event_loop()
+        if self._loop_proprio:
+            self._thread_loop = threading.Thread(
+                target=self.loop.run_forever, name="browser-pool-loop", daemon=True
+            )
+            self._thread_loop.start()
+    
+    def executar(self, coro, timeout: Optional[float] = None) -> Any:
+        """
+        Executa uma corrotina no event loop do pool e aguarda o resultado.
+        
+        Args:
+            coro: Corrotina a executar
+            timeout: Tempo máximo de espera em segundos
+        
+        Returns:
+            Resultado da corrotina
+        """
+        futuro = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return futuro.result(timeout=timeout)
+        except TimeoutError:
+            futuro.cancel()
+            raise
+    
+    async def aguardar(self, coro) -> Any:
+        """
+        Aguarda uma corrotina no loop do pool a partir de qualquer event loop.
+        
+        Args:
+            coro: Corrotina que usa sessões do pool
+        
+        Returns:
+            Resultado da corrotina
+        """
+        if asyncio.get_running_loop() is self.loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+    
+    def agendar(self, coro) -> None:
+        """Agenda uma corrotina no loop do pool sem aguardar o resultado."""
+        asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    def aquecer(self) -> None:
+        """Pré-inicia as sessões do pool em background."""
+        def _aquecer() -> None:
+            for _ in range(self.tamanho):
+                if self._fechado or not self._vagas.acquire(blocking=False):
+                    return
+                try:
+                    self._livres.put(self._criar_sessao())
+                except Exception as e:
+                    logger.warning(f"Falha ao pré-aquecer sessão de browser: {e}")
+                finally:
+                    self._vagas.release()
+        
+        threading.Thread(target=_aquecer, name="browser-pool-warmup", daemon=True).start()
+    
+    def adquirir(self) -> SessaoPool:
+        """
+        Obtém uma sessão saudável e isolada para um job (bloqueia se o pool estiver cheio).
+        
+        Returns:
+            Sessão pronta para uso
+        """
+        if self._fechado:
+            raise RuntimeError("Pool de browser encerrado")
+        self._vagas.acquire()
+        try:
+            while True:
+                try:
+                    sessao = self._livres.get_nowait()
+                except queue.Empty:
+                    sessao = self._criar_sessao()
+                    break
+                if self._saudavel(sessao):
+                    break
+                logger.info("Sessão de browser reprovada no health check; reciclando")
+                self._descartar(sessao)
+            sessao.usos += 1
+            return sessao
+        except Exception:
+            self._vagas.release()
+            raise
+    
+    def devolver(self, sessao: SessaoPool, descartar: bool = False) -> None:
+        """
+        Devolve a sessão ao pool após o job.
+        
+        Args:
+            sessao: Sessão obtida em adquirir()
+            descartar: Força a reciclagem (ex.: timeout ou erro de conexão)
+        """
+        try:
+            if descartar or self._fechado or not self._reaproveitavel(sessao):
+                self._descartar(sessao)
+                return
+            try:
+                self.executar(self._isolar(sessao.browser_session), timeout=30)
+            except Exception as e:
+                logger.info(f"Não foi possível isolar a sessão de browser ({e}); reciclando")
+                self._descartar(sessao)
+                return
+            self._livres.put(sessao)
+        finally:
+            self._vagas.release()
+    
+    def fechar(self) -> None:
+        """Encerra todas as sessões livres e o event loop do pool."""
+        self._fechado = True
+        while True:
+            try:
+                self._descartar(self._livres.get_nowait())
+            except queue.Empty:
+                break
+        if self._loop_proprio:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+    
+    def _criar_sessao(self) -> SessaoPool:
+        """Cria e inicia uma nova sessão no loop do pool."""
+        browser_session = BrowserSession(browser_profile=self.fabrica_perfil())
+        self.executar(browser_session.start(), timeout=self.timeout_inicio)
+        pid = self._pid_do_browser(browser_session)
+        bloqueador = None
+        if self.fabrica_bloqueador is not None:
+            bloqueador = self.fabrica_bloqueador()
+            try:
+                # A interceptação fica na conexão CDP e vale para todos os jobs da sessão
+                self.executar(bloqueador.aplicar(browser_session), timeout=30)
+            except Exception as e:
+                logger.warning(f"Não foi possível ativar o bloqueio de recursos: {e}")
+                bloqueador = None
+        logger.info(f"Nova sessão de browser iniciada no pool (pid local: {pid or '-'})")
+        return SessaoPool(browser_session, pid, bloqueador)
+    
+    def _descartar(self, sessao: SessaoPool) -> None:
+        """Encerra definitivamente uma sessão."""
+        # Capturados antes do stop(): depois dele os filhos já não estão ligados ao principal
+        processos = sessao.processos()
+        try:
+            sessao.browser_session.browser_profile.keep_alive = False
+            self.executar(sessao.browser_session.stop(), timeout=30)
+        except Exception as e:
+            logger.debug(f"Erro ao encerrar sessão de browser: {e}")
+        for processo in reversed(processos):
+            try:
+                processo.kill()
+            except psutil.Error:
+                continue
+    
+    def _reaproveitavel(self, sessao: SessaoPool) -> bool:
+        """Verifica limites de uso e memória da sessão."""
+        if sessao.usos >= self.max_usos:
+            logger.info(f"Sessão de browser atingiu {sessao.usos} usos; reciclando")
+            return False
+        memoria = sessao.memoria_mb()
+        if self.max_memoria_mb and memoria > self.max_memoria_mb:
+            logger.info(f"Sessão de browser usando {memoria:.0f} MB; reciclando")
+            return False
+        return True
+    
+    def _saudavel(self, sessao: SessaoPool) -> bool:
+        """Health check rápido antes de entregar a sessão a um job."""
+        if not sessao.processos_vivos():
+            return False
+        obter_url = getattr(sessao.browser_session, "get_current_page_url", None)
+        if obter_url is None:
+            return True
+        try:
+            self.executar(obter_url(), timeout=10)
+            return True
+        except Exception as e:
+            logger.debug(f"Health check da sessão de browser falhou: {e}")
+            return False
+    
+    async def _isolar(self, browser_session: BrowserSession) -> None:
+        """
+        Remove o estado deixado pelo job anterior e reaplica o storage_state.
+        
+        Fecha as abas extras, limpa o cache HTTP e apaga cookies e storage
+        (localStorage, IndexedDB, service workers, cache storage...) de todas
+        as origens visitadas: histórico de navegação das abas mais os domínios
+        dos cookies. Levanta exceção quando a sessão não expõe o cliente CDP;
+        nesse caso a sessão é reciclada em vez de reaproveitada.
+        """
+        cliente = getattr(browser_session, "cdp_client", None)
+        definir = getattr(browser_session, "_cdp_set_cookies", None)
+        if cliente is None or definir is None:
+            raise RuntimeError("BrowserSession sem suporte a limpeza de estado via CDP")
+        
+        alvos = (await cliente.send.Target.getTargets()).get("targetInfos", [])
+        paginas = [alvo for alvo in alvos if alvo.get("type") == "page"]
+        if not paginas:
+            raise RuntimeError("Sessão de browser sem abas abertas")
+        foco = getattr(getattr(browser_session, "agent_focus", None), "target_id", None)
+        manter = next((alvo for alvo in paginas if alvo.get("targetId") == foco), paginas[0])
+        
+        origens: Set[str] = set()
+        for alvo in paginas:
+            anexado = await cliente.send.Target.attachToTarget(
+                params={"targetId": alvo["targetId"], "flatten": True}
+            )
+            session_id = anexado["sessionId"]
+            try:
+                historico = await cliente.send.Page.getNavigationHistory(session_id=session_id)
+                origens.update(_origem(entrada.get("url")) for entrada in historico.get("entries", []))
+                if alvo is manter:
+                    await cliente.send.Network.clearBrowserCache(session_id=session_id)
+            finally:
+                await cliente.send.Target.detachFromTarget(params={"sessionId": session_id})
+        for alvo in paginas:
+            if alvo is not manter:
+                await cliente.send.Target.closeTarget(params={"targetId": alvo["targetId"]})
+        
+        for cookie in (await cliente.send.Storage.getCookies()).get("cookies", []):
+            dominio = (cookie.get("domain") or "").lstrip(".")
+            if dominio:
+                origens.update({f"https://{dominio}", f"http://{dominio}"})
+        origens.discard(None)
+        for origem in origens:
+            await cliente.send.Storage.clearDataForOrigin(params={"origin": origem, "storageTypes": "all"})
+        await cliente.send.Storage.clearCookies()
+        
+        cookies = (self.storage_state or {}).get("cookies") or []
+        if cookies:
+            await definir(cookies)
+        
+        navegar = getattr(browser_session, "navigate_to", None)
+        if navegar is not None:
+            await navegar("about:blank")
+    
+    @staticmethod
+    def _pid_do_browser(browser_session: BrowserSession) -> Optional[int]:
+        """PID do Chrome lançado pelo próprio BrowserUSE (None quando conectado via CDP remoto)."""
+        watchdog = getattr(browser_session, "_local_browser_watchdog", None)
+        processo = getattr(watchdog, "_subprocess", None)
+        pid = getattr(processo, "pid", None) or getattr(browser_session, "browser_pid", None)
+        return int(pid) if pid else None
+
+
+def _origem(url: Optional[str]) -> Optional[str]:
+    """Origem (esquema://host[:porta]) de uma URL http(s); None para about:, data: etc."""
+    if not url:
+        return None
+    partes = urlparse(url)
+    if partes.scheme not in ("http", "https") or not partes.netloc:
+        return None
+    return f"{partes.scheme}://{partes.netloc}"
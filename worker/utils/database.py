@@ -1,83 +1,473 @@
 """
 Utilitários para acesso ao banco de dados PostgreSQL.
+
+Todas as operações usam um único pool asyncpg que vive num event loop
+dedicado. Cada operação existe em duas formas que compartilham esse pool:
+síncrona (``criar_job``), para as threads do worker, e assíncrona
+(``criar_job_async``), para código asyncio em qualquer event loop. O
+asyncpg prepara e guarda em cache, por conexão, os statements executados
+(``statement_cache_size``), então as queries fixas abaixo são preparadas
+uma única vez por conexão.
 """
 
-from typing import Dict, Any, Optional
-import os
+from typing import Callable, Dict, Any, List, Optional
+import asyncio
+import functools
 import json
 import logging
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+import threading
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 
+import asyncpg
+
 logger = logging.getLogger(__name__)
 
+# Canal LISTEN/NOTIFY com os eventos dos agentes (GET /jobs/{job_id}/events)
+CANAL_EVENTOS_JOB = "job_events"
+_LIMITE_MENSAGEM_EVENTO = 2000  # Bytes UTF-8 da mensagem no evento
+_LIMITE_PAYLOAD_NOTIFY = 7999  # NOTIFY aceita payloads de até 8000 bytes
+
+# Colunas de clipping_jobs devolvidas pela API (result_metadata só quando pedido)
+_COLUNAS_JOB = """
+    id, job_id, status, instruction, parameters, total_tokens, total_cost_usd,
+    error_message, created_at, started_at, completed_at
+"""
+
+
+def _sincrono(operacao):
+    """Expõe uma operação assíncrona como método bloqueante (para threads)."""
+    @functools.wraps(operacao)
+    def wrapper(self, *args, **kwargs):
+        return self._executar(operacao(self, *args, **kwargs))
+    return wrapper
+
+
+def _assincrono(operacao):
+    """Expõe uma operação como corrotina aguardável de qualquer event loop."""
+    @functools.wraps(operacao)
+    async def wrapper(self, *args, **kwargs):
+        return await self._aguardar(operacao(self, *args, **kwargs))
+    return wrapper
+
+
+def _como_json(valor: Any) -> Any:
+    """Aceita dict ou JSON string para colunas JSONB."""
+    if valor is None or isinstance(valor, (dict, list)):
+        return valor
+    try:
+        return json.loads(valor)
+    except (TypeError, ValueError):
+        return str(valor)
+
+
+def _job(row: asyncpg.Record) -> Dict[str, Any]:
+    """Linha de clipping_jobs como dicionário serializável (sem Decimal/UUID)."""
+    job = dict(row)
+    job["id"] = str(row["id"])
+    if row["total_cost_usd"] is not None:
+        job["total_cost_usd"] = float(row["total_cost_usd"])
+    return job
+
+
+def _data_publicacao(data_iso: Optional[str]) -> Optional[datetime]:
+    """Converte data_iso (YYYY-MM-DD ou ISO completo) para datetime."""
+    if not data_iso:
+        return None
+    try:
+        return datetime.strptime(str(data_iso)[:10], "%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def _truncar_utf8(texto: Optional[str], limite: int) -> str:
+    """Trunca o texto para no máximo `limite` bytes em UTF-8, sem cortar caracteres."""
+    return (texto or "").encode("utf-8")[:limite].decode("utf-8", "ignore")
+
+
+def _payload_evento(evento: Dict[str, Any]) -> str:
+    """Serializa um evento para NOTIFY, encurtando a mensagem até caber no limite em bytes."""
+    mensagem = evento.get("message") or ""
+    limite = _LIMITE_MENSAGEM_EVENTO
+    while True:
+        evento["message"] = _truncar_utf8(mensagem, limite)
+        payload = json.dumps(evento, ensure_ascii=False)
+        # Escapes do JSON (aspas, \n, controles) podem crescer a mensagem além do limite
+        if len(payload.encode("utf-8")) <= _LIMITE_PAYLOAD_NOTIFY or limite == 0:
+            return payload
+        limite //= 2
+
+
+def _score(valor: Any) -> Optional[int]:
+    """Score do item para a coluna SMALLINT (0 a 4, como no schema do prompt); None se inválido."""
+    try:
+        score = int(float(valor))
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return score if 0 <= score <= 4 else None
+
 
 class DatabaseManager:
-    """Gerenciador de conexões e operações no banco de dados."""
+    """Gerenciador do pool de conexões e das operações no banco de dados."""
     
-    def __init__(self, database_url: str):
+    def __init__(
+        self,
+        database_url: str,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        statement_cache_size: int = 100,
+        pool_timeout: float = 30.0,
+        command_timeout: float = 60.0,
+        max_inactive_connection_lifetime: float = 300.0,
+        armazenamento_metadata=None
+    ):
         """
-        Inicializa o gerenciador de banco de dados.
+        Inicializa o gerenciador de banco de dados (o pool é criado no primeiro uso).
         
         Args:
             database_url: URL de conexão do PostgreSQL
+            pool_size: Conexões mantidas abertas no pool
+            max_overflow: Conexões extras abertas sob demanda além de pool_size
+            statement_cache_size: Statements preparados em cache por conexão (0 desativa, ex.: PgBouncer)
+            pool_timeout: Tempo máximo de espera por uma conexão livre
+            command_timeout: Tempo máximo de cada comando SQL
+            max_inactive_connection_lifetime: Conexões extras ociosas são fechadas após esse tempo
+            armazenamento_metadata: ArmazenamentoMetadata para result_metadata grandes (None = sempre inline)
+        """
+        # asyncpg aceita apenas o esquema puro (sem "+psycopg2" etc.)
+        esquema, _, resto = database_url.partition("://")
+        self.database_url = f"{esquema.split('+')[0]}://{resto}"
+        self.pool_size = max(1, pool_size)
+        self.max_size = self.pool_size + max(0, max_overflow)
+        self.statement_cache_size = statement_cache_size
+        self.pool_timeout = pool_timeout
+        self.command_timeout = command_timeout
+        self.max_inactive_connection_lifetime = max_inactive_connection_lifetime
+        self.armazenamento_metadata = armazenamento_metadata
+        
+        self._pool: Optional[asyncpg.Pool] = None
+        self._conexao_escuta: Optional[asyncpg.Connection] = None
+        self._escutas: Dict[str, List[Callable]] = {}
+        self._reconexao_escuta: Optional[asyncio.Task] = None
+        self._fechando = False
+        self._lock_pool: Optional[asyncio.Lock] = None
+        self._lock_metricas = threading.Lock()
+        self._metricas = {"aquisicoes": 0, "espera_total_ms": 0.0, "espera_max_ms": 0.0, "timeouts": 0}
+        
+        # Event loop dedicado: o pool asyncpg fica preso ao loop que o criou
+        self.loop = asyncio.new_event_loop()
+        self._thread_loop = threading.Thread(target=self.loop.run_forever, name="database-loop", daemon=True)
+        self._thread_loop.start()
+    
+    def _executar(self, coro) -> Any:
+        """Executa uma corrotina no loop do pool e aguarda o resultado (chamada bloqueante)."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+    
+    async def _aguardar(self, coro) -> Any:
+        """Aguarda uma corrotina no loop do pool a partir de qualquer event loop."""
+        if asyncio.get_running_loop() is self.loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+    
+    async def _obter_pool(self) -> asyncpg.Pool:
+        if self._pool is None:
+            if self._lock_pool is None:
+                self._lock_pool = asyncio.Lock()
+            async with self._lock_pool:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(
+                        self.database_url,
+                        min_size=self.pool_size,
+                        max_size=self.max_size,
+                        statement_cache_size=self.statement_cache_size,
+                        command_timeout=self.command_timeout,
+                        max_inactive_connection_lifetime=self.max_inactive_connection_lifetime,
+                        init=self._configurar_conexao
+                    )
+                    logger.info(f"Pool do banco criado (min={self.pool_size}, max={self.max_size})")
+        return self._pool
+    
+    @staticmethod
+    async def _configurar_conexao(conexao: asyncpg.Connection) -> None:
+        """Converte JSONB de/para dict automaticamente."""
+        await conexao.set_type_codec(
+            "jsonb",
+            encoder=lambda valor: json.dumps(valor, ensure_ascii=False, default=str),
+            decoder=json.loads,
+            schema="pg_catalog"
+        )
+    
+    @asynccontextmanager
+    async def _conexao(self):
+        """Obtém uma conexão do pool medindo o tempo de espera."""
+        pool = await self._obter_pool()
+        inicio = time.perf_counter()
+        try:
+            conexao = await pool.acquire(timeout=self.pool_timeout)
+        except asyncio.TimeoutError:
+            with self._lock_metricas:
+                self._metricas["timeouts"] += 1
+            raise
+        espera_ms = (time.perf_counter() - inicio) * 1000
+        with self._lock_metricas:
+            self._metricas["aquisicoes"] += 1
+            self._metricas["espera_total_ms"] += espera_ms
+            self._metricas["espera_max_ms"] = max(self._metricas["espera_max_ms"], espera_ms)
+        try:
+            yield conexao
+        finally:
+            await pool.release(conexao)
+    
+    def metricas_pool(self) -> Dict[str, Any]:
         """
-        self.engine = create_engine(database_url, pool_pre_ping=True)
-        self.SessionLocal = sessionmaker(bind=self.engine)
+        Métricas do pool: ocupação e tempo de espera por conexão.
+        
+        Returns:
+            Dicionário com aquisicoes, espera_media_ms, espera_max_ms, timeouts,
+            tamanho atual, conexões ociosas e limites do pool
+        """
+        with self._lock_metricas:
+            metricas = dict(self._metricas)
+        aquisicoes = metricas["aquisicoes"]
+        metricas["espera_media_ms"] = round(metricas["espera_total_ms"] / aquisicoes, 3) if aquisicoes else 0.0
+        metricas["espera_total_ms"] = round(metricas["espera_total_ms"], 3)
+        metricas["espera_max_ms"] = round(metricas["espera_max_ms"], 3)
+        metricas["tamanho"] = self._pool.get_size() if self._pool else 0
+        metricas["ociosas"] = self._pool.get_idle_size() if self._pool else 0
+        metricas["min_size"] = self.pool_size
+        metricas["max_size"] = self.max_size
+        return metricas
+    
+    def fechar(self) -> None:
+        """Fecha o pool e encerra o event loop do banco."""
+        self._fechando = True
+        if self._conexao_escuta is not None:
+            try:
+                self._executar(self._conexao_escuta.close())
+            except Exception as e:
+                logger.warning(f"Erro ao fechar conexão de escuta: {e}")
+        if self._pool is not None:
+            try:
+                self._executar(self._pool.close())
+            except Exception as e:
+                logger.warning(f"Erro ao fechar pool do banco: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
     
-    def criar_job(self, job_id: str, instrucao: str, parametros: Optional[Any] = None) -> Dict[str, Any]:
+    async def _criar_job(
+        self,
+        job_id: str,
+        instrucao: str,
+        parametros: Optional[Any] = None,
+        status: str = "pending"
+    ) -> Dict[str, Any]:
         """
         Cria um novo job no banco de dados.
         
+        Idempotente: em uma nova tentativa (mesmo job_id) o job existente é
+        reaproveitado e volta para o status informado. Com status
+        'processing' o job já é criado iniciado (started_at), sem um
+        UPDATE separado.
+        
         Args:
             job_id: ID único do job
             instrucao: Instrução em linguagem natural
             parametros: Parâmetros adicionais (dict ou JSON string)
-            
+            status: Status inicial ('pending' ou 'processing')
+        
         Returns:
             Dados do job criado
         """
-        with self.SessionLocal() as session:
-            try:
-                # Converter parametros para JSON string se necessário
-                if isinstance(parametros, dict):
-                    parametros_json = json.dumps(parametros)
-                elif parametros is None:
-                    parametros_json = "{}"
-                else:
-                    parametros_json = str(parametros)
-                
-                query = text("""
-                    INSERT INTO clippings_app.clipping_jobs 
-                    (job_id, status, instruction, parameters, created_at)
-                    VALUES (:job_id, 'pending', :instruction, CAST(:parameters AS jsonb), NOW())
+        try:
+            async with self._conexao() as conexao:
+                row = await conexao.fetchrow("""
+                    INSERT INTO clippings_app.clipping_jobs
+                    (job_id, status, instruction, parameters, created_at, started_at)
+                    VALUES ($1, $2, $3, $4::jsonb, NOW(), CASE WHEN $2 = 'processing' THEN NOW() END)
+                    ON CONFLICT (job_id) DO UPDATE
+                    SET status = EXCLUDED.status,
+                        started_at = COALESCE(clipping_jobs.started_at, EXCLUDED.started_at)
                     RETURNING id, job_id, status, created_at
-                """)
-                
-                result = session.execute(
-                    query,
-                    {
-                        "job_id": job_id,
-                        "instruction": instrucao,
-                        "parameters": parametros_json
-                    }
+                """, job_id, status, instrucao, _como_json(parametros) or {})
+        except Exception as e:
+            logger.error(f"Erro ao criar job: {e}")
+            raise
+        return {
+            "id": str(row["id"]),
+            "job_id": row["job_id"],
+            "status": row["status"],
+            "created_at": row["created_at"].isoformat() if row["created_at"] else None
+        }
+    
+    async def _criar_jobs(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Cria vários jobs pendentes num único comando (backfills e POST /jobs/bulk).
+        
+        Jobs cujo job_id já existe são ignorados.
+        
+        Args:
+            jobs: Dicionários com job_id, instrucao e parametros
+        
+        Returns:
+            Jobs criados (job_id, status, created_at), na ordem de ``jobs``
+        """
+        if not jobs:
+            return []
+        try:
+            async with self._conexao() as conexao:
+                rows = await conexao.fetch("""
+                    INSERT INTO clippings_app.clipping_jobs (job_id, status, instruction, parameters, created_at)
+                    SELECT j.job_id, 'pending', j.instruction, j.parameters::jsonb, NOW()
+                    FROM unnest($1::varchar[], $2::text[], $3::text[]) AS j(job_id, instruction, parameters)
+                    ON CONFLICT (job_id) DO NOTHING
+                    RETURNING job_id, status, created_at
+                """,
+                    [job["job_id"] for job in jobs],
+                    [job["instrucao"] for job in jobs],
+                    [json.dumps(_como_json(job.get("parametros")) or {}, ensure_ascii=False, default=str) for job in jobs]
                 )
-                session.commit()
-                
-                row = result.fetchone()
-                return {
-                    "id": str(row[0]),
-                    "job_id": row[1],
-                    "status": row[2],
-                    "created_at": row[3].isoformat() if row[3] else None
-                }
-            except Exception as e:
-                session.rollback()
-                logger.error(f"Erro ao criar job: {e}")
-                raise
+        except Exception as e:
+            logger.error(f"Erro ao criar jobs em lote: {e}")
+            raise
+        # RETURNING não garante a ordem do unnest: devolver na ordem da requisição
+        ordem = {job["job_id"]: indice for indice, job in enumerate(jobs)}
+        return [
+            {"job_id": row["job_id"], "status": row["status"], "created_at": row["created_at"]}
+            for row in sorted(rows, key=lambda row: ordem[row["job_id"]])
+        ]
+    
+    async def _marcar_jobs_falhos(self, job_ids: List[str], erro: str) -> None:
+        """
+        Marca vários jobs como falhos (ex.: publicação na fila recusada).
+        
+        Args:
+            job_ids: IDs dos jobs
+            erro: Mensagem de erro
+        """
+        if not job_ids:
+            return
+        try:
+            async with self._conexao() as conexao:
+                await conexao.execute("""
+                    UPDATE clippings_app.clipping_jobs
+                    SET status = 'failed', error_message = $2, completed_at = NOW()
+                    WHERE job_id = ANY($1::varchar[]) AND status = 'pending'
+                """, job_ids, erro)
+        except Exception as e:
+            logger.error(f"Erro ao marcar jobs como falhos: {e}")
+            raise
+    
+    async def _listar_jobs(
+        self,
+        status: Optional[str] = None,
+        criado_desde: Optional[datetime] = None,
+        criado_ate: Optional[datetime] = None,
+        apos: Optional[tuple] = None,
+        limite: int = 50,
+        incluir_metadata: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Lista jobs do mais recente para o mais antigo com paginação por keyset.
+        
+        Com status, a varredura segue idx_clipping_jobs_status_created (status,
+        created_at DESC); sem status, idx_created_at. O keyset é escrito com
+        ``created_at <= $c`` para virar condição de índice: cada página custa o
+        mesmo, seja a primeira ou a milésima.
+        
+        Args:
+            status: Filtra por status
+            criado_desde: Criados a partir de (inclusivo)
+            criado_ate: Criados antes de (exclusivo)
+            apos: (created_at, id) da última linha da página anterior
+            limite: Linhas por página
+            incluir_metadata: Inclui result_metadata (externalizados vêm só com resumo e ponteiro)
+            
+        Returns:
+            Jobs com a chave de ordenação ("chave")
+        """
+        colunas = _COLUNAS_JOB + (", result_metadata" if incluir_metadata else "")
+        # Só os filtros informados entram no SQL: cada combinação vira um statement
+        # próprio no cache, e o plano genérico ainda usa o índice de status
+        condicoes: List[str] = []
+        parametros: List[Any] = []
+        
+        def filtrar(condicao: str, *valores: Any) -> None:
+            posicoes = [f"${len(parametros) + indice + 1}" for indice in range(len(valores))]
+            condicoes.append(condicao.format(*posicoes))
+            parametros.extend(valores)
+        
+        if status is not None:
+            filtrar("status = {0}", status)
+        if criado_desde is not None:
+            filtrar("created_at >= {0}", criado_desde)
+        if criado_ate is not None:
+            filtrar("created_at < {0}", criado_ate)
+        if apos:
+            criado_apos, id_apos = apos
+            filtrar("created_at <= {0} AND (created_at < {0} OR id < {1}::uuid)", criado_apos, id_apos)
+        parametros.append(limite)
+        where = " AND ".join(condicoes) or "TRUE"
+        
+        async with self._conexao() as conexao:
+            rows = await conexao.fetch(f"""
+                SELECT {colunas}
+                FROM clippings_app.clipping_jobs
+                WHERE {where}
+                ORDER BY created_at DESC, id DESC
+                LIMIT ${len(parametros)}
+            """, *parametros)
+        
+        jobs = []
+        for row in rows:
+            job = _job(row)
+            job["chave"] = (None, row["created_at"], job["id"])
+            jobs.append(job)
+        return jobs
+    
+    async def _obter_jobs(self, job_ids: List[str], incluir_metadata: bool = False) -> List[Dict[str, Any]]:
+        """
+        Busca jobs pelo job_id (GET /jobs/{job_id} e GET /jobs?ids=).
+        
+        Com incluir_metadata, result_metadata guardado no MinIO é recuperado
+        e devolvido completo, como se estivesse na linha.
+        
+        Args:
+            job_ids: IDs dos jobs
+            incluir_metadata: Inclui result_metadata (pode ser grande)
+            
+        Returns:
+            Jobs encontrados, na ordem de job_ids
+        """
+        if not job_ids:
+            return []
+        colunas = _COLUNAS_JOB + (", result_metadata" if incluir_metadata else "")
+        async with self._conexao() as conexao:
+            rows = await conexao.fetch(f"""
+                SELECT {colunas}
+                FROM clippings_app.clipping_jobs
+                WHERE job_id = ANY($1::varchar[])
+            """, job_ids)
+        por_id = {row["job_id"]: _job(row) for row in rows}
+        if incluir_metadata:
+            for job in por_id.values():
+                job["result_metadata"] = await self._carregar_metadata(job["result_metadata"])
+        return [por_id[job_id] for job_id in dict.fromkeys(job_ids) if job_id in por_id]
     
-    def atualizar_job(self, job_id: str, status: str, resultado: Optional[Dict] = None, erro: Optional[str] = None) -> None:
+    async def _carregar_metadata(self, metadata: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Recupera do MinIO um result_metadata externalizado (sem efeito para metadata inline).
+        
+        Args:
+            metadata: Valor de result_metadata como está no banco
+            
+        Returns:
+            Metadata completo
+        """
+        if self.armazenamento_metadata is None or not isinstance(metadata, dict) or "_externo" not in metadata:
+            return metadata
+        return await asyncio.to_thread(self.armazenamento_metadata.carregar, metadata)
+    
+    async def _atualizar_job(self, job_id: str, status: str, resultado: Optional[Dict] = None, erro: Optional[str] = None) -> None:
         """
         Atualiza o status e resultado de um job.
         
@@ -87,42 +477,30 @@ class DatabaseManager:
             resultado: Resultado do processamento
             erro: Mensagem de erro se houver
         """
-        with self.SessionLocal() as session:
+        resultado = _como_json(resultado) if resultado else None
+        if resultado and self.armazenamento_metadata is not None:
             try:
-                resultado_json = None
-                if resultado:
-                    if isinstance(resultado, dict):
-                        resultado_json = json.dumps(resultado)
-                    else:
-                        resultado_json = str(resultado)
-                
-                query = text("""
+                # Resultados grandes vão para o MinIO; a linha guarda resumo + ponteiro
+                resultado = await asyncio.to_thread(self.armazenamento_metadata.externalizar, job_id, resultado)
+            except Exception as e:
+                logger.warning(f"Erro ao mover result_metadata do job {job_id} para o MinIO; gravando inline: {e}")
+        try:
+            async with self._conexao() as conexao:
+                await conexao.execute("""
                     UPDATE clippings_app.clipping_jobs
-                    SET status = :status,
-                        result_metadata = CAST(:resultado AS jsonb),
-                        error_message = :erro,
-                        completed_at = CASE WHEN :status IN ('completed', 'failed') THEN NOW() ELSE completed_at END,
+                    SET status = $2,
+                        result_metadata = $3::jsonb,
+                        error_message = $4,
+                        completed_at = CASE WHEN $2 IN ('completed', 'failed') THEN NOW() ELSE completed_at END,
                         started_at = CASE WHEN started_at IS NULL THEN NOW() ELSE started_at END
-                    WHERE job_id = :job_id
-                """)
-                
-                session.execute(
-                    query,
-                    {
-                        "job_id": job_id,
-                        "status": status,
-                        "resultado": resultado_json,
-                        "erro": erro
-                    }
-                )
-                session.commit()
-            except Exception as e:
-                session.rollback()
-                logger.error(f"Erro ao atualizar job: {e}")
-                raise
+                    WHERE job_id = $1
+                """, job_id, status, resultado, erro)
+        except Exception as e:
+            logger.error(f"Erro ao atualizar job: {e}")
+            raise
     
-    def salvar_resultado(self, job_id: str, titulo: str, url: str, conteudo: str, 
-                        s3_uri_json: Optional[str] = None, s3_uri_markdown: Optional[str] = None) -> None:
+    async def _salvar_resultado(self, job_id: str, titulo: str, url: str, conteudo: str,
+                                s3_uri_json: Optional[str] = None, s3_uri_markdown: Optional[str] = None) -> None:
         """
         Salva o resultado de um clipping.
         
@@ -134,27 +512,548 @@ class DatabaseManager:
             s3_uri_json: URI do arquivo JSON no S3
             s3_uri_markdown: URI do arquivo Markdown no S3
         """
-        with self.SessionLocal() as session:
-            try:
-                query = text("""
+        try:
+            async with self._conexao() as conexao:
+                await conexao.execute("""
                     INSERT INTO clippings_app.clipping_results
                     (job_id, title, url, content, s3_uri_json, s3_uri_markdown, created_at)
-                    VALUES (:job_id, :title, :url, :content, :s3_uri_json, :s3_uri_markdown, NOW())
-                """)
-                
-                session.execute(
-                    query,
-                    {
-                        "job_id": job_id,
-                        "title": titulo,
-                        "url": url,
-                        "content": conteudo,
-                        "s3_uri_json": s3_uri_json,
-                        "s3_uri_markdown": s3_uri_markdown
-                    }
+                    VALUES ($1, $2, $3, $4, $5, $6, NOW())
+                """, job_id, titulo, url, conteudo, s3_uri_json, s3_uri_markdown)
+        except Exception as e:
+            logger.error(f"Erro ao salvar resultado: {e}")
+            raise
+    
+    async def _salvar_itens(self, job_id: str, itens: List[Dict[str, Any]],
+                            s3_uri_json: Optional[str] = None, s3_uri_markdown: Optional[str] = None) -> int:
+        """
+        Salva uma linha por item coletado usando COPY (um único round-trip).
+        
+        Linhas anteriores do mesmo job são substituídas na mesma transação,
+        para que uma nova tentativa não duplique os itens.
+        
+        Args:
+            job_id: ID do job
+            itens: Itens no schema do prompt (site, url, titulo, autor, data_iso, resumo_2l, score)
+            s3_uri_json: URI do arquivo JSON no S3
+            s3_uri_markdown: URI do arquivo Markdown no S3
+            
+        Returns:
+            Quantidade de linhas gravadas
+        """
+        registros = [
+            (
+                job_id,
+                str(item["site"])[:255] if item.get("site") else None,
+                item.get("titulo") or "Sem título",
+                str(item["autor"])[:255] if item.get("autor") else None,
+                _data_publicacao(item.get("data_iso")),
+                item["url"],
+                item.get("texto") or item.get("resumo_2l"),
+                s3_uri_json,
+                s3_uri_markdown,
+                _score(item.get("score")),
+            )
+            for item in itens
+            if isinstance(item, dict) and item.get("url")
+        ]
+        if not registros:
+            return 0
+        try:
+            async with self._conexao() as conexao:
+                async with conexao.transaction():
+                    await conexao.execute("DELETE FROM clippings_app.clipping_results WHERE job_id = $1", job_id)
+                    await conexao.copy_records_to_table(
+                        "clipping_results",
+                        schema_name="clippings_app",
+                        columns=[
+                            "job_id", "source_name", "title", "author", "date_published",
+                            "url", "content", "s3_uri_json", "s3_uri_markdown", "score",
+                        ],
+                        records=registros
+                    )
+        except Exception as e:
+            logger.error(f"Erro ao salvar itens do clipping: {e}")
+            raise
+        return len(registros)
+    
+    async def _buscar_resultados(
+        self,
+        consulta: str,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        fontes: Optional[List[str]] = None,
+        ordem: str = "relevancia",
+        apos: Optional[tuple] = None,
+        limite: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        Busca textual (português) nos resultados de clipping com paginação por keyset.
+        
+        A consulta aceita a sintaxe de websearch_to_tsquery ("frase exata",
+        OR, -termo). O ts_headline (caro) só é calculado para as linhas da página.
+        
+        Args:
+            consulta: Texto da busca
+            data_inicio: Data de publicação mínima (inclusiva)
+            data_fim: Data de publicação máxima (exclusiva)
+            fontes: Filtra por source_name
+            ordem: 'relevancia' (rank, created_at, id) ou 'recentes' (created_at, id)
+            apos: Chave de ordenação da última linha da página anterior
+            limite: Linhas por página
+            
+        Returns:
+            Linhas com rank, trechos destacados e a chave de ordenação ("chave")
+        """
+        por_relevancia = ordem == "relevancia"
+        parametros = [consulta, data_inicio, data_fim, fontes or None, limite]
+        ordenacao = "rank DESC, created_at DESC, id DESC" if por_relevancia else "created_at DESC, id DESC"
+        keyset = "TRUE"
+        if apos:
+            rank_apos, criado_apos, id_apos = apos
+            if por_relevancia:
+                keyset = "(rank, created_at, id) < ($6::real, $7::timestamp, $8::uuid)"
+                parametros += [rank_apos, criado_apos, id_apos]
+            else:
+                keyset = "(created_at, id) < ($6::timestamp, $7::uuid)"
+                parametros += [criado_apos, id_apos]
+        
+        async with self._conexao() as conexao:
+            rows = await conexao.fetch(f"""
+                WITH busca AS (
+                    SELECT websearch_to_tsquery('portuguese', $1) AS q
+                ),
+                candidatos AS (
+                    SELECT r.id, r.created_at, r.job_id, r.source_name, r.title, r.author,
+                           r.date_published, r.url, r.score, r.s3_uri_json, r.content,
+                           ts_rank_cd(r.search_vector, busca.q, 32) AS rank
+                    FROM clippings_app.clipping_results r, busca
+                    WHERE r.search_vector @@ busca.q
+                      AND ($2::timestamp IS NULL OR r.date_published >= $2)
+                      AND ($3::timestamp IS NULL OR r.date_published < $3)
+                      AND ($4::varchar[] IS NULL OR r.source_name = ANY($4))
+                ),
+                pagina AS (
+                    SELECT * FROM candidatos
+                    WHERE {keyset}
+                    ORDER BY {ordenacao}
+                    LIMIT $5
                 )
-                session.commit()
-            except Exception as e:
-                session.rollback()
-                logger.error(f"Erro ao salvar resultado: {e}")
+                SELECT p.id, p.created_at, p.job_id, p.source_name, p.title, p.author,
+                       p.date_published, p.url, p.score, p.s3_uri_json, p.rank,
+                       ts_headline('portuguese', p.title, busca.q,
+                                   'StartSel=<mark>, StopSel=</mark>, HighlightAll=true') AS title_highlight,
+                       ts_headline('portuguese', COALESCE(p.content, ''), busca.q,
+                                   'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=35, MinWords=15') AS content_highlight
+                FROM pagina p, busca
+                ORDER BY {ordenacao}
+            """, *parametros)
+        
+        resultados = []
+        for row in rows:
+            item = dict(row)
+            item["id"] = str(row["id"])
+            item["chave"] = (row["rank"] if por_relevancia else None, row["created_at"], str(row["id"]))
+            resultados.append(item)
+        return resultados
+    
+    async def _salvar_checkpoint(self, job_id: str, etapa: str, dados: Dict[str, Any]) -> None:
+        """
+        Persiste a saída de uma etapa concluída do pipeline.
+        
+        Args:
+            job_id: ID do job
+            etapa: Nome da etapa (browser, file, notification)
+            dados: Saída serializável da etapa
+        """
+        try:
+            async with self._conexao() as conexao:
+                await conexao.execute("""
+                    INSERT INTO clippings_app.job_stage_checkpoints (job_id, stage, output, created_at)
+                    VALUES ($1, $2, $3::jsonb, NOW())
+                    ON CONFLICT (job_id, stage) DO UPDATE
+                    SET output = EXCLUDED.output, created_at = NOW()
+                """, job_id, etapa, dados)
+        except Exception as e:
+            logger.error(f"Erro ao salvar checkpoint: {e}")
+            raise
+    
+    async def _carregar_checkpoints(self, job_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Carrega as saídas das etapas já concluídas de um job.
+        
+        Args:
+            job_id: ID do job
+        
+        Returns:
+            Dicionário etapa -> saída persistida
+        """
+        async with self._conexao() as conexao:
+            rows = await conexao.fetch("""
+                SELECT stage, output
+                FROM clippings_app.job_stage_checkpoints
+                WHERE job_id = $1
+            """, job_id)
+        return {row["stage"]: row["output"] for row in rows}
+    
+    async def _limpar_checkpoints(self, job_id: str) -> None:
+        """
+        Remove os checkpoints de um job concluído.
+        
+        Args:
+            job_id: ID do job
+        """
+        try:
+            async with self._conexao() as conexao:
+                await conexao.execute("DELETE FROM clippings_app.job_stage_checkpoints WHERE job_id = $1", job_id)
+        except Exception as e:
+            logger.error(f"Erro ao limpar checkpoints: {e}")
+            raise
+    
+    async def _carregar_watermarks(self, dominios: List[str]) -> Dict[str, datetime]:
+        """
+        Carrega a data mais recente já vista pela descoberta em cada domínio.
+        
+        Args:
+            dominios: Domínios (sem www)
+        
+        Returns:
+            Dicionário domínio -> última data vista
+        """
+        if not dominios:
+            return {}
+        async with self._conexao() as conexao:
+            rows = await conexao.fetch("""
+                SELECT domain, last_seen_at
+                FROM clippings_app.discovery_watermarks
+                WHERE domain = ANY($1::varchar[])
+            """, list(dominios))
+        return {row["domain"]: row["last_seen_at"] for row in rows}
+    
+    async def _salvar_watermark(self, dominio: str, visto_em: datetime) -> None:
+        """
+        Avança o watermark de descoberta de um domínio (nunca retrocede).
+        
+        Args:
+            dominio: Domínio (sem www)
+            visto_em: Data da entrada mais recente encontrada
+        """
+        try:
+            async with self._conexao() as conexao:
+                await conexao.execute("""
+                    INSERT INTO clippings_app.discovery_watermarks (domain, last_seen_at, updated_at)
+                    VALUES ($1, $2, NOW())
+                    ON CONFLICT (domain) DO UPDATE
+                    SET last_seen_at = GREATEST(clippings_app.discovery_watermarks.last_seen_at, EXCLUDED.last_seen_at),
+                        updated_at = NOW()
+                """, dominio, visto_em)
+        except Exception as e:
+            logger.error(f"Erro ao salvar watermark: {e}")
+            raise
+    
+    async def _carregar_artigos(self, cliente: str, publicados_desde: datetime, limite: int = 500) -> List[Dict[str, Any]]:
+        """
+        Carrega os artigos já clipados para o cliente publicados dentro do período (mais recentes primeiro).
+        
+        Args:
+            cliente: Cliente do clipping (o score depende dos termos do cliente)
+            publicados_desde: Data de publicação mínima
+            limite: Máximo de artigos carregados
+        
+        Returns:
+            Linhas com url_key, content_hash, item e minhash
+        """
+        async with self._conexao() as conexao:
+            rows = await conexao.fetch("""
+                SELECT url_key, content_hash, item, minhash
+                FROM clippings_app.articles
+                WHERE client = $1 AND date_published >= $2
+                ORDER BY date_published DESC
+                LIMIT $3
+            """, cliente, publicados_desde, limite)
+        return [dict(row) for row in rows]
+    
+    async def _salvar_artigos(self, cliente: str, artigos: List[Dict[str, Any]]) -> int:
+        """
+        Insere ou atualiza artigos no repositório compartilhado entre jobs.
+        
+        Args:
+            cliente: Cliente do clipping
+            artigos: Dicionários com url_key, content_hash, item (schema do prompt) e minhash
+        
+        Returns:
+            Quantidade de artigos gravados
+        """
+        registros = [
+            (
+                artigo["url_key"],
+                cliente,
+                artigo["item"]["url"],
+                artigo.get("content_hash"),
+                str(artigo["item"]["site"])[:255] if artigo["item"].get("site") else None,
+                artigo["item"].get("titulo"),
+                _data_publicacao(artigo["item"].get("data_iso")),
+                _score(artigo["item"].get("score")),
+                artigo["item"],
+                artigo.get("minhash"),
+            )
+            for artigo in artigos
+            if artigo.get("url_key") and artigo.get("item", {}).get("url")
+        ]
+        if not registros:
+            return 0
+        try:
+            async with self._conexao() as conexao:
+                await conexao.executemany("""
+                    INSERT INTO clippings_app.articles
+                    (url_key, client, url, content_hash, site, title, date_published, score, item, minhash,
+                     first_seen_at, last_seen_at)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9::jsonb, $10, NOW(), NOW())
+                    ON CONFLICT (url_key, client) DO UPDATE
+                    SET url = EXCLUDED.url,
+                        content_hash = EXCLUDED.content_hash,
+                        site = EXCLUDED.site,
+                        title = EXCLUDED.title,
+                        date_published = COALESCE(EXCLUDED.date_published, clippings_app.articles.date_published),
+                        score = EXCLUDED.score,
+                        item = EXCLUDED.item,
+                        minhash = COALESCE(EXCLUDED.minhash, clippings_app.articles.minhash),
+                        last_seen_at = NOW()
+                """, registros)
+        except Exception as e:
+            logger.error(f"Erro ao salvar artigos: {e}")
+            raise
+        return len(registros)
+    
+    async def _obter_cache_llm(self, chave: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca uma interpretação de instrução ainda válida no cache persistente.
+        
+        Args:
+            chave: Chave do cache (hash da instrução normalizada, modelo e versão do prompt)
+        
+        Returns:
+            Interpretação armazenada ou None
+        """
+        async with self._conexao() as conexao:
+            return await conexao.fetchval("""
+                SELECT result
+                FROM clippings_app.llm_interpretation_cache
+                WHERE cache_key = $1 AND expires_at > NOW()
+            """, chave)
+    
+    async def _salvar_cache_llm(self, chave: str, modelo: str, versao_prompt: str,
+                                resultado: Dict[str, Any], ttl_segundos: int) -> None:
+        """
+        Grava uma interpretação no cache persistente, removendo entradas expiradas.
+        
+        Args:
+            chave: Chave do cache
+            modelo: Modelo LLM usado
+            versao_prompt: Versão do prompt de interpretação
+            resultado: Interpretação retornada pelo LLM
+            ttl_segundos: Validade da entrada
+        """
+        try:
+            async with self._conexao() as conexao:
+                async with conexao.transaction():
+                    await conexao.execute("""
+                        INSERT INTO clippings_app.llm_interpretation_cache
+                        (cache_key, model, prompt_version, result, created_at, expires_at)
+                        VALUES ($1, $2, $3, $4::jsonb, NOW(), NOW() + make_interval(secs => $5))
+                        ON CONFLICT (cache_key) DO UPDATE
+                        SET result = EXCLUDED.result, created_at = NOW(), expires_at = EXCLUDED.expires_at
+                    """, chave, modelo, versao_prompt, resultado, float(ttl_segundos))
+                    await conexao.execute("DELETE FROM clippings_app.llm_interpretation_cache WHERE expires_at <= NOW()")
+        except Exception as e:
+            logger.error(f"Erro ao salvar cache do LLM: {e}")
+            raise
+    
+    async def _salvar_logs_execucao(self, registros: List[tuple]) -> None:
+        """
+        Grava um lote de eventos dos agentes em agent_execution_logs.
+        
+        Cada evento também é notificado em CANAL_EVENTOS_JOB (pg_notify) para
+        o acompanhamento ao vivo via SSE, no mesmo round-trip do lote.
+        
+        Args:
+            registros: Tuplas (job_id, agent_name, event_type, message, input_tokens,
+                output_tokens, cost_usd, metadata, timestamp)
+        """
+        if not registros:
+            return
+        try:
+            async with self._conexao() as conexao:
+                await conexao.executemany("""
+                    INSERT INTO clippings_app.agent_execution_logs
+                    (job_id, agent_name, event_type, message, input_tokens, output_tokens, cost_usd, metadata, timestamp)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7::float8, $8::jsonb, $9)
+                """, registros)
+                await conexao.execute(
+                    "SELECT pg_notify($1, payload) FROM unnest($2::text[]) AS payload",
+                    CANAL_EVENTOS_JOB,
+                    [
+                        _payload_evento({
+                            "job_id": registro[0],
+                            "agent": registro[1],
+                            "event": registro[2],
+                            "message": registro[3],
+                            "timestamp": registro[8].isoformat(),
+                        })
+                        for registro in registros
+                    ]
+                )
+        except Exception as e:
+            logger.error(f"Erro ao salvar logs de execução: {e}")
+            raise
+    
+    async def _listar_eventos_job(
+        self,
+        job_id: str,
+        apos: Optional[datetime] = None,
+        apos_id: Optional[str] = None,
+        limite: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """
+        Uma página dos eventos já gravados de um job (histórico antes do acompanhamento ao vivo).
+        
+        Args:
+            job_id: ID do job
+            apos: Só eventos posteriores a este instante (Last-Event-ID do SSE)
+            apos_id: Com apos, id do último evento da página anterior (desempata timestamps iguais)
+            limite: Máximo de eventos
+        
+        Returns:
+            Eventos no mesmo formato do payload de CANAL_EVENTOS_JOB, mais o "id"
+            do log (chave da próxima página)
+        """
+        if apos is not None and apos_id is not None:
+            keyset = "(timestamp, id) > ($2, $3::uuid)"
+            parametros = [job_id, apos, apos_id, limite]
+        else:
+            keyset = "($2::timestamp IS NULL OR timestamp > $2)"
+            parametros = [job_id, apos, limite]
+        async with self._conexao() as conexao:
+            rows = await conexao.fetch(f"""
+                SELECT id, agent_name, event_type, message, timestamp
+                FROM clippings_app.agent_execution_logs
+                WHERE job_id = $1 AND {keyset}
+                ORDER BY timestamp, id
+                LIMIT ${len(parametros)}
+            """, *parametros)
+        return [
+            {
+                "id": str(row["id"]),
+                "job_id": job_id,
+                "agent": row["agent_name"],
+                "event": row["event_type"],
+                "message": _truncar_utf8(row["message"], _LIMITE_MENSAGEM_EVENTO),
+                "timestamp": row["timestamp"].isoformat(),
+            }
+            for row in rows
+        ]
+    
+    async def _escutar(self, canal: str, callback) -> None:
+        """
+        Assina um canal LISTEN/NOTIFY numa conexão dedicada (fora do pool).
+        
+        O callback recebe o payload (str) e é chamado no event loop do banco;
+        quem consome em outro loop deve repassar com call_soon_threadsafe.
+        Se a conexão de escuta cair, ela é reaberta em background e todos os
+        canais voltam a ser escutados (notificações enviadas enquanto ela
+        estava fora se perdem; o histórico fica em agent_execution_logs).
+        
+        Args:
+            canal: Nome do canal
+            callback: Função chamada com o payload de cada notificação
+        """
+        def ouvinte(conexao, pid, nome, payload) -> None:
+            callback(payload)
+        
+        self._escutas.setdefault(canal, []).append(ouvinte)
+        if self._conexao_escuta is None or self._conexao_escuta.is_closed():
+            try:
+                await self._abrir_conexao_escuta()
+            except Exception:
+                self._escutas[canal].remove(ouvinte)
                 raise
+        else:
+            await self._conexao_escuta.add_listener(canal, ouvinte)
+    
+    async def _abrir_conexao_escuta(self) -> None:
+        """Abre a conexão de escuta e registra todos os canais assinados."""
+        conexao = await asyncpg.connect(self.database_url)
+        try:
+            for canal, ouvintes in self._escutas.items():
+                for ouvinte in ouvintes:
+                    await conexao.add_listener(canal, ouvinte)
+        except Exception:
+            await conexao.close()
+            raise
+        conexao.add_termination_listener(self._ao_perder_escuta)
+        self._conexao_escuta = conexao
+    
+    def _ao_perder_escuta(self, conexao: asyncpg.Connection) -> None:
+        """Chamado pelo asyncpg quando a conexão de escuta termina."""
+        if self._fechando or conexao is not self._conexao_escuta:
+            return
+        if self._reconexao_escuta is None or self._reconexao_escuta.done():
+            logger.warning("Conexão de escuta LISTEN/NOTIFY perdida; reconectando")
+            self._reconexao_escuta = self.loop.create_task(self._reabrir_escuta())
+    
+    async def _reabrir_escuta(self) -> None:
+        espera = 1.0
+        while not self._fechando:
+            try:
+                await self._abrir_conexao_escuta()
+                logger.info(f"Escuta LISTEN/NOTIFY restabelecida ({', '.join(self._escutas)})")
+                return
+            except Exception as e:
+                logger.warning(f"Falha ao reabrir conexão de escuta: {e}; nova tentativa em {espera:.0f}s")
+                await asyncio.sleep(espera)
+                espera = min(espera * 2, 30.0)
+    
+    # API síncrona (threads do worker) e assíncrona (asyncio), sobre o mesmo pool
+    criar_job = _sincrono(_criar_job)
+    criar_job_async = _assincrono(_criar_job)
+    criar_jobs = _sincrono(_criar_jobs)
+    criar_jobs_async = _assincrono(_criar_jobs)
+    marcar_jobs_falhos = _sincrono(_marcar_jobs_falhos)
+    marcar_jobs_falhos_async = _assincrono(_marcar_jobs_falhos)
+    listar_jobs = _sincrono(_listar_jobs)
+    listar_jobs_async = _assincrono(_listar_jobs)
+    obter_jobs = _sincrono(_obter_jobs)
+    obter_jobs_async = _assincrono(_obter_jobs)
+    carregar_metadata = _sincrono(_carregar_metadata)
+    carregar_metadata_async = _assincrono(_carregar_metadata)
+    atualizar_job = _sincrono(_atualizar_job)
+    atualizar_job_async = _assincrono(_atualizar_job)
+    salvar_resultado = _sincrono(_salvar_resultado)
+    salvar_resultado_async = _assincrono(_salvar_resultado)
+    salvar_itens = _sincrono(_salvar_itens)
+    salvar_itens_async = _assincrono(_salvar_itens)
+    buscar_resultados = _sincrono(_buscar_resultados)
+    buscar_resultados_async = _assincrono(_buscar_resultados)
+    salvar_checkpoint = _sincrono(_salvar_checkpoint)
+    salvar_checkpoint_async = _assincrono(_salvar_checkpoint)
+    carregar_checkpoints = _sincrono(_carregar_checkpoints)
+    carregar_checkpoints_async = _assincrono(_carregar_checkpoints)
+    limpar_checkpoints = _sincrono(_limpar_checkpoints)
+    limpar_checkpoints_async = _assincrono(_limpar_checkpoints)
+    carregar_watermarks = _sincrono(_carregar_watermarks)
+    carregar_watermarks_async = _assincrono(_carregar_watermarks)
+    salvar_watermark = _sincrono(_salvar_watermark)
+    salvar_watermark_async = _assincrono(_salvar_watermark)
+    carregar_artigos = _sincrono(_carregar_artigos)
+    carregar_artigos_async = _assincrono(_carregar_artigos)
+    salvar_artigos = _sincrono(_salvar_artigos)
+    salvar_artigos_async = _assincrono(_salvar_artigos)
+    obter_cache_llm = _sincrono(_obter_cache_llm)
+    obter_cache_llm_async = _assincrono(_obter_cache_llm)
+    salvar_cache_llm = _sincrono(_salvar_cache_llm)
+    salvar_cache_llm_async = _assincrono(_salvar_cache_llm)
+    salvar_logs_execucao = _sincrono(_salvar_logs_execucao)
+    salvar_logs_execucao_async = _assincrono(_salvar_logs_execucao)
+    listar_eventos_job = _sincrono(_listar_eventos_job)
+    listar_eventos_job_async = _assincrono(_listar_eventos_job)
+    escutar = _sincrono(_escutar)
+    escutar_async = _assincrono(_escutar)
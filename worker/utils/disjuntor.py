@@ -0,0 +1,196 @@
+"""
+Circuit breaker compartilhado para dependências externas (Browserless).
+
+Cada tentativa de job fazia sua própria checagem (/json/version, handshake
+WebSocket) com timeouts longos e esperas fixas entre retries: com o
+Browserless fora do ar, todos os slots do worker ficavam minutos presos. O
+disjuntor guarda o estado de saúde uma vez por processo:
+
+- fechado: as chamadas passam e a última sonda bem-sucedida vale por
+  ``ttl_saude`` segundos (uma única thread sonda por vez; as demais esperam
+  o resultado em vez de repetir a checagem);
+- aberto: após ``limite_falhas`` falhas seguidas, ``permitir`` levanta
+  ``CircuitoAberto`` na hora e uma thread em background sonda a dependência
+  a cada ``intervalo_sonda`` segundos; a primeira sonda bem-sucedida fecha
+  o circuito.
+"""
+
+from typing import Any, Callable, Dict, Optional
+import logging
+import threading
+import time
+
+from .retry import DependenciaIndisponivel
+
+logger = logging.getLogger(__name__)
+
+FECHADO = "fechado"
+ABERTO = "aberto"
+
+
+class CircuitoAberto(DependenciaIndisponivel):
+    """Dependência marcada como fora do ar; a chamada nem foi tentada."""
+    
+    def __init__(self, nome: str, ultimo_erro: Optional[str], nova_sonda_em: float):
+        super().__init__(
+            f"{nome} indisponível (circuito aberto; próxima sonda em {nova_sonda_em:.0f}s): {ultimo_erro}"
+        )
+        self.nome = nome
+        self.nova_sonda_em = nova_sonda_em
+
+
+class Disjuntor:
+    """Estado de saúde compartilhado de uma dependência, com sonda em background enquanto aberto."""
+    
+    def __init__(
+        self,
+        nome: str,
+        sonda: Callable[[], Any],
+        limite_falhas: int = 3,
+        intervalo_sonda: float = 15.0,
+        ttl_saude: float = 30.0
+    ):
+        """
+        Inicializa o disjuntor (fechado, sem sonda feita).
+        
+        Args:
+            nome: Nome da dependência (logs e mensagens de erro)
+            sonda: Checagem de saúde; levanta exceção se a dependência estiver fora
+                e devolve um valor reaproveitável enquanto saudável (ex.: URL CDP)
+            limite_falhas: Falhas seguidas que abrem o circuito
+            intervalo_sonda: Intervalo entre sondas com o circuito aberto
+            ttl_saude: Validade de uma sonda bem-sucedida
+        """
+        self.nome = nome
+        self.sonda = sonda
+        self.limite_falhas = max(1, int(limite_falhas))
+        self.intervalo_sonda = max(1.0, float(intervalo_sonda))
+        self.ttl_saude = max(0.0, float(ttl_saude))
+        self._lock = threading.Lock()
+        self._lock_sonda = threading.Lock()
+        self._parar = threading.Event()
+        self._thread_sonda: Optional[threading.Thread] = None
+        self._estado = FECHADO
+        self._falhas = 0
+        self._ultimo_erro: Optional[str] = None
+        self._aberto_em: Optional[float] = None
+        self._valor: Any = None
+        self._saudavel_ate = 0.0
+    
+    @property
+    def estado(self) -> str:
+        return self._estado
+    
+    def permitir(self) -> None:
+        """
+        Falha imediatamente se o circuito estiver aberto.
+        
+        Raises:
+            CircuitoAberto: Dependência fora do ar
+        """
+        with self._lock:
+            if self._estado != ABERTO:
+                return
+            decorrido = time.monotonic() - (self._aberto_em or 0.0)
+            nova_sonda_em = max(0.0, self.intervalo_sonda - decorrido % self.intervalo_sonda)
+            raise CircuitoAberto(self.nome, self._ultimo_erro, nova_sonda_em)
+    
+    def verificar(self) -> Any:
+        """
+        Garante que a dependência está saudável, sondando só se o cache expirou.
+        
+        Returns:
+            Valor devolvido pela última sonda bem-sucedida
+        
+        Raises:
+            CircuitoAberto: Circuito aberto (inclusive se esta sonda o abriu)
+            Exception: Erro da sonda, enquanto o limite de falhas não foi atingido
+        """
+        self.permitir()
+        if time.monotonic() < self._saudavel_ate:
+            return self._valor
+        with self._lock_sonda:
+            # Outra thread pode ter sondado enquanto esta esperava
+            self.permitir()
+            if time.monotonic() < self._saudavel_ate:
+                return self._valor
+            try:
+                valor = self.sonda()
+            except Exception as e:
+                self.registrar_falha(e)
+                self.permitir()
+                raise
+            self._marcar_saudavel(valor)
+            return valor
+    
+    def registrar_sucesso(self) -> None:
+        """Zera as falhas seguidas (chamada bem-sucedida à dependência)."""
+        with self._lock:
+            self._falhas = 0
+    
+    def registrar_falha(self, erro: BaseException) -> None:
+        """
+        Conta uma falha da dependência; ao atingir o limite, abre o circuito.
+        
+        Args:
+            erro: Exceção observada (sonda ou uso real da dependência)
+        """
+        with self._lock:
+            self._falhas += 1
+            self._ultimo_erro = f"{type(erro).__name__}: {erro}"
+            self._saudavel_ate = 0.0  # Próxima chamada sonda de novo
+            if self._estado == ABERTO or self._falhas < self.limite_falhas:
+                return
+            self._estado = ABERTO
+            self._aberto_em = time.monotonic()
+            if self._thread_sonda is None:
+                self._thread_sonda = threading.Thread(
+                    target=self._sondar_em_background, name=f"disjuntor-{self.nome}", daemon=True
+                )
+                self._thread_sonda.start()
+        logger.error(
+            f"Circuito de {self.nome} aberto após {self.limite_falhas} falhas seguidas: {self._ultimo_erro}"
+        )
+    
+    def _marcar_saudavel(self, valor: Any) -> None:
+        with self._lock:
+            reaberto = self._estado == ABERTO
+            self._estado = FECHADO
+            self._falhas = 0
+            self._valor = valor
+            self._saudavel_ate = time.monotonic() + self.ttl_saude
+            fora_por = time.monotonic() - (self._aberto_em or 0.0)
+            self._aberto_em = None
+        if reaberto:
+            logger.info(f"Circuito de {self.nome} fechado: dependência voltou após {fora_por:.0f}s")
+    
+    def _sondar_em_background(self) -> None:
+        while not self._parar.wait(self.intervalo_sonda):
+            with self._lock:
+                if self._estado != ABERTO:
+                    self._thread_sonda = None  # Uma nova abertura inicia outra sonda
+                    return
+            try:
+                valor = self.sonda()
+            except Exception as e:
+                with self._lock:
+                    self._ultimo_erro = f"{type(e).__name__}: {e}"
+                logger.debug(f"Sonda de {self.nome} falhou: {e}")
+                continue
+            self._marcar_saudavel(valor)
+    
+    def metricas(self) -> Dict[str, Any]:
+        """Estado atual do circuito (para logs e health checks)."""
+        with self._lock:
+            return {
+                "estado": self._estado,
+                "falhas_seguidas": self._falhas,
+                "ultimo_erro": self._ultimo_erro,
+                "aberto_ha_segundos": (
+                    round(time.monotonic() - self._aberto_em, 1) if self._aberto_em is not None else None
+                ),
+            }
+    
+    def fechar(self) -> None:
+        """Encerra a sonda em background."""
+        self._parar.set()
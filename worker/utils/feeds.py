@@ -0,0 +1,210 @@
+"""
+Leitura de sitemaps (XML/índices/Google News) e feeds RSS/Atom.
+
+Usa apenas a biblioteca padrão (xml.etree e html.parser) para transformar
+sitemaps e feeds em entradas {url, titulo, resumo, publicado_em}, usadas
+pela etapa de descoberta de artigos.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from html import unescape
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+# Tipos de <link rel="alternate"> que apontam para feeds
+TIPOS_FEED = ("application/rss+xml", "application/atom+xml", "application/xml", "text/xml")
+
+# Caminhos tentados quando o site não declara sitemap/feed
+CAMINHOS_SITEMAP = ("sitemap.xml", "sitemap_index.xml", "news-sitemap.xml", "post-sitemap.xml")
+CAMINHOS_FEED = ("feed/", "rss/", "feed.xml", "rss.xml", "atom.xml")
+
+_RE_TAGS = re.compile(r"<[^>]+>")
+_RE_ESPACOS = re.compile(r"\s+")
+_RE_ISO = re.compile(r"^\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?(Z|[+-]\d{2}:?\d{2})?$")
+
+
+def _limpar(texto: Optional[str]) -> str:
+    """Remove tags e normaliza espaços/entidades de títulos e resumos."""
+    if not texto:
+        return ""
+    return _RE_ESPACOS.sub(" ", unescape(_RE_TAGS.sub(" ", texto))).strip()
+
+
+def _nome(elemento: ET.Element) -> str:
+    """Nome local da tag, sem namespace."""
+    return elemento.tag.rsplit("}", 1)[-1].lower() if isinstance(elemento.tag, str) else ""
+
+
+def _filhos(elemento: ET.Element, nome: str) -> List[ET.Element]:
+    return [filho for filho in elemento if _nome(filho) == nome]
+
+
+def _texto_filho(elemento: ET.Element, *nomes: str) -> Optional[str]:
+    """Texto do primeiro descendente com um dos nomes informados."""
+    for nome in nomes:
+        for descendente in elemento.iter():
+            if descendente is not elemento and _nome(descendente) == nome and (descendente.text or "").strip():
+                return descendente.text.strip()
+    return None
+
+
+def interpretar_data(valor: Optional[str]) -> Optional[datetime]:
+    """
+    Converte datas de sitemap (W3C/ISO 8601) e RSS (RFC 822) para datetime UTC sem fuso.
+    
+    Args:
+        valor: Data textual
+    
+    Returns:
+        datetime em UTC (naive) ou None se não for possível interpretar
+    """
+    if not valor:
+        return None
+    valor = valor.strip()
+    data = None
+    if _RE_ISO.match(valor):
+        try:
+            data = datetime.fromisoformat(valor.replace("Z", "+00:00").replace(" ", "T", 1))
+        except ValueError:
+            data = None
+    if data is None:
+        try:
+            data = parsedate_to_datetime(valor)
+        except (TypeError, ValueError, IndexError):
+            return None
+    if data.tzinfo is not None:
+        data = data.astimezone(timezone.utc).replace(tzinfo=None)
+    return data
+
+
+def _parse_xml(conteudo: bytes) -> Optional[ET.Element]:
+    try:
+        return ET.fromstring(conteudo)
+    except ET.ParseError:
+        return None
+
+
+def analisar_sitemap(conteudo: bytes) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Interpreta um sitemap ou índice de sitemaps.
+    
+    Args:
+        conteudo: XML do sitemap
+    
+    Returns:
+        Tupla (sitemaps filhos, entradas). Filhos e entradas têm url e publicado_em;
+        entradas de sitemaps Google News trazem também o título.
+    """
+    raiz = _parse_xml(conteudo)
+    if raiz is None:
+        return [], []
+    
+    filhos: List[Dict[str, Any]] = []
+    entradas: List[Dict[str, Any]] = []
+    if _nome(raiz) == "sitemapindex":
+        for sitemap in _filhos(raiz, "sitemap"):
+            loc = _texto_filho(sitemap, "loc")
+            if loc:
+                filhos.append({"url": loc, "publicado_em": interpretar_data(_texto_filho(sitemap, "lastmod"))})
+    elif _nome(raiz) == "urlset":
+        for url in _filhos(raiz, "url"):
+            loc = _texto_filho(url, "loc")
+            if not loc:
+                continue
+            entradas.append({
+                "url": loc,
+                "titulo": _limpar(_texto_filho(url, "title")),
+                "resumo": "",
+                # news:publication_date é a data de publicação; lastmod é o fallback
+                "publicado_em": interpretar_data(_texto_filho(url, "publication_date", "lastmod")),
+            })
+    return filhos, entradas
+
+
+def analisar_feed(conteudo: bytes, url_base: str) -> List[Dict[str, Any]]:
+    """
+    Interpreta um feed RSS 2.0, RSS 1.0 (RDF) ou Atom.
+    
+    Args:
+        conteudo: XML do feed
+        url_base: URL do feed (para resolver links relativos)
+    
+    Returns:
+        Entradas com url, titulo, resumo e publicado_em
+    """
+    raiz = _parse_xml(conteudo)
+    if raiz is None:
+        return []
+    
+    entradas: List[Dict[str, Any]] = []
+    for item in raiz.iter():
+        nome = _nome(item)
+        if nome == "item":
+            link = _texto_filho(item, "link", "guid")
+        elif nome == "entry":
+            link = None
+            for elemento_link in _filhos(item, "link"):
+                if elemento_link.get("rel", "alternate") == "alternate" and elemento_link.get("href"):
+                    link = elemento_link.get("href")
+                    break
+        else:
+            continue
+        if not link:
+            continue
+        resumo = _texto_filho(item, "description", "summary", "content") or ""
+        entradas.append({
+            "url": urljoin(url_base, link.strip()),
+            "titulo": _limpar(_texto_filho(item, "title")),
+            "resumo": _limpar(resumo),
+            "publicado_em": interpretar_data(_texto_filho(item, "pubdate", "published", "date", "updated")),
+        })
+    return entradas
+
+
+class _ParserLinksFeed(HTMLParser):
+    """Coleta <link rel="alternate"> de feeds declarados na página."""
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.feeds: List[str] = []
+    
+    def handle_starttag(self, tag, attrs):
+        if tag != "link":
+            return
+        atributos = {nome: (valor or "") for nome, valor in attrs}
+        if "alternate" in atributos.get("rel", "").lower().split() and atributos.get("type", "").lower() in TIPOS_FEED:
+            if atributos.get("href"):
+                self.feeds.append(atributos["href"])
+
+
+def encontrar_feeds(html: str, url_base: str) -> List[str]:
+    """
+    Lista os feeds RSS/Atom declarados no <head> da página.
+    
+    Args:
+        html: HTML da homepage
+        url_base: URL da página
+    
+    Returns:
+        URLs absolutas dos feeds
+    """
+    parser = _ParserLinksFeed()
+    try:
+        parser.feed(html)
+    except Exception:
+        pass
+    return list(dict.fromkeys(urljoin(url_base, feed) for feed in parser.feeds))
+
+
+def sitemaps_do_robots(robots_txt: str) -> List[str]:
+    """Extrai as diretivas 'Sitemap:' do robots.txt."""
+    sitemaps = []
+    for linha in robots_txt.splitlines():
+        chave, _, valor = linha.partition(":")
+        if chave.strip().lower() == "sitemap" and valor.strip():
+            sitemaps.append(valor.strip())
+    return sitemaps
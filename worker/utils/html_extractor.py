@@ -0,0 +1,361 @@
+"""
+Extração determinística de artigos a partir de HTML estático.
+
+Usa apenas a biblioteca padrão (html.parser) para obter título, data,
+autor, seção e corpo principal de páginas de notícia renderizadas no
+servidor, e para listar links de artigos em páginas de listagem.
+"""
+
+from typing import Any, Dict, List, Optional
+import json
+import re
+from datetime import datetime
+from html import unescape
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+
+# Tags cujo conteúdo nunca faz parte do corpo do artigo
+TAGS_IGNORADAS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form", "svg", "iframe", "button"}
+
+# Tags de bloco que quebram parágrafos
+TAGS_BLOCO = {"p", "div", "br", "li", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "blockquote", "tr"}
+
+# Classes/ids que indicam o corpo principal (mesma prioridade do prompt)
+MARCADORES_CORPO = ("conteudo", "texto", "content", "entry-content", "post-content", "article-body", "materia")
+
+# Trechos de caminho que não são artigos
+CAMINHOS_EXCLUIDOS = (
+    "/tag/", "/tags/", "/categoria/", "/category/", "/autor/", "/author/", "/page/", "/pagina/",
+    "/wp-content/", "/wp-admin/", "/login", "/cadastro", "/assine", "/busca", "/search", "/feed",
+    "/contato", "/sobre", "/politica", "/privacidade", "/termos",
+)
+EXTENSOES_EXCLUIDAS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".mp4", ".mp3", ".zip", ".doc", ".docx", ".xls", ".xlsx")
+
+MIN_CARACTERES_CORPO = 200
+
+_RE_ESPACOS = re.compile(r"\s+")
+_RE_DATA_ISO = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+_RE_DATA_BR = re.compile(r"\b(\d{1,2})/(\d{1,2})/(\d{4})\b")
+_RE_DATA_URL = re.compile(r"/(20\d{2})/(\d{1,2})/(\d{1,2})/")
+
+
+def _limpar(texto: Optional[str]) -> str:
+    """Normaliza espaços e entidades HTML."""
+    if not texto:
+        return ""
+    return _RE_ESPACOS.sub(" ", unescape(texto)).strip()
+
+
+def normalizar_data(valor: Optional[str]) -> Optional[str]:
+    """
+    Converte datas nos formatos aceitos pelo prompt para YYYY-MM-DD.
+    
+    Args:
+        valor: Data em ISO 8601 ou DD/MM/YYYY
+    
+    Returns:
+        Data ISO ou None se não for possível interpretar
+    """
+    if not valor:
+        return None
+    match = _RE_DATA_ISO.search(valor)
+    if match:
+        ano, mes, dia = (int(parte) for parte in match.groups())
+    else:
+        match = _RE_DATA_BR.search(valor)
+        if not match:
+            return None
+        dia, mes, ano = (int(parte) for parte in match.groups())
+    try:
+        return datetime(ano, mes, dia).strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+class _ParserArtigo(HTMLParser):
+    """Coleta metadados, JSON-LD, links e blocos de texto de uma página."""
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta: Dict[str, str] = {}
+        self.json_ld: List[str] = []
+        self.titulo_tag = ""
+        self.h1 = ""
+        self.datas_time: List[str] = []
+        self.links: List[Dict[str, str]] = []
+        self.blocos: List[Dict[str, Any]] = []
+        
+        self._pilha_ignorada = 0
+        self._em_title = False
+        self._em_h1 = False
+        self._em_json_ld = False
+        self._buffer_json_ld: List[str] = []
+        self._link_atual: Optional[Dict[str, str]] = None
+        self._profundidade_corpo = 0
+        self._profundidade_article = 0
+        self._profundidade_main = 0
+        self._pilha_tags: List[Dict[str, bool]] = []
+        self._texto_atual: List[str] = []
+    
+    def handle_starttag(self, tag, attrs):
+        atributos = {chave: (valor or "") for chave, valor in attrs}
+        
+        if tag == "meta":
+            chave = (atributos.get("property") or atributos.get("name") or atributos.get("itemprop") or "").lower()
+            if chave and atributos.get("content") and chave not in self.meta:
+                self.meta[chave] = atributos["content"]
+            return
+        if tag == "script" and "ld+json" in atributos.get("type", "").lower():
+            self._em_json_ld = True
+            self._buffer_json_ld = []
+            return
+        if tag in ("br", "img", "hr", "input", "link"):
+            if tag == "br":
+                self._quebrar_bloco()
+            return
+        
+        if tag in TAGS_BLOCO:
+            self._quebrar_bloco()
+        
+        classes = f"{atributos.get('class', '')} {atributos.get('id', '')}".lower()
+        marcador_corpo = any(marcador in classes for marcador in MARCADORES_CORPO)
+        ignorada = tag in TAGS_IGNORADAS or "comment" in classes or "share" in classes or "related" in classes
+        self._pilha_tags.append({"tag": tag, "corpo": marcador_corpo, "ignorada": ignorada})
+        
+        if ignorada:
+            self._pilha_ignorada += 1
+        if marcador_corpo:
+            self._profundidade_corpo += 1
+        if tag == "article":
+            self._profundidade_article += 1
+        if tag == "main":
+            self._profundidade_main += 1
+        if tag == "title":
+            self._em_title = True
+        if tag == "h1":
+            self._em_h1 = True
+        if tag == "time" and atributos.get("datetime"):
+            self.datas_time.append(atributos["datetime"])
+        if tag == "a" and atributos.get("href"):
+            self._link_atual = {"href": atributos["href"], "texto": ""}
+    
+    def handle_endtag(self, tag):
+        if tag == "script" and self._em_json_ld:
+            self._em_json_ld = False
+            self.json_ld.append("".join(self._buffer_json_ld))
+            return
+        if tag == "title":
+            self._em_title = False
+        if tag == "h1":
+            self._em_h1 = False
+        if tag == "a" and self._link_atual is not None:
+            self._link_atual["texto"] = _limpar(self._link_atual["texto"])
+            self.links.append(self._link_atual)
+            self._link_atual = None
+        if tag in TAGS_BLOCO:
+            self._quebrar_bloco()
+        
+        # Desempilhar até a tag correspondente (HTML real nem sempre fecha tudo)
+        for indice in range(len(self._pilha_tags) - 1, -1, -1):
+            if self._pilha_tags[indice]["tag"] == tag:
+                for entrada in self._pilha_tags[indice:]:
+                    if entrada["ignorada"]:
+                        self._pilha_ignorada -= 1
+                    if entrada["corpo"]:
+                        self._profundidade_corpo -= 1
+                    if entrada["tag"] == "article":
+                        self._profundidade_article -= 1
+                    if entrada["tag"] == "main":
+                        self._profundidade_main -= 1
+                del self._pilha_tags[indice:]
+                break
+    
+    def handle_data(self, data):
+        if self._em_json_ld:
+            self._buffer_json_ld.append(data)
+            return
+        if self._em_title:
+            self.titulo_tag += data
+        if self._em_h1:
+            self.h1 += data
+        if self._link_atual is not None:
+            self._link_atual["texto"] += data
+        if self._pilha_ignorada <= 0:
+            self._texto_atual.append(data)
+    
+    def _quebrar_bloco(self) -> None:
+        texto = _limpar("".join(self._texto_atual))
+        self._texto_atual = []
+        if texto:
+            self.blocos.append({
+                "texto": texto,
+                "corpo": self._profundidade_corpo > 0,
+                "article": self._profundidade_article > 0,
+                "main": self._profundidade_main > 0,
+            })
+    
+    def close(self):
+        super().close()
+        self._quebrar_bloco()
+
+
+def _analisar(html: str) -> _ParserArtigo:
+    parser = _ParserArtigo()
+    try:
+        parser.feed(html or "")
+        parser.close()
+    except Exception:
+        # HTML malformado: usar o que foi coletado até aqui
+        pass
+    return parser
+
+
+def _objetos_json_ld(parser: _ParserArtigo) -> List[Dict[str, Any]]:
+    """Retorna os objetos JSON-LD do tipo artigo/notícia."""
+    objetos: List[Dict[str, Any]] = []
+    for bruto in parser.json_ld:
+        try:
+            dados = json.loads(bruto.strip())
+        except (json.JSONDecodeError, ValueError):
+            continue
+        pendentes = dados if isinstance(dados, list) else [dados]
+        while pendentes:
+            item = pendentes.pop(0)
+            if not isinstance(item, dict):
+                continue
+            if isinstance(item.get("@graph"), list):
+                pendentes.extend(item["@graph"])
+            tipo = item.get("@type")
+            tipos = tipo if isinstance(tipo, list) else [tipo]
+            if any(isinstance(t, str) and ("Article" in t or "Posting" in t) for t in tipos):
+                objetos.append(item)
+    return objetos
+
+
+def _nome_autor(valor: Any) -> Optional[str]:
+    if isinstance(valor, list):
+        nomes = [_nome_autor(item) for item in valor]
+        nomes = [nome for nome in nomes if nome]
+        return ", ".join(nomes) if nomes else None
+    if isinstance(valor, dict):
+        return _limpar(valor.get("name")) or None
+    if isinstance(valor, str):
+        return _limpar(valor) or None
+    return None
+
+
+def _corpo_principal(parser: _ParserArtigo) -> str:
+    """Escolhe o corpo principal seguindo a prioridade de seletores do prompt."""
+    candidatos = [
+        [b["texto"] for b in parser.blocos if b["main"] and b["article"]],
+        [b["texto"] for b in parser.blocos if b["article"] and b["corpo"]],
+        [b["texto"] for b in parser.blocos if b["corpo"]],
+        [b["texto"] for b in parser.blocos if b["main"]],
+        [b["texto"] for b in parser.blocos if b["article"]],
+    ]
+    for blocos in candidatos:
+        # Descartar linhas curtas (menus, botões, legendas)
+        paragrafos = [texto for texto in blocos if len(texto) >= 40]
+        texto = "\n\n".join(paragrafos)
+        if len(texto) >= MIN_CARACTERES_CORPO:
+            return texto
+    return ""
+
+
+def extrair_artigo(html: str, url: str) -> Dict[str, Any]:
+    """
+    Extrai metadados e corpo principal de uma página de artigo.
+    
+    Args:
+        html: Conteúdo HTML da página
+        url: URL da página (usada como fallback para a data)
+    
+    Returns:
+        Dicionário com titulo, data_iso, autor, secao, texto e exige_js
+    """
+    parser = _analisar(html)
+    json_ld = _objetos_json_ld(parser)
+    ld = json_ld[0] if json_ld else {}
+    meta = parser.meta
+    
+    titulo = (
+        _limpar(ld.get("headline"))
+        or _limpar(meta.get("og:title"))
+        or _limpar(parser.h1)
+        or _limpar(parser.titulo_tag)
+    )
+    
+    data_iso = None
+    for candidata in (
+        ld.get("datePublished"),
+        meta.get("article:published_time"),
+        meta.get("datepublished"),
+        meta.get("date"),
+        *parser.datas_time,
+    ):
+        data_iso = normalizar_data(candidata if isinstance(candidata, str) else None)
+        if data_iso:
+            break
+    if not data_iso:
+        match = _RE_DATA_URL.search(urlparse(url).path)
+        if match:
+            data_iso = normalizar_data(f"{match.group(1)}-{int(match.group(2)):02d}-{int(match.group(3)):02d}")
+    
+    autor = _nome_autor(ld.get("author")) or _limpar(meta.get("author")) or _limpar(meta.get("article:author")) or None
+    if autor and autor.startswith("http"):
+        autor = None
+    secao = _limpar(ld.get("articleSection") if isinstance(ld.get("articleSection"), str) else None) or _limpar(meta.get("article:section")) or None
+    
+    texto = _corpo_principal(parser)
+    if not texto and isinstance(ld.get("articleBody"), str):
+        texto = _limpar(ld["articleBody"])
+    
+    return {
+        "url": url,
+        "titulo": titulo,
+        "data_iso": data_iso,
+        "autor": autor,
+        "secao": secao,
+        "texto": texto,
+        "exige_js": len(texto) < MIN_CARACTERES_CORPO,
+    }
+
+
+def extrair_links_artigos(html: str, url_base: str, dominios: Optional[List[str]] = None) -> List[Dict[str, str]]:
+    """
+    Lista links que parecem artigos numa página de listagem.
+    
+    Args:
+        html: Conteúdo HTML da listagem
+        url_base: URL da página (para resolver links relativos)
+        dominios: Domínios permitidos (padrão: domínio da própria página)
+    
+    Returns:
+        Lista de {"url", "texto"} sem duplicatas, na ordem da página
+    """
+    parser = _analisar(html)
+    host_base = urlparse(url_base).netloc.lower()
+    permitidos = {dominio.lower().lstrip(".") for dominio in (dominios or [host_base])}
+    permitidos |= {dominio[4:] for dominio in permitidos if dominio.startswith("www.")}
+    
+    vistos = set()
+    links: List[Dict[str, str]] = []
+    for link in parser.links:
+        url = urljoin(url_base, link["href"]).split("#", 1)[0]
+        partes = urlparse(url)
+        host = partes.netloc.lower()
+        host_sem_www = host[4:] if host.startswith("www.") else host
+        if partes.scheme not in ("http", "https") or host_sem_www not in permitidos:
+            continue
+        caminho = partes.path.lower()
+        if caminho.endswith(EXTENSOES_EXCLUIDAS) or any(trecho in caminho for trecho in CAMINHOS_EXCLUIDOS):
+            continue
+        segmentos = [segmento for segmento in caminho.split("/") if segmento]
+        # Artigos têm slug com várias palavras (ex.: /noticias/demanda-por-chicotes-ev-cresce)
+        if not segmentos or max(segmento.count("-") for segmento in segmentos) < 3:
+            continue
+        if url in vistos:
+            continue
+        vistos.add(url)
+        links.append({"url": url, "texto": link["texto"]})
+    return links
@@ -0,0 +1,116 @@
+"""
+Extração de objetos JSON embutidos em texto livre.
+
+A saída dos agentes mistura raciocínio, markdown e o JSON final do
+clipping. Em vez de regex com `.*?` e DOTALL (que faz backtracking em
+saídas grandes e não entende objetos aninhados), o texto é percorrido uma
+única vez contando chaves e respeitando strings/escapes; cada objeto de
+nível superior vira um candidato e o que melhor casa com o schema do
+clipping é escolhido.
+"""
+
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+import json
+import re
+
+_RE_ESPECIAIS = re.compile(r'[{}"\\]')
+
+
+def iterar_objetos_json(texto: str) -> Iterator[Tuple[int, int]]:
+    """
+    Percorre o texto uma única vez e devolve os intervalos de cada objeto {...} de nível superior.
+    
+    Só os caracteres relevantes ({, }, aspas e barra invertida) são
+    visitados. Fora de objetos o texto é tratado como prosa (aspas soltas
+    não abrem strings); dentro deles, chaves em strings e escapes são
+    ignorados. Se o texto terminar com um objeto aberto (saída truncada ou
+    '{' solto na prosa), os objetos completos logo abaixo dele são devolvidos.
+    
+    Args:
+        texto: Texto livre contendo JSON
+    
+    Yields:
+        Tuplas (inicio, fim) tais que texto[inicio:fim] é um candidato
+    """
+    profundidade = 0
+    em_string = False
+    ignorar = -1
+    inicio = inicio_filho = 0
+    filhos = []
+    for match in _RE_ESPECIAIS.finditer(texto):
+        indice = match.start()
+        if indice == ignorar:
+            continue
+        caractere = texto[indice]
+        if profundidade == 0:
+            if caractere == "{":
+                profundidade, inicio, filhos = 1, indice, []
+            continue
+        if em_string:
+            if caractere == "\\":
+                ignorar = indice + 1
+            elif caractere == '"':
+                em_string = False
+        elif caractere == '"':
+            em_string = True
+        elif caractere == "{":
+            profundidade += 1
+            if profundidade == 2:
+                inicio_filho = indice
+        elif caractere == "}":
+            profundidade -= 1
+            if profundidade == 1:
+                filhos.append((inicio_filho, indice + 1))
+            elif profundidade == 0:
+                yield inicio, indice + 1
+    if profundidade > 0:
+        yield from filhos
+
+
+def extrair_json(
+    texto: Optional[str],
+    chaves_obrigatorias: Sequence[str] = ("itens",),
+    chaves_preferidas: Sequence[str] = ("metadata", "email_body_ptbr", "log_execucao"),
+    chaves_alternativas: Sequence[str] = ("metadata", "email_body_ptbr")
+) -> Optional[Dict[str, Any]]:
+    """
+    Escolhe o objeto JSON do texto que melhor casa com o schema esperado.
+    
+    Entre os candidatos válidos que têm todas as chaves obrigatórias e ao
+    menos uma das alternativas, vence o que tem mais chaves preferidas; em
+    empate, o último (a resposta final do agente costuma vir depois dos
+    rascunhos). Rascunhos do raciocínio com só ``itens`` nunca são aceitos
+    como o clipping.
+    
+    Args:
+        texto: Saída bruta do agente
+        chaves_obrigatorias: Chaves que o objeto precisa ter
+        chaves_preferidas: Chaves que aumentam a preferência pelo objeto
+        chaves_alternativas: O objeto precisa ter pelo menos uma delas (vazio = sem exigência)
+    
+    Returns:
+        Objeto escolhido ou None se nenhum candidato servir
+    """
+    if not texto:
+        return None
+    
+    melhor: Optional[Dict[str, Any]] = None
+    melhor_pontuacao = -1
+    for inicio, fim in iterar_objetos_json(texto):
+        try:
+            candidato = json.loads(texto[inicio:fim])
+        except ValueError:
+            continue
+        if not isinstance(candidato, dict):
+            continue
+        # O clipping pode vir embrulhado num objeto externo ({"resultado": {...}})
+        for objeto in [candidato] + [valor for valor in candidato.values() if isinstance(valor, dict)]:
+            if any(chave not in objeto for chave in chaves_obrigatorias):
+                continue
+            if chaves_alternativas and not any(chave in objeto for chave in chaves_alternativas):
+                continue
+            pontuacao = sum(1 for chave in chaves_preferidas if chave in objeto)
+            if pontuacao >= melhor_pontuacao:
+                melhor, melhor_pontuacao = objeto, pontuacao
+            break
+    return melhor
@@ -2,16 +2,78 @@
 Interpretador de Linguagem Natural usando LLM.
 
 Interpreta instruções em linguagem natural e extrai parâmetros estruturados.
+As interpretações ficam em cache em dois níveis (LRU em memória e uma
+camada persistente com TTL), pois o scheduler repete a mesma instrução
+todos os dias.
 """
 
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import copy
+import hashlib
 import json
 import logging
 import os
+import re
+import threading
+import time
+import unicodedata
 from openai import OpenAI
 
 logger = logging.getLogger(__name__)
 
+# Incrementar sempre que o prompt de interpretação mudar (invalida o cache)
+PROMPT_VERSION = "1"
+
+_RE_URL = re.compile(r'https?://[^\s<>"{}|\\^`\[\]]+')
+
+# Palavras-chave do tipo de conteúdo (sem acentos, minúsculas)
+PALAVRAS_TIPO = {
+    "noticia": ("noticia", "noticias", "clipping", "clippings", "manchete", "manchetes", "imprensa"),
+    "artigo": ("artigo", "artigos", "post", "posts", "blog", "materia", "materias"),
+    "produto": ("produto", "produtos", "preco", "precos", "catalogo", "loja"),
+}
+
+# Frases conhecidas de parâmetros: (regex sobre o texto sem acentos, parâmetro, valor)
+FRASES_PARAMETROS = [
+    (re.compile(r"\b(com|extrair|incluir) (as )?imagens\b"), "extrair_imagens", True),
+    (re.compile(r"\bsem imagens\b"), "extrair_imagens", False),
+    (re.compile(r"\b(com|extrair|incluir) (os )?links\b"), "extrair_links", True),
+    (re.compile(r"\bsem links\b"), "extrair_links", False),
+    (re.compile(r"\b(em|formato) markdown\b"), "formato", "markdown"),
+    (re.compile(r"\b(em|formato) json\b"), "formato", "json"),
+    (re.compile(r"\b(em|formato) pdf\b"), "formato", "pdf"),
+]
+_RE_PERIODO = re.compile(r"\b([uú]ltim[oa]s \d+ (dias?|semanas?|m[eê]s(es)?))(?!\w)")
+_RE_MAX_ITENS = re.compile(r"\b(\d{1,3}) (itens|noticias|artigos|materias)\b")
+
+
+class CacheLRU:
+    """Cache LRU thread-safe em memória."""
+    
+    def __init__(self, max_itens: int = 256):
+        """
+        Args:
+            max_itens: Quantidade máxima de entradas mantidas
+        """
+        self.max_itens = max(1, int(max_itens))
+        self._itens: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def obter(self, chave: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            valor = self._itens.get(chave)
+            if valor is not None:
+                self._itens.move_to_end(chave)
+            return valor
+    
+    def salvar(self, chave: str, valor: Dict[str, Any]) -> None:
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
 
 class LLMInterpreter:
     """Interpreta instruções em linguagem natural usando OpenAI."""
@@ -21,7 +83,11 @@ class LLMInterpreter:
         api_key: str,
         model: str = "gpt-4-turbo",
         input_cost_per_1k: float = 0.0,
-        output_cost_per_1k: float = 0.0
+        output_cost_per_1k: float = 0.0,
+        cache_persistente: Optional[Any] = None,
+        cache_ttl_seconds: int = 7 * 24 * 3600,
+        cache_max_itens: int = 256,
+        limiar_confianca: float = 0.7
     ):
         """
         Inicializa o interpretador LLM.
@@ -29,22 +95,80 @@ class LLMInterpreter:
         Args:
             api_key: Chave da API OpenAI
             model: Modelo a ser usado
+            cache_persistente: Segundo nível do cache (ex.: DatabaseManager); None usa só memória
+            cache_ttl_seconds: Validade das interpretações em cache (0 desativa o cache)
+            cache_max_itens: Tamanho do LRU em memória
+            limiar_confianca: Confiança mínima das regras para dispensar o LLM (acima de 1 desativa)
         """
         self.client = OpenAI(api_key=api_key)
         self.model = model
         self.input_cost_per_1k = input_cost_per_1k or 0.0
         self.output_cost_per_1k = output_cost_per_1k or 0.0
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.cache_persistente = cache_persistente
+        self.cache_memoria = CacheLRU(cache_max_itens)
+        self.limiar_confianca = limiar_confianca
     
-    def interpretar_instrucao(self, instrucao: str) -> Dict[str, Any]:
+    def chave_cache(self, instrucao: str) -> str:
+        """
+        Chave do cache: instrução normalizada + modelo + versão do prompt.
+        
+        Args:
+            instrucao: Instrução em linguagem natural
+            
+        Returns:
+            Hash SHA-256 hexadecimal
+        """
+        normalizada = " ".join(unicodedata.normalize("NFKC", instrucao).casefold().split())
+        return hashlib.sha256(f"{self.model}|{PROMPT_VERSION}|{normalizada}".encode("utf-8")).hexdigest()
+    
+    def interpretar_instrucao(
+        self,
+        instrucao: str,
+        url: Optional[str] = None,
+        parametros: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
         Interpreta uma instrução em linguagem natural e extrai parâmetros.
         
+        Ordem: mensagem já estruturada (url + parameters) -> regras
+        determinísticas com confiança >= limiar -> cache -> LLM.
+        
         Args:
             instrucao: Instrução em linguagem natural
+            url: URL já informada na mensagem (API/scheduler)
+            parametros: Parâmetros já informados na mensagem
             
         Returns:
             Dicionário com parâmetros estruturados
         """
+        regras = self.interpretar_por_regras(instrucao)
+        if url and parametros:
+            resultado = {**regras, "url": url}
+            resultado["llm_usage"] = self._uso_sem_custo(origem="mensagem")
+            logger.info("Mensagem já estruturada (url + parameters); LLM não consultado")
+            return resultado
+        if regras["confianca"] >= self.limiar_confianca:
+            resultado = dict(regras)
+            resultado["llm_usage"] = self._uso_sem_custo(origem="regras")
+            logger.info(f"Instrução interpretada por regras (confiança {regras['confianca']:.2f})")
+            return resultado
+        
+        chave = self.chave_cache(instrucao) if self.cache_ttl_seconds else None
+        if chave:
+            inicio = time.perf_counter()
+            em_cache, nivel = self._obter_do_cache(chave)
+            if em_cache is not None:
+                resultado = copy.deepcopy(em_cache)
+                resultado["llm_usage"] = self._uso_sem_custo(
+                    origem="cache",
+                    cache_hit=True,
+                    cache_nivel=nivel,
+                    latencia_ms=round((time.perf_counter() - inicio) * 1000, 2)
+                )
+                logger.info(f"Instrução interpretada a partir do cache ({nivel})")
+                return resultado
+        
         # Prompt otimizado para economia de tokens
         prompt = f"""Extraia da instrução: URL, tipo, parâmetros.
 
@@ -71,6 +195,8 @@ Retorne JSON:
             )
             
             resultado = json.loads(response.choices[0].message.content)
+            if chave:
+                self._salvar_no_cache(chave, resultado)
             
             usage_info = {
                 "prompt_tokens": getattr(response.usage, "prompt_tokens", 0) if response.usage else 0,
@@ -78,7 +204,9 @@ Retorne JSON:
                 "total_tokens": getattr(response.usage, "total_tokens", 0) if response.usage else 0,
                 "prompt_cost_usd": 0.0,
                 "completion_cost_usd": 0.0,
-                "total_cost_usd": 0.0
+                "total_cost_usd": 0.0,
+                "origem": "llm",
+                "cache_hit": False
             }
             if usage_info["prompt_tokens"]:
                 usage_info["prompt_cost_usd"] = (usage_info["prompt_tokens"] / 1000) * self.input_cost_per_1k
@@ -102,30 +230,114 @@ Retorne JSON:
             # Fallback: tentar extrair URL manualmente
             return self._fallback_interpret(instrucao)
     
-    def _fallback_interpret(self, instrucao: str) -> Dict[str, Any]:
+    def _obter_do_cache(self, chave: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
         """
-        Método fallback para extrair URL manualmente.
+        Busca a interpretação no LRU e, se não houver, no cache persistente.
+        
+        Returns:
+            Tupla (interpretação ou None, nível do cache: "memoria" ou "persistente")
+        """
+        resultado = self.cache_memoria.obter(chave)
+        if resultado is not None:
+            if resultado["expira_em"] > time.time():
+                return resultado["valor"], "memoria"
+        if self.cache_persistente is None:
+            return None, None
+        try:
+            valor = self.cache_persistente.obter_cache_llm(chave)
+        except Exception as e:
+            logger.warning(f"Erro ao consultar cache persistente do LLM: {e}")
+            return None, None
+        if valor is None:
+            return None, None
+        self.cache_memoria.salvar(chave, {"valor": valor, "expira_em": time.time() + self.cache_ttl_seconds})
+        return valor, "persistente"
+    
+    def _salvar_no_cache(self, chave: str, resultado: Dict[str, Any]) -> None:
+        """Grava a interpretação nos dois níveis do cache (falhas só geram aviso)."""
+        valor = copy.deepcopy(resultado)
+        self.cache_memoria.salvar(chave, {"valor": valor, "expira_em": time.time() + self.cache_ttl_seconds})
+        if self.cache_persistente is None:
+            return
+        try:
+            self.cache_persistente.salvar_cache_llm(chave, self.model, PROMPT_VERSION, valor, self.cache_ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Erro ao gravar cache persistente do LLM: {e}")
+    
+    def interpretar_por_regras(self, instrucao: str) -> Dict[str, Any]:
+        """
+        Interpretação determinística: URL, tipo e frases conhecidas de parâmetros.
+        
+        A confiança soma 0.5 pela URL, 0.2 pelo tipo e 0.1 por parâmetro
+        reconhecido (até 0.3).
         
         Args:
-            instrucao: Instrução original
+            instrucao: Instrução em linguagem natural
             
         Returns:
-            Dicionário básico com URL extraída
+            Dicionário no formato do LLM acrescido de 'confianca' (0 a 1)
         """
-        import re
+        texto = " ".join(
+            "".join(c for c in unicodedata.normalize("NFKD", instrucao) if not unicodedata.combining(c)).lower().split()
+        )
+        urls = _RE_URL.findall(instrucao)
+        confianca = 0.5 if urls else 0.0
+        
+        tipo = None
+        palavras = set(re.findall(r"\w+", texto))
+        for candidato, chaves in PALAVRAS_TIPO.items():
+            if palavras.intersection(chaves):
+                tipo = candidato
+                confianca += 0.2
+                break
         
-        # Tentar encontrar URL
-        url_pattern = r'https?://[^\s<>"{}|\\^`\[\]]+'
-        urls = re.findall(url_pattern, instrucao)
+        parametros: Dict[str, Any] = {"extrair_imagens": False, "extrair_links": True, "formato": "json"}
+        reconhecidos = 0
+        for regex, nome, valor in FRASES_PARAMETROS:
+            if regex.search(texto):
+                parametros[nome] = valor
+                reconhecidos += 1
+        periodo = _RE_PERIODO.search(" ".join(instrucao.lower().split()))
+        if periodo:
+            parametros["periodo"] = periodo.group(1)
+            reconhecidos += 1
+        max_itens = _RE_MAX_ITENS.search(texto)
+        if max_itens:
+            parametros["max_itens"] = int(max_itens.group(1))
+            reconhecidos += 1
+        confianca += min(reconhecidos, 3) * 0.1
         
         return {
-            "url": urls[0] if urls else None,
-            "tipo": "artigo",
-            "parametros": {
-                "extrair_imagens": False,
-                "extrair_links": True,
-                "formato": "both"
-            },
-            "instrucoes_especificas": instrucao
+            "url": urls[0].rstrip(".,;)") if urls else None,
+            "tipo": tipo or "artigo",
+            "parametros": parametros,
+            "instrucoes_especificas": instrucao,
+            "confianca": round(min(confianca, 1.0), 2)
         }
-
+    
+    @staticmethod
+    def _uso_sem_custo(**extras: Any) -> Dict[str, Any]:
+        """llm_usage de uma interpretação que não chamou o LLM."""
+        return {
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+            "prompt_cost_usd": 0.0,
+            "completion_cost_usd": 0.0,
+            "total_cost_usd": 0.0,
+            **extras
+        }
+    
+    def _fallback_interpret(self, instrucao: str) -> Dict[str, Any]:
+        """
+        Método fallback usado quando a chamada ao LLM falha.
+        
+        Args:
+            instrucao: Instrução original
+            
+        Returns:
+            Interpretação por regras (formato "both", como antes)
+        """
+        resultado = self.interpretar_por_regras(instrucao)
+        resultado["parametros"]["formato"] = "both"
+        return resultado
@@ -0,0 +1,169 @@
+"""
+Gravação em lote dos eventos dos agentes em agent_execution_logs.
+
+``BaseAgent.registrar_log`` apenas enfileira o evento em memória (sem I/O);
+uma thread de fundo grava os eventos em lotes, quando o buffer atinge
+``tamanho_lote`` ou a cada ``intervalo_segundos``. O job corrente é lido de
+``job_atual`` (ContextVar definida pelo worker ao processar a mensagem);
+eventos fora de um job ficam só no logger Python.
+"""
+
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import collections
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Job em processamento na thread/tarefa atual (definido em WorkerAgno.processar_mensagem)
+job_atual: ContextVar[Optional[str]] = ContextVar("job_atual", default=None)
+
+# Chaves de metadata mapeadas para as colunas de tokens e custo
+_CHAVES_INPUT_TOKENS = ("input_tokens", "prompt_tokens")
+_CHAVES_OUTPUT_TOKENS = ("output_tokens", "completion_tokens")
+_CHAVES_CUSTO = ("cost_usd", "total_cost_usd")
+
+
+def _primeiro_numero(metadata: Dict[str, Any], chaves: Tuple[str, ...]) -> Optional[float]:
+    for chave in chaves:
+        valor = metadata.get(chave)
+        if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            return valor
+    return None
+
+
+class EscritorLogsExecucao:
+    """Buffer em memória de eventos de agentes com gravação em lote numa thread de fundo."""
+    
+    def __init__(
+        self,
+        destino: Any,
+        tamanho_lote: int = 200,
+        intervalo_segundos: float = 2.0,
+        max_pendentes: int = 10000
+    ):
+        """
+        Inicializa o escritor e inicia a thread de gravação.
+        
+        Args:
+            destino: Objeto com ``salvar_logs_execucao(registros)`` (DatabaseManager)
+            tamanho_lote: Eventos por lote; atingido esse número a gravação é antecipada
+            intervalo_segundos: Intervalo máximo entre gravações
+            max_pendentes: Limite do buffer; acima dele os eventos mais antigos são descartados
+        """
+        self.destino = destino
+        self.tamanho_lote = max(1, tamanho_lote)
+        self.intervalo_segundos = max(0.1, intervalo_segundos)
+        self._pendentes: collections.deque = collections.deque(maxlen=max(self.tamanho_lote, max_pendentes))
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._metricas = {"registrados": 0, "gravados": 0, "descartados": 0, "falhas": 0}
+        
+        self._thread = threading.Thread(target=self._loop, name="agent-logs-writer", daemon=True)
+        self._thread.start()
+    
+    def registrar(
+        self,
+        agente: str,
+        evento: str,
+        mensagem: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        job_id: Optional[str] = None
+    ) -> None:
+        """
+        Enfileira um evento para gravação (não bloqueia nem acessa o banco).
+        
+        Args:
+            agente: Nome do agente
+            evento: Tipo do evento
+            mensagem: Mensagem do log
+            metadata: Metadados; tokens e custo são extraídos para as colunas próprias
+            job_id: ID do job (padrão: job da thread/tarefa atual)
+        """
+        job_id = job_id or job_atual.get()
+        if not job_id or self._parar.is_set():
+            return
+        metadata = metadata or {}
+        input_tokens = _primeiro_numero(metadata, _CHAVES_INPUT_TOKENS)
+        output_tokens = _primeiro_numero(metadata, _CHAVES_OUTPUT_TOKENS)
+        registro = (
+            job_id,
+            agente[:100],
+            evento[:100],
+            mensagem,
+            int(input_tokens) if input_tokens is not None else None,
+            int(output_tokens) if output_tokens is not None else None,
+            _primeiro_numero(metadata, _CHAVES_CUSTO),
+            metadata,
+            datetime.now(),
+        )
+        with self._lock:
+            if len(self._pendentes) == self._pendentes.maxlen:
+                self._metricas["descartados"] += 1
+            self._pendentes.append(registro)
+            self._metricas["registrados"] += 1
+            cheio = len(self._pendentes) >= self.tamanho_lote
+        if cheio:
+            self._acordar.set()
+    
+    def _retirar_lote(self) -> List[Tuple]:
+        with self._lock:
+            quantidade = min(self.tamanho_lote, len(self._pendentes))
+            return [self._pendentes.popleft() for _ in range(quantidade)]
+    
+    def descarregar(self) -> int:
+        """
+        Grava todos os eventos pendentes (chamado pela thread de fundo e no encerramento).
+        
+        Returns:
+            Quantidade de eventos gravados
+        """
+        gravados = 0
+        while True:
+            lote = self._retirar_lote()
+            if not lote:
+                return gravados
+            try:
+                self.destino.salvar_logs_execucao(lote)
+            except Exception as e:
+                # Não reenfileira: um banco fora do ar não pode fazer o buffer crescer sem limite
+                with self._lock:
+                    self._metricas["falhas"] += 1
+                    self._metricas["descartados"] += len(lote)
+                logger.warning(f"Erro ao gravar {len(lote)} logs de execução: {e}")
+                continue
+            gravados += len(lote)
+            with self._lock:
+                self._metricas["gravados"] += len(lote)
+    
+    def _loop(self) -> None:
+        while not self._parar.is_set():
+            self._acordar.wait(self.intervalo_segundos)
+            self._acordar.clear()
+            self.descarregar()
+    
+    def metricas(self) -> Dict[str, int]:
+        """
+        Contadores do escritor.
+        
+        Returns:
+            Dicionário com registrados, gravados, descartados, falhas e pendentes
+        """
+        with self._lock:
+            return {**self._metricas, "pendentes": len(self._pendentes)}
+    
+    def fechar(self, timeout: float = 30.0) -> None:
+        """
+        Para a thread de fundo e grava o que ainda estiver no buffer.
+        
+        Args:
+            timeout: Tempo máximo de espera pela thread de gravação
+        """
+        self._parar.set()
+        self._acordar.set()
+        self._thread.join(timeout=timeout)
+        self.descarregar()
+        logger.info(f"Escritor de logs de execução encerrado: {self.metricas()}")
@@ -0,0 +1,283 @@
+"""
+Pool de sessões MCP (Skyvern) reaproveitadas entre jobs.
+
+Cada job do SkyvernAgent criava um ``MCPTools`` novo: no transporte stdio
+isso lança ``python -m skyvern run mcp`` e refaz o handshake MCP; no HTTP,
+refaz a inicialização da sessão. O pool mantém as sessões abertas num event
+loop persistente e as empresta aos jobs; uma mesma sessão (um mesmo
+servidor) pode atender vários jobs ao mesmo tempo, já que o protocolo MCP
+multiplexa as chamadas por id.
+
+O cliente MCP usa task groups do anyio, que precisam ser abertos e
+fechados na mesma task: cada sessão vive numa task própria do loop do pool,
+que entra no ``async with`` e só sai quando a sessão é reciclada. Sessões
+que falham no ping, atingem o limite de usos ou terminaram um job com erro
+são recicladas.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SessaoMCP:
+    """Sessão MCP aberta e mantida pelo pool."""
+    
+    def __init__(self, ferramentas: Any):
+        """
+        Args:
+            ferramentas: MCPTools do Agno (ainda não conectado)
+        """
+        self.ferramentas = ferramentas
+        self.usos = 0
+        self.em_uso = 0
+        self.descartar = False
+        self.criada_em = time.time()
+        self._encerrar = asyncio.Event()
+        self._tarefa: Optional[asyncio.Task] = None
+    
+    @property
+    def aberta(self) -> bool:
+        """Indica se a task que mantém a conexão continua viva."""
+        return self._tarefa is not None and not self._tarefa.done()
+
+
+class PoolSessoesMCP:
+    """Pool de sessões MCP num event loop persistente, compartilhadas entre jobs."""
+    
+    def __init__(
+        self,
+        fabrica_ferramentas: Callable[[], Any],
+        tamanho: int = 1,
+        jobs_por_sessao: int = 4,
+        max_usos: int = 50,
+        timeout_conexao: float = 60.0,
+        loop: Optional[asyncio.AbstractEventLoop] = None
+    ):
+        """
+        Inicializa o pool (as sessões são abertas sob demanda ou em aquecer()).
+        
+        Args:
+            fabrica_ferramentas: Função que cria o MCPTools (http ou stdio)
+            tamanho: Número máximo de sessões (servidores/conexões) abertas
+            jobs_por_sessao: Jobs simultâneos atendidos por uma mesma sessão
+            max_usos: Jobs atendidos por sessão antes de reciclar
+            timeout_conexao: Tempo máximo para abrir uma sessão (spawn + handshake)
+            loop: Event loop já em execução (modo assíncrono do worker); None cria um loop dedicado
+        """
+        self.fabrica_ferramentas = fabrica_ferramentas
+        self.tamanho = max(1, int(tamanho))
+        self.jobs_por_sessao = max(1, int(jobs_por_sessao))
+        self.max_usos = max(1, int(max_usos))
+        self.timeout_conexao = timeout_conexao
+        self._sessoes: List[SessaoMCP] = []
+        self._abrindo = 0
+        self._condicao: Optional[asyncio.Condition] = None
+        self._fechado = False
+        
+        # Event loop persistente: as sessões MCP ficam presas ao loop (e à task) que as abriu
+        self._loop_proprio = loop is None
+        self.loop = loop or asyncio.new_event_loop()
+        if self._loop_proprio:
+            self._thread_loop = threading.Thread(
+                target=self.loop.run_forever, name="mcp-pool-loop", daemon=True
+            )
+            self._thread_loop.start()
+    
+    def executar(self, coro, timeout: Optional[float] = None) -> Any:
+        """
+        Executa uma corrotina no event loop do pool e aguarda o resultado.
+        
+        Args:
+            coro: Corrotina a executar
+            timeout: Tempo máximo de espera em segundos
+        
+        Returns:
+            Resultado da corrotina
+        """
+        futuro = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return futuro.result(timeout=timeout)
+        except TimeoutError:
+            futuro.cancel()
+            raise
+    
+    async def aguardar(self, coro) -> Any:
+        """
+        Aguarda uma corrotina no loop do pool a partir de qualquer event loop.
+        
+        Args:
+            coro: Corrotina que usa sessões do pool
+        
+        Returns:
+            Resultado da corrotina
+        """
+        if asyncio.get_running_loop() is self.loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+    
+    def aquecer(self) -> None:
+        """Abre a primeira sessão em background (falhas só geram aviso; o job tenta de novo)."""
+        async def _aquecer() -> None:
+            try:
+                sessao = await self.adquirir()
+            except Exception as e:
+                logger.warning(f"Falha ao pré-aquecer sessão MCP: {e}")
+                return
+            sessao.usos -= 1  # Aquecimento não conta como job
+            await self.devolver(sessao)
+        
+        asyncio.run_coroutine_threadsafe(_aquecer(), self.loop)
+    
+    def _obter_condicao(self) -> asyncio.Condition:
+        # Criada no loop do pool (primeira chamada já roda nele)
+        if self._condicao is None:
+            self._condicao = asyncio.Condition()
+        return self._condicao
+    
+    async def adquirir(self) -> SessaoMCP:
+        """
+        Empresta a sessão saudável menos ocupada (abre uma nova ou espera se todas estiverem cheias).
+        
+        Deve ser aguardada no loop do pool (via ``aguardar``/``executar``).
+        
+        Returns:
+            Sessão MCP conectada
+        """
+        condicao = self._obter_condicao()
+        async with condicao:
+            while True:
+                if self._fechado:
+                    raise RuntimeError("Pool MCP encerrado")
+                # Conexões que caíram sozinhas (ex.: servidor stdio morreu) liberam a vaga
+                for sessao in [item for item in self._sessoes if not item.aberta and item.em_uso == 0]:
+                    self._sessoes.remove(sessao)
+                disponiveis = [
+                    sessao for sessao in self._sessoes
+                    if sessao.aberta and not sessao.descartar and sessao.em_uso < self.jobs_por_sessao
+                ]
+                if disponiveis:
+                    sessao = min(disponiveis, key=lambda item: item.em_uso)
+                    if sessao.em_uso == 0 and not await self._saudavel(sessao):
+                        logger.info("Sessão MCP reprovada no health check; reciclando")
+                        sessao.descartar = True
+                        await self._encerrar_sessao(sessao)
+                        continue
+                    break
+                if len(self._sessoes) + self._abrindo < self.tamanho:
+                    self._abrindo += 1
+                    try:
+                        # Abertura fora do lock: outros jobs podem usar as sessões existentes
+                        condicao.release()
+                        try:
+                            sessao = await self._abrir_sessao()
+                        finally:
+                            await condicao.acquire()
+                    finally:
+                        self._abrindo -= 1
+                        condicao.notify_all()  # Vaga liberada se a abertura falhou
+                    self._sessoes.append(sessao)
+                    break
+                await condicao.wait()
+            sessao.em_uso += 1
+            sessao.usos += 1
+            return sessao
+    
+    async def devolver(self, sessao: SessaoMCP, descartar: bool = False) -> None:
+        """
+        Devolve a sessão ao pool após o job.
+        
+        Args:
+            sessao: Sessão obtida em adquirir()
+            descartar: Força a reciclagem (ex.: erro durante o job)
+        """
+        condicao = self._obter_condicao()
+        async with condicao:
+            sessao.em_uso -= 1
+            if descartar or self._fechado or sessao.usos >= self.max_usos or not sessao.aberta:
+                sessao.descartar = True
+            if sessao.descartar and sessao.em_uso == 0:
+                await self._encerrar_sessao(sessao)
+            condicao.notify_all()
+    
+    async def _abrir_sessao(self) -> SessaoMCP:
+        """Cria o MCPTools e o mantém conectado numa task dedicada do loop do pool."""
+        sessao = SessaoMCP(self.fabrica_ferramentas())
+        pronta: asyncio.Future = self.loop.create_future()
+        sessao._tarefa = self.loop.create_task(self._manter_sessao(sessao, pronta))
+        try:
+            await asyncio.wait_for(asyncio.shield(pronta), timeout=self.timeout_conexao)
+        except BaseException:
+            sessao._encerrar.set()
+            sessao._tarefa.cancel()
+            raise
+        logger.info(f"Nova sessão MCP aberta no pool ({len(self._sessoes) + 1}/{self.tamanho})")
+        return sessao
+    
+    @staticmethod
+    async def _manter_sessao(sessao: SessaoMCP, pronta: asyncio.Future) -> None:
+        """Task dona da conexão: entra e sai do contexto do MCPTools na mesma task."""
+        try:
+            async with sessao.ferramentas:
+                pronta.set_result(None)
+                await sessao._encerrar.wait()
+        except BaseException as e:
+            if not pronta.done():
+                pronta.set_exception(e)
+            elif not isinstance(e, asyncio.CancelledError):
+                logger.warning(f"Sessão MCP encerrada com erro: {e}")
+            if isinstance(e, (asyncio.CancelledError, KeyboardInterrupt, SystemExit)):
+                raise
+    
+    async def _encerrar_sessao(self, sessao: SessaoMCP) -> None:
+        """Fecha a conexão da sessão e a remove do pool."""
+        if sessao in self._sessoes:
+            self._sessoes.remove(sessao)
+        sessao._encerrar.set()
+        if sessao._tarefa is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(sessao._tarefa), timeout=30)
+        except asyncio.TimeoutError:
+            sessao._tarefa.cancel()
+        except Exception as e:
+            logger.debug(f"Erro ao encerrar sessão MCP: {e}")
+    
+    @staticmethod
+    async def _saudavel(sessao: SessaoMCP) -> bool:
+        """Ping MCP rápido antes de entregar uma sessão ociosa a um job."""
+        cliente = getattr(sessao.ferramentas, "session", None)
+        ping = getattr(cliente, "send_ping", None)
+        if ping is None:
+            return sessao.aberta
+        try:
+            await asyncio.wait_for(ping(), timeout=10)
+            return True
+        except Exception as e:
+            logger.debug(f"Health check da sessão MCP falhou: {e}")
+            return False
+    
+    def fechar(self) -> None:
+        """Encerra todas as sessões (e o event loop do pool, se for próprio)."""
+        async def _fechar() -> None:
+            condicao = self._obter_condicao()
+            async with condicao:
+                self._fechado = True
+                for sessao in list(self._sessoes):
+                    sessao.descartar = True
+                    if sessao.em_uso == 0:
+                        await self._encerrar_sessao(sessao)
+                condicao.notify_all()
+        
+        try:
+            self.executar(_fechar(), timeout=60)
+        except Exception as e:
+            logger.warning(f"Erro ao encerrar o pool MCP: {e}")
+        if self._loop_proprio:
+            self.loop.call_soon_threadsafe(self.loop.stop)
@@ -0,0 +1,135 @@
+"""
+Armazenamento de result_metadata grandes no MinIO.
+
+O resultado do SuperAgent (reasoning e passos do browser-use, conteúdo bruto)
+pode chegar a megabytes de JSONB por job, inflando o TOAST de clipping_jobs.
+Acima de um limiar o payload vai comprimido (gzip) para o MinIO e a linha
+guarda só um resumo e o ponteiro::
+
+    {"_externo": {"uri": "s3://clippings/metadata/<job_id>.json.gz", ...},
+     "resumo": {...}}
+
+``carregar`` faz o caminho inverso e devolve o payload original; metadata
+pequeno (ou já inline) passa pelos dois métodos sem alteração.
+"""
+
+from typing import Any, Dict, Optional
+import gzip
+import io
+import json
+import logging
+
+from minio import Minio
+
+logger = logging.getLogger(__name__)
+
+CHAVE_EXTERNO = "_externo"
+_PROFUNDIDADE_RESUMO = 3
+_LIMITE_TEXTO_RESUMO = 500
+
+
+def _resumir(valor: Any, profundidade: int = 0) -> Any:
+    """Mantém a estrutura e os escalares; listas viram contagens e textos longos são cortados."""
+    if isinstance(valor, dict):
+        if profundidade >= _PROFUNDIDADE_RESUMO:
+            return {"chaves": len(valor)}
+        return {chave: _resumir(item, profundidade + 1) for chave, item in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return {"total": len(valor)}
+    if isinstance(valor, str) and len(valor) > _LIMITE_TEXTO_RESUMO:
+        return valor[:_LIMITE_TEXTO_RESUMO] + "…"
+    return valor
+
+
+def externo(metadata: Optional[Dict[str, Any]]) -> bool:
+    """Indica se o metadata é apenas o resumo + ponteiro para o MinIO."""
+    return isinstance(metadata, dict) and CHAVE_EXTERNO in metadata
+
+
+class ArmazenamentoMetadata:
+    """Move result_metadata acima do limiar para o MinIO e o recupera sob demanda."""
+    
+    def __init__(self, minio_config: Dict[str, Any], limiar_bytes: int = 256 * 1024, prefixo: str = "metadata"):
+        """
+        Inicializa o armazenamento.
+        
+        Args:
+            minio_config: endpoint, access_key, secret_key, bucket e use_ssl
+            limiar_bytes: Tamanho do JSON acima do qual o payload sai do banco
+            prefixo: Prefixo dos objetos no bucket
+        """
+        self.limiar_bytes = limiar_bytes
+        self.prefixo = prefixo.strip("/")
+        self.bucket = minio_config.get("bucket", "clippings")
+        self.minio = Minio(
+            minio_config["endpoint"],
+            access_key=minio_config["access_key"],
+            secret_key=minio_config["secret_key"],
+            secure=minio_config.get("use_ssl", False)
+        )
+        self._bucket_verificado = False
+    
+    def externalizar(self, job_id: str, metadata: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Envia o metadata para o MinIO se passar do limiar.
+        
+        Args:
+            job_id: ID do job (nome do objeto)
+            metadata: Resultado do job
+        
+        Returns:
+            O próprio metadata (pequeno) ou o resumo com o ponteiro
+        """
+        if not metadata or externo(metadata):
+            return metadata
+        dados = json.dumps(metadata, ensure_ascii=False, default=str).encode("utf-8")
+        if len(dados) <= self.limiar_bytes:
+            return metadata
+        
+        comprimido = gzip.compress(dados, compresslevel=6)
+        objeto = f"{self.prefixo}/{job_id}.json.gz"
+        if not self._bucket_verificado:
+            if not self.minio.bucket_exists(self.bucket):
+                self.minio.make_bucket(self.bucket)
+            self._bucket_verificado = True
+        self.minio.put_object(
+            self.bucket,
+            objeto,
+            io.BytesIO(comprimido),
+            length=len(comprimido),
+            content_type="application/gzip"
+        )
+        logger.info(
+            f"result_metadata do job {job_id} movido para o MinIO "
+            f"({len(dados)} bytes, {len(comprimido)} comprimido)"
+        )
+        return {
+            CHAVE_EXTERNO: {
+                "uri": f"s3://{self.bucket}/{objeto}",
+                "bucket": self.bucket,
+                "objeto": objeto,
+                "bytes": len(dados),
+                "bytes_comprimidos": len(comprimido),
+            },
+            "resumo": _resumir(metadata),
+        }
+    
+    def carregar(self, metadata: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Recupera o payload completo de um metadata externalizado.
+        
+        Args:
+            metadata: Valor de result_metadata como está no banco
+        
+        Returns:
+            Metadata original (ou o próprio valor se não for externo)
+        """
+        if not externo(metadata):
+            return metadata
+        ponteiro = metadata[CHAVE_EXTERNO]
+        resposta = self.minio.get_object(ponteiro["bucket"], ponteiro["objeto"])
+        try:
+            return json.loads(gzip.decompress(resposta.read()))
+        finally:
+            resposta.close()
+            resposta.release_conn()
@@ -0,0 +1,281 @@
+"""
+Publicador de longa duração para a fila de jobs.
+
+Uma única conexão pika assíncrona (``SelectConnection``) com publisher
+confirms vive numa thread dedicada, cujo ioloop também processa heartbeats.
+Outras threads (ou a API asyncio, via ``asyncio.wrap_future``) entregam
+lotes com ``publicar`` e recebem um Future resolvido quando o broker
+confirma todas as mensagens. O lote inteiro é publicado de uma vez e as
+confirmações (acks/nacks, inclusive os ``multiple``) chegam de forma
+assíncrona, rastreadas pelo delivery tag: um lote de 1000 jobs custa
+poucas idas e voltas ao broker, não 1000. Como pika não é thread-safe, a
+publicação é agendada no ioloop com ``add_callback_threadsafe``.
+"""
+
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Set, Tuple
+import functools
+import json
+import logging
+import threading
+
+import pika
+from pika.spec import Basic
+
+logger = logging.getLogger(__name__)
+
+
+class PublicadorIndisponivel(Exception):
+    """Sem conexão com o RabbitMQ: nenhuma mensagem do lote foi publicada."""
+
+
+class FalhaPublicacao(Exception):
+    """Parte do lote não foi confirmada; as demais mensagens foram confirmadas pelo broker."""
+    
+    def __init__(self, mensagem: str, falhas: List[int], incertas: Optional[List[int]] = None):
+        super().__init__(mensagem)
+        self.falhas = falhas  # Índices (no lote) recusados (nack/unroutable) ou nunca enviados
+        self.incertas = incertas or []  # Enviados, mas a conexão caiu antes da confirmação
+
+
+class _Lote:
+    """Confirmações pendentes de um lote publicado."""
+    
+    def __init__(self, total: int, futuro: Future):
+        self.total = total
+        self.futuro = futuro
+        self.restantes = total
+        self.falhas: List[int] = []
+        self.incertas: List[int] = []
+        self.motivos: Set[str] = set()
+    
+    def registrar(self, indice: int, motivo: Optional[str] = None, incerta: bool = False) -> None:
+        self.restantes -= 1
+        if motivo is not None:
+            (self.incertas if incerta else self.falhas).append(indice)
+            self.motivos.add(motivo)
+        if self.restantes == 0:
+            self.concluir()
+    
+    def concluir(self) -> None:
+        if self.futuro.done():
+            return
+        if self.falhas or self.incertas:
+            self.futuro.set_exception(FalhaPublicacao(
+                f"{len(self.falhas) + len(self.incertas)} de {self.total} mensagens não confirmadas "
+                f"({', '.join(sorted(self.motivos))})",
+                sorted(self.falhas),
+                sorted(self.incertas)
+            ))
+        else:
+            self.futuro.set_result(self.total)
+
+
+class PublicadorJobs:
+    """Conexão persistente com publisher confirms para publicar jobs em lote."""
+    
+    def __init__(self, rabbitmq_url: str, fila: str = "clippings.jobs", espera_reconexao: float = 5.0):
+        """
+        Inicializa o publicador e inicia a thread da conexão.
+        
+        Args:
+            rabbitmq_url: URL AMQP do RabbitMQ
+            fila: Fila de destino (declarada durável, como no worker)
+            espera_reconexao: Intervalo entre tentativas de reconexão
+        """
+        self.rabbitmq_url = rabbitmq_url
+        self.fila = fila
+        self.espera_reconexao = espera_reconexao
+        self._conexao: Optional[pika.SelectConnection] = None
+        self._canal = None
+        self._conectado = threading.Event()
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+        self._pendentes: Set[Future] = set()
+        
+        # Estado do canal, acessado só pela thread do ioloop
+        self._proxima_tag = 1
+        self._aguardando: Dict[int, Tuple[_Lote, int, Optional[str]]] = {}
+        self._devolvidas: Set[str] = set()
+        
+        self._thread = threading.Thread(target=self._loop, name="rabbitmq-publisher", daemon=True)
+        self._thread.start()
+    
+    def _loop(self) -> None:
+        while not self._parar.is_set():
+            try:
+                self._conexao = pika.SelectConnection(
+                    pika.URLParameters(self.rabbitmq_url),
+                    on_open_callback=self._ao_abrir_conexao,
+                    on_open_error_callback=self._ao_falhar_conexao,
+                    on_close_callback=self._ao_fechar_conexao
+                )
+                # Executa as publicações agendadas, confirmações e heartbeats até a conexão cair
+                self._conexao.ioloop.start()
+            except Exception as e:
+                if not self._parar.is_set():
+                    logger.warning(f"Conexão do publicador perdida: {e}; reconectando em {self.espera_reconexao}s")
+            finally:
+                self._conectado.clear()
+                self._canal = None
+                self._falhar_pendentes(PublicadorIndisponivel("Conexão com o RabbitMQ encerrada antes da confirmação"))
+                self._conexao = None
+            self._parar.wait(self.espera_reconexao)
+    
+    def _ao_abrir_conexao(self, conexao: pika.SelectConnection) -> None:
+        conexao.channel(on_open_callback=self._ao_abrir_canal)
+    
+    def _ao_falhar_conexao(self, conexao: pika.SelectConnection, erro: Exception) -> None:
+        if not self._parar.is_set():
+            logger.warning(f"Publicador não conseguiu conectar ao RabbitMQ: {erro}; reconectando em {self.espera_reconexao}s")
+        conexao.ioloop.stop()
+    
+    def _ao_fechar_conexao(self, conexao: pika.SelectConnection, motivo: Exception) -> None:
+        if not self._parar.is_set():
+            logger.warning(f"Conexão do publicador perdida: {motivo}; reconectando em {self.espera_reconexao}s")
+        conexao.ioloop.stop()
+    
+    def _ao_abrir_canal(self, canal) -> None:
+        self._canal = canal
+        canal.add_on_close_callback(self._ao_fechar_canal)
+        canal.add_on_return_callback(self._ao_devolver)
+        canal.queue_declare(
+            queue=self.fila,
+            durable=True,
+            callback=lambda _: canal.confirm_delivery(self._ao_confirmar, callback=lambda _: self._canal_pronto())
+        )
+    
+    def _canal_pronto(self) -> None:
+        self._proxima_tag = 1
+        self._aguardando.clear()
+        self._devolvidas.clear()
+        self._conectado.set()
+        logger.info("Publicador conectado ao RabbitMQ (publisher confirms ativo)")
+    
+    def _ao_fechar_canal(self, canal, motivo: Exception) -> None:
+        # Canal fechado pelo broker: derruba a conexão para o loop reconectar do zero
+        self._conectado.clear()
+        self._canal = None
+        if self._conexao is not None and self._conexao.is_open:
+            self._conexao.close()
+    
+    def _ao_devolver(self, canal, metodo, propriedades, corpo) -> None:
+        """Basic.Return (mandatory sem fila): chega antes do ack da mesma mensagem."""
+        if propriedades.message_id:
+            self._devolvidas.add(propriedades.message_id)
+    
+    def _ao_confirmar(self, frame) -> None:
+        """Ack/Nack do broker, possivelmente cobrindo várias mensagens (multiple)."""
+        metodo = frame.method
+        recusada = isinstance(metodo, Basic.Nack)
+        if metodo.multiple:
+            tags = [tag for tag in self._aguardando if tag <= metodo.delivery_tag]
+        else:
+            tags = [metodo.delivery_tag]
+        for tag in tags:
+            pendente = self._aguardando.pop(tag, None)
+            if pendente is None:
+                continue
+            lote, indice, message_id = pendente
+            if recusada:
+                lote.registrar(indice, "nack")
+            elif message_id is not None and message_id in self._devolvidas:
+                self._devolvidas.discard(message_id)
+                lote.registrar(indice, "unroutable")
+            else:
+                lote.registrar(indice)
+            if lote.futuro.done():
+                with self._lock:
+                    self._pendentes.discard(lote.futuro)
+    
+    def _falhar_pendentes(self, erro: Exception) -> None:
+        # Mensagens enviadas sem confirmação: o broker pode ou não tê-las enfileirado
+        pendentes_envio = list(self._aguardando.values())
+        self._aguardando.clear()
+        self._devolvidas.clear()
+        for lote, indice, _ in pendentes_envio:
+            lote.registrar(indice, "conexão perdida antes da confirmação", incerta=True)
+        # Lotes agendados que nem chegaram a ser publicados
+        with self._lock:
+            pendentes, self._pendentes = self._pendentes, set()
+        for futuro in pendentes:
+            if not futuro.done():
+                futuro.set_exception(erro)
+    
+    def _publicar_no_canal(self, mensagens: List[Dict[str, Any]], futuro: Future) -> None:
+        """Publica o lote inteiro na thread do ioloop; as confirmações chegam em _ao_confirmar."""
+        if self._canal is None or not self._canal.is_open:
+            with self._lock:
+                self._pendentes.discard(futuro)
+            if not futuro.done():
+                futuro.set_exception(PublicadorIndisponivel("Canal do RabbitMQ fechado"))
+            return
+        lote = _Lote(len(mensagens), futuro)
+        if not mensagens:
+            lote.concluir()
+        for indice, mensagem in enumerate(mensagens):
+            try:
+                self._canal.basic_publish(
+                    exchange="",
+                    routing_key=self.fila,
+                    body=json.dumps(mensagem, ensure_ascii=False, default=str),
+                    properties=pika.BasicProperties(
+                        delivery_mode=2,  # Persistente
+                        content_type="application/json",
+                        message_id=mensagem.get("job_id")
+                    ),
+                    mandatory=True
+                )
+            except Exception as e:
+                # Canal/conexão caíram no meio do lote: as já enviadas seguem aguardando confirmação
+                logger.error(f"Erro ao publicar mensagem {indice + 1}/{len(mensagens)}: {e}")
+                for restante in range(indice, len(mensagens)):
+                    lote.registrar(restante, f"{type(e).__name__}: {e}")
+                break
+            self._aguardando[self._proxima_tag] = (lote, indice, mensagem.get("job_id"))
+            self._proxima_tag += 1
+        if futuro.done():
+            with self._lock:
+                self._pendentes.discard(futuro)
+    
+    def publicar(self, mensagens: List[Dict[str, Any]], timeout_conexao: float = 5.0) -> Future:
+        """
+        Agenda a publicação de um lote de mensagens.
+        
+        Args:
+            mensagens: Mensagens JSON-serializáveis (com job_id)
+            timeout_conexao: Espera máxima por uma conexão ativa
+        
+        Returns:
+            Future com a quantidade de mensagens confirmadas pelo broker
+            (FalhaPublicacao com os índices recusados e os de estado incerto,
+            PublicadorIndisponivel se o lote nem chegou a ser publicado)
+        
+        Raises:
+            PublicadorIndisponivel: Sem conexão com o RabbitMQ
+        """
+        if not self._conectado.wait(timeout_conexao):
+            raise PublicadorIndisponivel("RabbitMQ indisponível para publicação")
+        futuro: Future = Future()
+        with self._lock:
+            self._pendentes.add(futuro)
+        try:
+            self._conexao.ioloop.add_callback_threadsafe(functools.partial(self._publicar_no_canal, mensagens, futuro))
+        except Exception as e:
+            with self._lock:
+                self._pendentes.discard(futuro)
+            raise PublicadorIndisponivel(str(e)) from e
+        return futuro
+    
+    def fechar(self) -> None:
+        """Encerra a thread e fecha a conexão (publicações pendentes falham)."""
+        self._parar.set()
+        conexao = self._conexao
+        if conexao is not None:
+            try:
+                conexao.ioloop.add_callback_threadsafe(
+                    lambda: conexao.close() if conexao.is_open else conexao.ioloop.stop()
+                )
+            except Exception:
+                pass
+        self._thread.join(timeout=10)
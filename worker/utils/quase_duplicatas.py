@@ -0,0 +1,159 @@
+"""
+Detecção de quase-duplicatas (releases republicados) com MinHash + LSH.
+
+O mesmo press release aparece em vários sites com pequenas edições. Cada
+item vira um conjunto de shingles (n-gramas de palavras normalizadas) e uma
+assinatura MinHash compacta (128 inteiros de 32 bits = 512 bytes, gravada
+em ``articles.minhash``). O LSH por bandas só compara pares que colidem em
+alguma banda; a similaridade de Jaccard estimada confirma o par e os itens
+são agrupados (union-find) num único item com várias fontes.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+import hashlib
+import random
+import re
+import struct
+import unicodedata
+
+NUM_PERMUTACOES = 128
+BANDAS = 16  # 16 bandas x 8 linhas: colisão provável a partir de ~0.7 de similaridade
+LIMIAR_PADRAO = 0.7
+
+_PRIMO = (1 << 61) - 1
+_MASCARA = 0xFFFFFFFF
+_FORMATO = f"<{NUM_PERMUTACOES}I"
+_gerador = random.Random(20240601)  # Semente fixa: assinaturas comparáveis entre processos e jobs
+_COEFICIENTES = [
+    (_gerador.randrange(1, _PRIMO), _gerador.randrange(0, _PRIMO)) for _ in range(NUM_PERMUTACOES)
+]
+_RE_PALAVRA = re.compile(r"\w+")
+
+
+def _palavras(texto: str) -> List[str]:
+    sem_acentos = unicodedata.normalize("NFKD", texto.lower()).encode("ascii", "ignore").decode("ascii")
+    return _RE_PALAVRA.findall(sem_acentos)
+
+
+def shingles(texto: str) -> Set[int]:
+    """
+    Conjunto de shingles de palavras (5-gramas; 3-gramas para textos curtos como resumos).
+    
+    Args:
+        texto: Texto do artigo
+    
+    Returns:
+        Hashes de 64 bits dos shingles
+    """
+    palavras = _palavras(texto)
+    tamanho = 5 if len(palavras) >= 60 else 3
+    if len(palavras) <= tamanho:
+        grams = [" ".join(palavras)] if palavras else []
+    else:
+        grams = [" ".join(palavras[i:i + tamanho]) for i in range(len(palavras) - tamanho + 1)]
+    return {
+        int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "little")
+        for gram in grams
+    }
+
+
+def assinatura_minhash(texto: str) -> Optional[bytes]:
+    """
+    Assinatura MinHash compacta do texto.
+    
+    Args:
+        texto: Texto do artigo
+    
+    Returns:
+        512 bytes (128 x uint32) ou None se o texto não tiver palavras
+    """
+    conjunto = shingles(texto)
+    if not conjunto:
+        return None
+    valores = [min(((a * h + b) % _PRIMO) & _MASCARA for h in conjunto) for a, b in _COEFICIENTES]
+    return struct.pack(_FORMATO, *valores)
+
+
+def similaridade(assinatura_a: bytes, assinatura_b: bytes) -> float:
+    """Similaridade de Jaccard estimada entre duas assinaturas."""
+    valores_a = struct.unpack(_FORMATO, assinatura_a)
+    valores_b = struct.unpack(_FORMATO, assinatura_b)
+    return sum(1 for a, b in zip(valores_a, valores_b) if a == b) / NUM_PERMUTACOES
+
+
+def texto_do_item(item: Dict[str, Any]) -> str:
+    """Texto usado na comparação: título + corpo (ou resumo quando não há corpo)."""
+    return " ".join(filter(None, [item.get("titulo"), item.get("texto") or item.get("resumo_2l")]))
+
+
+def agrupar(assinaturas: Sequence[Optional[bytes]], limiar: float = LIMIAR_PADRAO) -> List[List[int]]:
+    """
+    Agrupa índices cujas assinaturas são quase-duplicatas.
+    
+    Args:
+        assinaturas: Assinatura de cada item (None = item sem texto, nunca agrupado)
+        limiar: Similaridade mínima para considerar dois itens o mesmo artigo
+    
+    Returns:
+        Grupos de índices (cada índice aparece em exatamente um grupo, na ordem original)
+    """
+    pais = list(range(len(assinaturas)))
+    
+    def raiz(indice: int) -> int:
+        while pais[indice] != indice:
+            pais[indice] = pais[pais[indice]]
+            indice = pais[indice]
+        return indice
+    
+    linhas = NUM_PERMUTACOES // BANDAS
+    baldes: Dict[bytes, List[int]] = {}
+    comparados = set()
+    for indice, assinatura in enumerate(assinaturas):
+        if not assinatura:
+            continue
+        for banda in range(BANDAS):
+            chave = bytes([banda]) + assinatura[banda * linhas * 4:(banda + 1) * linhas * 4]
+            for outro in baldes.setdefault(chave, []):
+                if (outro, indice) in comparados:
+                    continue
+                comparados.add((outro, indice))
+                if similaridade(assinaturas[outro], assinatura) >= limiar:
+                    pais[raiz(indice)] = raiz(outro)
+            baldes[chave].append(indice)
+    
+    grupos: Dict[int, List[int]] = {}
+    for indice in range(len(assinaturas)):
+        grupos.setdefault(raiz(indice), []).append(indice)
+    return sorted(grupos.values(), key=lambda grupo: grupo[0])
+
+
+def mesclar_grupo(itens: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Junta itens quase-duplicados num único item com todas as fontes.
+    
+    O item principal é o de maior score (em empate, o de texto mais longo);
+    ele ganha a lista ``fontes`` (site, url, titulo de cada publicação), a
+    união dos termos encontrados e o maior score do grupo.
+    
+    Args:
+        itens: Itens do mesmo artigo
+    
+    Returns:
+        Item consolidado
+    """
+    itens = list(itens)
+    principal = max(itens, key=lambda item: (item.get("score") or 0, len(texto_do_item(item))))
+    mesclado = dict(principal)
+    mesclado["fontes"] = [
+        {"site": item.get("site"), "url": item.get("url"), "titulo": item.get("titulo")}
+        for item in [principal] + [item for item in itens if item is not principal]
+    ]
+    termos = []
+    for item in itens:
+        for termo in item.get("termos_encontrados") or []:
+            if termo not in termos:
+                termos.append(termo)
+    mesclado["termos_encontrados"] = termos
+    mesclado["score"] = max((item.get("score") or 0) for item in itens)
+    mesclado["menciona_lear"] = any(item.get("menciona_lear") for item in itens)
+    return mesclado
@@ -0,0 +1,226 @@
+"""
+Política de retries com filas de atraso e dead-letter queue.
+
+Cada tentativa falha é republicada numa fila de atraso com TTL
+(``clippings.jobs.retry.<n>``) que, ao expirar, devolve a mensagem para a
+fila principal via dead-letter exchange. Esgotadas as tentativas, ou em
+erros permanentes, a mensagem vai para ``clippings.jobs.dlq`` com o erro
+anexado nos headers.
+
+Falhas por dependência fora do ar (circuito aberto) não são culpa do job:
+a mensagem volta pela fila de maior atraso sem gastar tentativas, até um
+limite próprio de reagendamentos (header ``x-indisponivel``).
+"""
+
+from typing import Any, Dict, Optional
+import json
+import logging
+from datetime import datetime
+
+import pika
+
+logger = logging.getLogger(__name__)
+
+HEADER_TENTATIVAS = "x-tentativas"
+HEADER_ERRO = "x-erro"
+HEADER_ERRO_TIPO = "x-erro-tipo"
+HEADER_FALHOU_EM = "x-falhou-em"
+HEADER_INDISPONIVEL = "x-indisponivel"
+
+
+class ErroPermanente(Exception):
+    """Erro que não deve ser retentado (mensagem vai direto para a DLQ)."""
+
+
+class DependenciaIndisponivel(Exception):
+    """Dependência externa fora do ar: reagendar com atraso sem gastar tentativas do job."""
+
+
+class GerenciadorRetry:
+    """Decide e executa o destino de mensagens que falharam."""
+    
+    # Erros determinísticos, levantados explicitamente nos pontos conhecidos (mensagem
+    # malformada, job sem URL): repetir a mensagem só gastaria CPU e LLM. ValueError
+    # genérico (JSON de LLM instável, URL mal formada) continua sendo retentado.
+    ERROS_PERMANENTES = (ErroPermanente,)
+    
+    def __init__(
+        self,
+        fila: str,
+        max_retries: int = 3,
+        backoff_seconds: int = 30,
+        backoff_max_seconds: int = 3600,
+        max_reagendamentos_indisponivel: int = 10
+    ):
+        """
+        Inicializa o gerenciador de retries.
+        
+        Args:
+            fila: Nome da fila principal (ex.: clippings.jobs)
+            max_retries: Número máximo de novas tentativas por mensagem
+            backoff_seconds: Atraso da primeira tentativa (dobra a cada falha)
+            backoff_max_seconds: Teto do atraso entre tentativas
+            max_reagendamentos_indisponivel: Reagendamentos por dependência fora do ar
+                antes de tratar a falha como uma tentativa comum
+        """
+        self.fila = fila
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_seconds = max(1, int(backoff_seconds))
+        self.backoff_max_seconds = max(self.backoff_seconds, int(backoff_max_seconds))
+        self.max_reagendamentos_indisponivel = max(0, int(max_reagendamentos_indisponivel))
+        self.fila_dlq = f"{fila}.dlq"
+    
+    def nome_fila_atraso(self, tentativa: int) -> str:
+        """Retorna o nome da fila de atraso usada para a tentativa informada."""
+        return f"{self.fila}.retry.{tentativa}"
+    
+    def atraso_segundos(self, tentativa: int) -> int:
+        """Backoff exponencial: backoff_seconds * 2^(tentativa-1), limitado ao teto."""
+        return min(self.backoff_seconds * (2 ** (tentativa - 1)), self.backoff_max_seconds)
+    
+    def declarar_filas(self, canal) -> None:
+        """
+        Declara a DLQ e uma fila de atraso por nível de tentativa.
+        
+        Args:
+            canal: Canal do RabbitMQ
+        """
+        canal.queue_declare(queue=self.fila_dlq, durable=True)
+        for tentativa in range(1, self.max_retries + 1):
+            canal.queue_declare(
+                queue=self.nome_fila_atraso(tentativa),
+                durable=True,
+                arguments={
+                    "x-message-ttl": self.atraso_segundos(tentativa) * 1000,
+                    "x-dead-letter-exchange": "",
+                    "x-dead-letter-routing-key": self.fila
+                }
+            )
+    
+    @staticmethod
+    def _contador(properties: Optional[pika.BasicProperties], header: str) -> int:
+        headers = (properties.headers if properties else None) or {}
+        try:
+            return int(headers.get(header, 0))
+        except (TypeError, ValueError):
+            return 0
+    
+    @classmethod
+    def obter_tentativas(cls, properties: Optional[pika.BasicProperties]) -> int:
+        """Retorna quantas vezes a mensagem já falhou (header x-tentativas)."""
+        return cls._contador(properties, HEADER_TENTATIVAS)
+    
+    def erro_permanente(self, erro: BaseException) -> bool:
+        """Indica se o erro não deve ser retentado."""
+        return isinstance(erro, self.ERROS_PERMANENTES)
+    
+    def reagendar_por_indisponibilidade(self, properties: Optional[pika.BasicProperties], erro: BaseException) -> bool:
+        """Indica se a falha é de dependência fora do ar e ainda cabe reagendar sem gastar tentativa."""
+        return (
+            isinstance(erro, DependenciaIndisponivel)
+            and self.max_retries > 0
+            and self._contador(properties, HEADER_INDISPONIVEL) < self.max_reagendamentos_indisponivel
+        )
+    
+    def destino(self, properties: Optional[pika.BasicProperties], erro: BaseException) -> str:
+        """
+        Calcula a fila de destino para uma mensagem que falhou.
+        
+        Args:
+            properties: Propriedades da mensagem original
+            erro: Exceção que causou a falha
+        
+        Returns:
+            Nome da fila de atraso ou da DLQ
+        """
+        if self.reagendar_por_indisponibilidade(properties, erro):
+            # Maior atraso disponível: dá tempo para a dependência voltar
+            return self.nome_fila_atraso(self.max_retries)
+        tentativa = self.obter_tentativas(properties) + 1
+        if self.erro_permanente(erro) or tentativa > self.max_retries:
+            return self.fila_dlq
+        return self.nome_fila_atraso(tentativa)
+    
+    def republicar(
+        self,
+        canal,
+        properties: Optional[pika.BasicProperties],
+        body: bytes,
+        erro: BaseException,
+        destino: Optional[str] = None
+    ) -> str:
+        """
+        Republica a mensagem na fila de atraso ou na DLQ.
+        
+        Deve ser chamado na thread da conexão dona do canal.
+        
+        Args:
+            canal: Canal do RabbitMQ
+            properties: Propriedades da mensagem original
+            body: Corpo a ser republicado
+            erro: Exceção que causou a falha
+            destino: Fila de destino já calculada (opcional)
+        
+        Returns:
+            Nome da fila para onde a mensagem foi enviada
+        """
+        destino = destino or self.destino(properties, erro)
+        indisponivel = destino != self.fila_dlq and self.reagendar_por_indisponibilidade(properties, erro)
+        headers: Dict[str, Any] = dict((properties.headers if properties else None) or {})
+        if indisponivel:
+            headers[HEADER_INDISPONIVEL] = self._contador(properties, HEADER_INDISPONIVEL) + 1
+        else:
+            headers[HEADER_TENTATIVAS] = self.obter_tentativas(properties) + 1
+        headers[HEADER_ERRO] = str(erro)[:1000]
+        headers[HEADER_ERRO_TIPO] = type(erro).__name__
+        headers[HEADER_FALHOU_EM] = datetime.now().isoformat()
+        
+        canal.basic_publish(
+            exchange="",
+            routing_key=destino,
+            body=body,
+            properties=pika.BasicProperties(
+                delivery_mode=2,  # Persistente
+                content_type=(properties.content_type if properties else None) or "application/json",
+                headers=headers
+            )
+        )
+        
+        if destino == self.fila_dlq:
+            logger.error(
+                f"Mensagem enviada para {destino} após {headers[HEADER_TENTATIVAS]} tentativa(s): {erro}"
+            )
+        elif indisponivel:
+            logger.warning(
+                f"Mensagem reagendada em {destino} por dependência indisponível "
+                f"({headers[HEADER_INDISPONIVEL]}/{self.max_reagendamentos_indisponivel}): {erro}"
+            )
+        else:
+            logger.warning(
+                f"Mensagem reagendada em {destino} "
+                f"(tentativa {headers[HEADER_TENTATIVAS]}/{self.max_retries}): {erro}"
+            )
+        return destino
+    
+    @staticmethod
+    def corpo_com_job_id(body: bytes, job_id: Optional[str]) -> bytes:
+        """
+        Garante que o job_id gerado acompanhe a mensagem nas novas tentativas.
+        
+        Args:
+            body: Corpo original da mensagem
+            job_id: ID do job atribuído na primeira tentativa
+        
+        Returns:
+            Corpo (possivelmente) reescrito com o job_id
+        """
+        if not job_id:
+            return body
+        try:
+            mensagem = json.loads(body.decode())
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return body
+        if not isinstance(mensagem, dict) or mensagem.get("job_id") == job_id:
+            return body
+        mensagem["job_id"] = job_id
+        return json.dumps(mensagem).encode()
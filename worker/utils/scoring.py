@@ -0,0 +1,196 @@
+"""
+Regras determinísticas de relevância do clipping.
+
+Replica em código o vocabulário, a pontuação e o resumo definidos em
+prompts/clipping_lear.txt, para que artigos coletados sem LLM tenham o
+mesmo formato de item que o agente de browser produz.
+"""
+
+from typing import Any, Dict, List, Optional
+import re
+import unicodedata
+from datetime import datetime, timedelta
+
+TERMOS_EDS = [
+    "chicote elétrico", "chicotes elétricos", "arnês elétrico", "arnês de cabos", "sistema de fiação",
+    "cabeamento", "conectores", "EDS", "sistema elétrico veicular", "arquitetura elétrica",
+    "arquitetura E/E", "distribuição elétrica",
+]
+TERMOS_INTERIORES = ["banco", "assento", "interior", "cockpit", "painel", "acabamento", "revestimento", "espuma", "interior veicular"]
+TERMOS_ELETRIFICACAO = ["elétrico", "elétrica", "eletrificação", "híbrido", "EV", "HEV", "PHEV", "alta tensão"]
+TERMOS_MERCADO = ["Tier 1", "fornecedor", "montadora", "insumos", "cobre", "oferta", "demanda", "risco logístico", "supply chain"]
+TERMOS_INSUMOS = ["insumos", "cobre", "oferta", "demanda", "risco logístico", "supply chain"]
+TERMOS_INVESTIMENTO = ["investimento", "investe", "expansão", "nova fábrica", "nova planta", "modernização", "parceria", "aporte"]
+MONTADORAS = [
+    "Stellantis", "GM", "General Motors", "Volkswagen", "Toyota", "Renault", "Fiat", "Ford", "Hyundai",
+    "Honda", "Nissan", "BYD", "GWM", "Jeep", "Citroën", "Peugeot", "Chevrolet", "Mercedes-Benz", "BMW",
+]
+
+# Siglas são comparadas com caixa original para evitar falsos positivos ("ev" em "eventos")
+_SIGLAS = {"EDS", "EV", "HEV", "PHEV", "GM", "BYD", "GWM", "BMW"}
+
+_RE_PERIODO_DIAS = re.compile(r"(\d+)\s*dias?")
+_RE_PERIODO_SEMANAS = re.compile(r"(\d+)\s*semanas?")
+_RE_PERIODO_MESES = re.compile(r"(\d+)\s*m[eê]s(?:es)?")
+_RE_SENTENCAS = re.compile(r"(?<=[.!?])\s+")
+
+
+def _sem_acentos(texto: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+
+
+def _contem(texto: str, texto_normalizado: str, termo: str) -> bool:
+    """Busca o termo como palavra inteira (case/acento-insensível, exceto siglas)."""
+    if termo in _SIGLAS:
+        return re.search(rf"(?<![\w-]){re.escape(termo)}(?![\w-])", texto) is not None
+    alvo = _sem_acentos(termo.lower())
+    return re.search(rf"(?<!\w){re.escape(alvo)}(?!\w)", texto_normalizado) is not None
+
+
+def termos_cliente(cliente: str) -> List[str]:
+    """Menções diretas do cliente segundo o vocabulário do prompt."""
+    termos = [cliente, "Lear", "Lear Corporation"]
+    return list(dict.fromkeys(termo for termo in termos if termo))
+
+
+def calcular_relevancia(titulo: str, texto: str, cliente: str = "LEAR") -> Dict[str, Any]:
+    """
+    Identifica termos do vocabulário e calcula a pontuação do prompt.
+    
+    Args:
+        titulo: Título do artigo
+        texto: Corpo principal do artigo
+        cliente: Nome do cliente
+    
+    Returns:
+        Dicionário com termos_encontrados, menciona_lear e score (0 a 4)
+    """
+    completo = f"{titulo or ''}\n{texto or ''}"
+    normalizado = _sem_acentos(completo.lower())
+    
+    def encontrados(termos: List[str]) -> List[str]:
+        return [termo for termo in termos if _contem(completo, normalizado, termo)]
+    
+    eds = encontrados(TERMOS_EDS)
+    interiores = encontrados(TERMOS_INTERIORES)
+    eletrificacao = encontrados(TERMOS_ELETRIFICACAO)
+    mercado = encontrados(TERMOS_MERCADO)
+    cliente_termos = encontrados(termos_cliente(cliente))
+    
+    score = 0
+    if eds or interiores or eletrificacao:
+        score += 1
+    if cliente_termos:
+        score += 2
+    if _contem(completo, normalizado, "Tier 1"):
+        score += 1
+    if encontrados(MONTADORAS):
+        score += 1
+    if encontrados(TERMOS_INSUMOS):
+        score += 1
+    if encontrados(TERMOS_INVESTIMENTO):
+        score += 1
+    
+    termos = list(dict.fromkeys(eds + interiores + eletrificacao + mercado + cliente_termos))
+    return {
+        "termos_encontrados": termos,
+        "menciona_lear": bool(cliente_termos),
+        # O schema do prompt limita o score a 1..4
+        "score": min(score, 4) if termos else 0,
+    }
+
+
+def resumir(texto: str, limite: int = 300) -> str:
+    """
+    Resumo extrativo de 2 a 3 frases com no máximo `limite` caracteres.
+    
+    Args:
+        texto: Corpo do artigo
+        limite: Tamanho máximo do resumo
+    
+    Returns:
+        Resumo em texto corrido
+    """
+    frases = [frase.strip() for frase in _RE_SENTENCAS.split((texto or "").replace("\n", " ")) if frase.strip()]
+    resumo = ""
+    for frase in frases[:3]:
+        candidato = f"{resumo} {frase}".strip()
+        if len(candidato) > limite:
+            break
+        resumo = candidato
+    if not resumo and frases:
+        resumo = frases[0][: limite - 3].rstrip() + "..."
+    return resumo
+
+
+def dias_do_periodo(periodo: Optional[str], padrao: int = 30) -> int:
+    """
+    Converte a descrição do período (ex.: "últimos 30 dias") em dias.
+    
+    Args:
+        periodo: Texto do período
+        padrao: Valor usado quando o texto não puder ser interpretado
+    
+    Returns:
+        Número de dias da janela
+    """
+    texto = (periodo or "").lower()
+    for regex, multiplicador in ((_RE_PERIODO_DIAS, 1), (_RE_PERIODO_SEMANAS, 7), (_RE_PERIODO_MESES, 30)):
+        match = regex.search(texto)
+        if match:
+            return int(match.group(1)) * multiplicador
+    return padrao
+
+
+def dentro_do_periodo(data_iso: Optional[str], dias: int, agora: Optional[datetime] = None) -> Optional[bool]:
+    """
+    Indica se a data está na janela de `dias` dias.
+    
+    Returns:
+        True/False, ou None se a data for desconhecida
+    """
+    if not data_iso:
+        return None
+    try:
+        data = datetime.strptime(data_iso[:10], "%Y-%m-%d")
+    except ValueError:
+        return None
+    agora = agora or datetime.now()
+    return agora - timedelta(days=dias) <= data <= agora + timedelta(days=1)
+
+
+def ordenar_itens(itens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Ordena por score decrescente e depois por data decrescente (regra do prompt)."""
+    return sorted(itens, key=lambda item: (item.get("score") or 0, item.get("data_iso") or ""), reverse=True)
+
+
+def montar_email_body(cliente: str, periodo: str, itens: List[Dict[str, Any]], limite: int = 500) -> str:
+    """
+    Gera o email_body_ptbr (máximo `limite` caracteres) a partir dos itens.
+    
+    Args:
+        cliente: Nome do cliente
+        periodo: Descrição do período
+        itens: Itens já ordenados
+    
+    Returns:
+        Corpo do email em português
+    """
+    if not itens:
+        return f"Nenhum conteúdo relevante encontrado no período de {dias_do_periodo(periodo)} dias nos sites permitidos."
+    cabecalho = f"Resumo {cliente} – Período: {periodo}\n\n"
+    rodape = f"\n\nTotal: {len(itens)} matérias relevantes coletadas."
+    linhas: List[str] = []
+    for item in itens:
+        linha = f"• {item.get('titulo', '')}"
+        if len(item.get("fontes") or []) > 1:
+            linha += f" ({len(item['fontes'])} fontes)"
+        if len(cabecalho) + len("\n".join(linhas + [linha])) + len(rodape) > limite:
+            break
+        linhas.append(linha)
+    return cabecalho + "\n".join(linhas) + rodape
+
+
+def chave_url(url: Optional[str]) -> str:
+    """Chave de deduplicação: URL sem query/fragmento, barra final e diferença de caixa."""
+    return (url or "").split("#", 1)[0].split("?", 1)[0].rstrip("/").lower()